@@ -2,7 +2,16 @@
 import datetime
 import uuid
 
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from taskpilot.api import background_tasks
+from taskpilot.api import db_mappings
+from taskpilot.api import permissions
 from taskpilot.api import db_operations as db
+from taskpilot.api import storage_backends as storage
 from taskpilot.api import ai_interactions as ai
 from taskpilot.common import config_info, api_request_classes as api_req
 from taskpilot.common import models
@@ -11,14 +20,139 @@ from taskpilot.api import api_response_classes as api_resp
 logger = config_info.get_logger()
 
 
-def get_user(user_id: str) -> api_resp.GetUserResponse:
+async def _find_items(
+        index: str,
+        query_dict: Dict[str, Any],
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        sort_order: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        filters: Optional[List[Dict[str, Any]]] = None
+) -> Tuple[Optional[Dict[str, Dict[str, Any]]], Optional[str]]:
+    """
+    Find a page of at most limit items matching a query and the filters,
+    following the given cursor, along with the cursor of the next page,
+    sorted by the database on the given field and restricted to the given
+    fields, if any. Raises InvalidCursorError when the cursor was not issued
+    for a previous page
+    """
+    if cursor is not None:
+        db.decode_cursor(cursor)
+    excludes = None
+    if fields:
+        excludes = db_mappings.PRIVATE_FIELDS.get(
+            db_mappings.get_entity(index))
+    page = await storage.search_page(
+        index, query_dict, limit or config_info.API_PAGE_SIZE, cursor,
+        sort_by, sort_order, fields, excludes, filters)
+    if page is None:
+        return None, None
+    return page
+
+
+def _build_filter(index: str,
+                  search_filter: api_req.SearchFilter) -> Dict[str, Any]:
+    """
+    Translate a search filter into a database filter, raising ValueError
+    when its field cannot be filtered on or it has no valid condition
+    """
+    field = search_filter.field
+    if field not in db_mappings.get_filter_fields(index):
+        raise ValueError(f"cannot filter on field '{field}'")
+    conditions = []
+    if search_filter.values is not None:
+        conditions.append(db.build_terms_filter(field, search_filter.values))
+    bounds = {
+        bound: getattr(search_filter, bound)
+        for bound in db.RANGE_BOUNDS
+        if getattr(search_filter, bound) is not None
+    }
+    if bounds:
+        properties = db_mappings.get_index_mappings(index)["properties"]
+        if properties[field]["type"] == "date":
+            for limit in bounds.values():
+                datetime.datetime.strptime(
+                    str(limit), config_info.DATETIME_FORMAT)
+        conditions.append(db.build_range_filter(field, **bounds))
+    if search_filter.prefix is not None:
+        conditions.append(db.build_prefix_filter(field, search_filter.prefix))
+    if search_filter.exists is not None:
+        exists = db.build_exists_filter(field)
+        conditions.append(
+            exists if search_filter.exists
+            else db.build_bool_filter(must_not=[exists])
+        )
+    if not conditions:
+        raise ValueError(f"filter on field '{field}' has no condition")
+    condition = (
+        conditions[0] if len(conditions) == 1
+        else db.build_bool_filter(filter_=conditions)
+    )
+    if search_filter.negate:
+        return db.build_bool_filter(must_not=[condition])
+    return condition
+
+
+def _build_filters(
+        index: str,
+        filters: List[api_req.SearchFilter],
+        any_filters: List[api_req.SearchFilter]) -> List[Dict[str, Any]]:
+    """
+    Translate the filters of a search request into database filters
+    matching all the filters and, if any are given, one of the any_filters
+    """
+    database_filters = [
+        _build_filter(index, search_filter) for search_filter in filters
+    ]
+    if any_filters:
+        database_filters.append(db.build_bool_filter(should=[
+            _build_filter(index, search_filter)
+            for search_filter in any_filters
+        ]))
+    return database_filters
+
+
+def _build_ticket_stats_aggs(group_fields: Dict[str, str],
+                             interval: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Build the aggregations breaking tickets down by the given fields, by
+    whether they are closed and by when they were created
+    """
+    closed = db.build_term_filter(
+        "status", config_info.TicketStatuses.CLOSED)
+    aggs = {
+        name: db.build_terms_agg(field)
+        for name, field in group_fields.items()
+    }
+    aggs["progress"] = db.build_filters_agg({
+        "open": db.build_bool_filter(must_not=[closed]),
+        "closed": closed
+    })
+    aggs["created"] = db.build_date_histogram_agg("created_at", interval)
+    return aggs
+
+
+def _parse_items(model: Type[BaseModel],
+                 partial_model: Type[BaseModel],
+                 items: Dict[str, Dict[str, Any]],
+                 fields: Optional[List[str]] = None) -> List[BaseModel]:
+    """
+    Parse the found items as full models or, when restricted to some fields,
+    as partial models
+    """
+    item_model = partial_model if fields else model
+    return [item_model.parse_obj(item) for item in items.values()]
+
+
+async def get_user(user_id: str) -> api_resp.GetUserResponse:
     """
     Get a user by id
     """
     user_id = user_id.lower()
 
     index = config_info.DB_INDEXES[config_info.Entities.USER]
-    db_get_result = db.get_item(index, user_id)
+    db_get_result = await storage.get_item(index, user_id)
 
     if not db_get_result:
         response = api_resp.GetUserResponse(
@@ -38,7 +172,9 @@ def get_user(user_id: str) -> api_resp.GetUserResponse:
     return response
 
 
-def create_user(user_req: api_req.CreateUserRequest) -> api_resp.Response:
+async def create_user(
+        user_req: api_req.CreateUserRequest,
+        refresh: Optional[str] = None) -> api_resp.Response:
     """
     Create a user
     """
@@ -52,8 +188,7 @@ def create_user(user_req: api_req.CreateUserRequest) -> api_resp.Response:
     user_dict["username"] = user_dict["username"].lower()
     user = models.User.parse_obj(user_dict)
 
-    existent_user = get_user(user.username).user
-    if existent_user is not None:
+    if await storage.item_exists(index, user.username):
         response = api_resp.Response(
             message=f"Failed to create user with id '{user.username}': user"
                     f" already exists",
@@ -63,7 +198,8 @@ def create_user(user_req: api_req.CreateUserRequest) -> api_resp.Response:
         logger.error(response.message)
         return response
 
-    db_create_result = db.create_item(index, user.dict(), user.username)
+    db_create_result = await storage.create_item(
+        index, user.dict(), user.username, refresh=refresh)
 
     if not db_create_result:
         response = api_resp.Response(
@@ -81,8 +217,10 @@ def create_user(user_req: api_req.CreateUserRequest) -> api_resp.Response:
     return response
 
 
-def update_user(user_id: str,
-                user_req: api_req.UpdateUserRequest) -> api_resp.Response:
+async def update_user(
+        user_id: str,
+        user_req: api_req.UpdateUserRequest,
+        refresh: Optional[str] = None) -> api_resp.Response:
     """
     Update a user
     """
@@ -96,7 +234,8 @@ def update_user(user_id: str,
     user_dict["username"] = user_id
     user = models.User.parse_obj(user_dict)
 
-    db_update_result = db.update_item(index, user_id, user.dict())
+    db_update_result = await storage.update_item(
+        index, user_id, user.dict(), refresh=refresh)
 
     if not db_update_result:
         response = api_resp.Response(
@@ -107,6 +246,8 @@ def update_user(user_id: str,
         logger.error(response.message)
         return response
 
+    permissions.invalidate_user(user_id)
+
     response = api_resp.Response(
         message=f"User with id '{user_id}' updated successfully"
     )
@@ -114,14 +255,16 @@ def update_user(user_id: str,
     return response
 
 
-def delete_user(user_id: str) -> api_resp.Response:
+async def delete_user(user_id: str,
+                      refresh: Optional[str] = None) -> api_resp.Response:
     """
     Delete a user
     """
     user_id = user_id.lower()
 
     index = config_info.DB_INDEXES[config_info.Entities.USER]
-    db_delete_result = db.delete_item(index, user_id)
+    db_delete_result = await storage.delete_item(
+        index, user_id, refresh=refresh)
 
     if not db_delete_result:
         response = api_resp.Response(
@@ -132,6 +275,8 @@ def delete_user(user_id: str) -> api_resp.Response:
         logger.error(response.message)
         return response
 
+    permissions.invalidate_user(user_id)
+
     response = api_resp.Response(
         message=f"User with id '{user_id}' deleted successfully"
     )
@@ -139,12 +284,19 @@ def delete_user(user_id: str) -> api_resp.Response:
     return response
 
 
-def get_all_users() -> api_resp.GetAllUsersResponse:
+async def get_all_users(limit: Optional[int] = None,
+                        cursor: Optional[str] = None,
+                        sort_by: Optional[str] = None,
+                        sort_order: Optional[str] = None,
+                        fields: Optional[List[str]] = None
+                        ) -> api_resp.GetAllUsersResponse:
     """
     Get all users
     """
     index = config_info.DB_INDEXES[config_info.Entities.USER]
-    db_get_all_result = db.get_all_items(index)
+    db_get_all_result, next_cursor = await _find_items(
+        index, {}, limit, cursor, sort_by, sort_order,
+        fields)
 
     if db_get_all_result is None:
         response = api_resp.GetAllUsersResponse(
@@ -155,35 +307,54 @@ def get_all_users() -> api_resp.GetAllUsersResponse:
         logger.error(response.message)
         return response
 
-    users = [models.User.parse_obj(user)
-             for user in db_get_all_result.values()]
-
-    users.sort(key=lambda user: user.username)
+    users = _parse_items(models.User, models.PartialUser,
+                         db_get_all_result, fields)
 
     response = api_resp.GetAllUsersResponse(
         message="All users retrieved successfully",
-        users=users
+        users=users,
+        next_cursor=next_cursor
     )
     logger.info(response.message)
     return response
 
 
-def search_users(search_req: api_req.SearchUsersRequest
-                 ) -> api_resp.GetAllUsersResponse:
+async def search_users(search_req: api_req.SearchUsersRequest,
+                       limit: Optional[int] = None,
+                       cursor: Optional[str] = None,
+                       sort_by: Optional[str] = None,
+                       sort_order: Optional[str] = None,
+                       fields: Optional[List[str]] = None
+                       ) -> api_resp.GetAllUsersResponse:
     """
     Search for users
     """
-    search_req.username = search_req.username.lower()
+    if search_req.username is not None:
+        search_req.username = search_req.username.lower()
 
     index = config_info.DB_INDEXES[config_info.Entities.USER]
-    query_dict = search_req.dict()
+    try:
+        filters = _build_filters(
+            index, search_req.filters, search_req.any_filters)
+    except ValueError as exception:
+        response = api_resp.GetAllUsersResponse(
+            message=f"Failed to search for users: {exception}",
+            code=422,
+            result=False
+        )
+        logger.error(response.message)
+        return response
+
+    query_dict = search_req.dict(exclude={"filters", "any_filters"})
     query_dict = {
         field: value
         for field, value in query_dict.items()
         if value is not None
     }
 
-    db_search_result = db.search_items(index, query_dict)
+    db_search_result, next_cursor = await _find_items(
+        index, query_dict, limit, cursor, sort_by, sort_order,
+        fields, filters)
 
     if db_search_result is None:
         response = api_resp.GetAllUsersResponse(
@@ -194,21 +365,25 @@ def search_users(search_req: api_req.SearchUsersRequest
         logger.error(response.message)
         return response
 
-    users = [models.User.parse_obj(user)
-             for user in db_search_result.values()]
-
-    users.sort(key=lambda user: user.username)
+    users = _parse_items(models.User, models.PartialUser,
+                         db_search_result, fields)
 
     response = api_resp.GetAllUsersResponse(
         message="Users retrieved successfully",
-        users=users
+        users=users,
+        next_cursor=next_cursor
     )
     logger.info(response.message)
-    print(response)
     return response
 
 
-def get_all_assigned_tickets(user_id: str) -> api_resp.GetAllTicketsResponse:
+async def get_all_assigned_tickets(user_id: str,
+                                   limit: Optional[int] = None,
+                                   cursor: Optional[str] = None,
+                                   sort_by: Optional[str] = None,
+                                   sort_order: Optional[str] = None,
+                                   fields: Optional[List[str]] = None
+                                   ) -> api_resp.GetAllTicketsResponse:
     """
     Get all tickets assigned to a user
     """
@@ -217,7 +392,9 @@ def get_all_assigned_tickets(user_id: str) -> api_resp.GetAllTicketsResponse:
     index = config_info.DB_INDEXES[config_info.Entities.TICKET]
     query_dict = {"assignee": user_id}
 
-    db_search_result = db.search_items(index, query_dict)
+    db_search_result, next_cursor = await _find_items(
+        index, query_dict, limit, cursor, sort_by, sort_order,
+        fields)
 
     if db_search_result is None:
         response = api_resp.GetAllTicketsResponse(
@@ -229,29 +406,71 @@ def get_all_assigned_tickets(user_id: str) -> api_resp.GetAllTicketsResponse:
         logger.error(response.message)
         return response
 
-    tickets = [models.Ticket.parse_obj(ticket)
-               for ticket in db_search_result.values()]
-
-    tickets.sort(key=lambda ticket: datetime.datetime.strptime(
-        ticket.modified_at, config_info.DATETIME_FORMAT), reverse=True)
+    tickets = _parse_items(models.Ticket, models.PartialTicket,
+                           db_search_result, fields)
 
     response = api_resp.GetAllTicketsResponse(
         message=f"All tickets assigned to user with id '{user_id}' retrieved"
                 f" successfully",
-        tickets=tickets
+        tickets=tickets,
+        next_cursor=next_cursor
+    )
+    logger.info(response.message)
+    return response
+
+
+async def get_user_ticket_stats(
+        user_id: str,
+        interval: str = "month") -> api_resp.GetStatsResponse:
+    """
+    Get the number of tickets assigned to a user per status, priority, type
+    and project, open or closed, and created per interval
+    """
+    user_id = user_id.lower()
+
+    index = config_info.DB_INDEXES[config_info.Entities.TICKET]
+    query_dict = {"assignee": user_id}
+    aggs = _build_ticket_stats_aggs(
+        {
+            "status": "status",
+            "priority": "priority",
+            "type": "type",
+            "project": "parent_project"
+        },
+        interval
+    )
+
+    db_aggregate_result = await storage.aggregate(index, query_dict, aggs)
+
+    if db_aggregate_result is None:
+        response = api_resp.GetStatsResponse(
+            message=f"Failed to retrieve ticket stats of user with id"
+                    f" '{user_id}'",
+            code=424,
+            result=False
+        )
+        logger.error(response.message)
+        return response
+
+    response = api_resp.GetStatsResponse(
+        message=f"Ticket stats of user with id '{user_id}' retrieved"
+                f" successfully",
+        stats=db_aggregate_result
     )
     logger.info(response.message)
     return response
 
 
-def assign_ticket(user_id: str, ticket_id: str) -> api_resp.Response:
+async def assign_ticket(user_id: str,
+                        ticket_id: str,
+                        refresh: Optional[str] = None) -> api_resp.Response:
     """
     Assign a ticket to a user
     """
     user_id = user_id.lower()
 
-    ticket = get_ticket(ticket_id).ticket
-    if ticket is None:
+    tickets_index = config_info.DB_INDEXES[config_info.Entities.TICKET]
+    if not await storage.item_exists(tickets_index, ticket_id):
         response = api_resp.Response(
             message=f"Failed to assign ticket with id '{ticket_id}' to user"
                     f" with id '{user_id}' due to non-existent ticket",
@@ -264,7 +483,8 @@ def assign_ticket(user_id: str, ticket_id: str) -> api_resp.Response:
     index = config_info.DB_INDEXES[config_info.Entities.TICKET]
     ticket_dict = {"assignee": user_id}
 
-    db_update_result = db.update_item(index, ticket_id, ticket_dict)
+    db_update_result = await storage.update_item(
+        index, ticket_id, ticket_dict, refresh=refresh)
 
     if not db_update_result:
         response = api_resp.Response(
@@ -284,7 +504,9 @@ def assign_ticket(user_id: str, ticket_id: str) -> api_resp.Response:
     return response
 
 
-def unassign_ticket(user_id: str, ticket_id: str) -> api_resp.Response:
+async def unassign_ticket(user_id: str,
+                          ticket_id: str,
+                          refresh: Optional[str] = None) -> api_resp.Response:
     """
     Unassign a ticket from a user
     """
@@ -293,7 +515,8 @@ def unassign_ticket(user_id: str, ticket_id: str) -> api_resp.Response:
     index = config_info.DB_INDEXES[config_info.Entities.TICKET]
     ticket_dict = {"assignee": None}
 
-    db_update_result = db.update_item(index, ticket_id, ticket_dict)
+    db_update_result = await storage.update_item(
+        index, ticket_id, ticket_dict, refresh=refresh)
 
     if not db_update_result:
         response = api_resp.Response(
@@ -313,14 +536,17 @@ def unassign_ticket(user_id: str, ticket_id: str) -> api_resp.Response:
     return response
 
 
-def add_favorite_ticket(user_id: str, ticket_id: str) -> api_resp.Response:
+async def add_favorite_ticket(
+        user_id: str,
+        ticket_id: str,
+        refresh: Optional[str] = None) -> api_resp.Response:
     """
     Add a ticket to a user's favorites
     """
     user_id = user_id.lower()
 
-    ticket = get_ticket(ticket_id).ticket
-    if ticket is None:
+    tickets_index = config_info.DB_INDEXES[config_info.Entities.TICKET]
+    if not await storage.item_exists(tickets_index, ticket_id):
         response = api_resp.Response(
             message=f"Failed to add ticket with id '{ticket_id}' to user with"
                     f" id '{user_id}' favorites due to non-existent ticket",
@@ -331,11 +557,8 @@ def add_favorite_ticket(user_id: str, ticket_id: str) -> api_resp.Response:
         return response
 
     index = config_info.DB_INDEXES[config_info.Entities.USER]
-    favorite_tickets = set(get_user(user_id).user.favorite_tickets)
-    favorite_tickets.add(ticket_id)
-    user_update_dict = {"favorite_tickets": list(favorite_tickets)}
-
-    db_update_result = db.update_item(index, user_id, user_update_dict)
+    db_update_result = await storage.add_to_set(
+        index, user_id, "favorite_tickets", ticket_id, refresh=refresh)
 
     if not db_update_result:
         response = api_resp.Response(
@@ -355,20 +578,18 @@ def add_favorite_ticket(user_id: str, ticket_id: str) -> api_resp.Response:
     return response
 
 
-def remove_favorite_ticket(user_id: str, ticket_id: str) -> api_resp.Response:
+async def remove_favorite_ticket(
+        user_id: str,
+        ticket_id: str,
+        refresh: Optional[str] = None) -> api_resp.Response:
     """
     Remove a ticket from a user's favorites
     """
     user_id = user_id.lower()
 
     index = config_info.DB_INDEXES[config_info.Entities.USER]
-    favorite_tickets = set(get_user(user_id).user.favorite_tickets)
-    favorite_tickets.discard(ticket_id)
-    favorite_tickets = list(favorite_tickets)
-
-    user_update_dict = {"favorite_tickets": favorite_tickets}
-
-    db_update_result = db.update_item(index, user_id, user_update_dict)
+    db_update_result = await storage.remove_from_set(
+        index, user_id, "favorite_tickets", ticket_id, refresh=refresh)
 
     if not db_update_result:
         response = api_resp.Response(
@@ -388,14 +609,14 @@ def remove_favorite_ticket(user_id: str, ticket_id: str) -> api_resp.Response:
     return response
 
 
-def login_user(login_req: api_req.LoginRequest) -> api_resp.Response:
+async def login_user(login_req: api_req.LoginRequest) -> api_resp.Response:
     """
     Log in a user
     """
     username = login_req.username.lower()
     password = login_req.password
     hashed_password = config_info.hash_password(password)
-    user = get_user(username).user
+    user = (await get_user(username)).user
 
     if user is None:
         response = api_resp.Response(
@@ -422,33 +643,133 @@ def login_user(login_req: api_req.LoginRequest) -> api_resp.Response:
     return response
 
 
-def get_user_projects(user_id: str) -> api_resp.GetAllProjectsResponse:
+async def get_user_projects(user_id: str,
+                            limit: Optional[int] = None,
+                            cursor: Optional[str] = None,
+                            sort_by: Optional[str] = None,
+                            sort_order: Optional[str] = None,
+                            fields: Optional[List[str]] = None
+                            ) -> api_resp.GetAllProjectsResponse:
     """
-    Get all projects for a user
+    Get all projects a user is a member or the creator of
     """
     user_id = user_id.lower()
 
-    all_projects = get_all_projects().projects
-    user_projects = [
-        project for project in all_projects
-        if user_id in project.members or user_id == project.created_by
-    ]
+    index = config_info.DB_INDEXES[config_info.Entities.PROJECT]
+    db_search_result, next_cursor = await _find_items(
+        index, {}, limit, cursor, sort_by, sort_order,
+        fields, [permissions.build_membership_filter(user_id)])
+
+    if db_search_result is None:
+        response = api_resp.GetAllProjectsResponse(
+            message=f"Failed to retrieve all projects for user with id"
+                    f" '{user_id}'",
+            code=424,
+            result=False
+        )
+        logger.error(response.message)
+        return response
+
+    projects = _parse_items(models.Project, models.PartialProject,
+                            db_search_result, fields)
 
     response = api_resp.GetAllProjectsResponse(
         message=f"All projects for user with id '{user_id}' retrieved"
                 f" successfully",
-        projects=user_projects
+        projects=projects,
+        next_cursor=next_cursor
     )
     logger.info(response.message)
     return response
 
 
-def get_project(project_id: str) -> api_resp.GetProjectResponse:
+async def search_user_visible_tickets(
+        user_id: str,
+        search_req: api_req.SearchTicketsRequest,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        sort_order: Optional[str] = None,
+        fields: Optional[List[str]] = None
+) -> api_resp.GetAllTicketsResponse:
+    """
+    Search for tickets in all the projects a user is a member or the creator
+    of
+    """
+    user_id = user_id.lower()
+
+    tickets_index = config_info.DB_INDEXES[config_info.Entities.TICKET]
+    try:
+        filters = _build_filters(
+            tickets_index, search_req.filters, search_req.any_filters)
+    except ValueError as exception:
+        response = api_resp.GetAllTicketsResponse(
+            message=f"Failed to search for tickets visible to user with id"
+                    f" '{user_id}': {exception}",
+            code=422,
+            result=False
+        )
+        logger.error(response.message)
+        return response
+
+    projects_index = config_info.DB_INDEXES[config_info.Entities.PROJECT]
+    db_projects_result = await storage.search_items(
+        projects_index, {}, includes=["project_id"],
+        filters=[permissions.build_membership_filter(user_id)])
+
+    if db_projects_result is None:
+        response = api_resp.GetAllTicketsResponse(
+            message=f"Failed to search for tickets visible to user with id"
+                    f" '{user_id}' due to failed retrieval of projects",
+            code=424,
+            result=False
+        )
+        logger.error(response.message)
+        return response
+
+    filters.append(
+        db.build_terms_filter("parent_project", list(db_projects_result)))
+
+    query_dict = search_req.dict(exclude={"filters", "any_filters"})
+    query_dict = {
+        field: value
+        for field, value in query_dict.items()
+        if value is not None
+    }
+
+    db_search_result, next_cursor = await _find_items(
+        tickets_index, query_dict, limit, cursor, sort_by, sort_order,
+        fields, filters)
+
+    if db_search_result is None:
+        response = api_resp.GetAllTicketsResponse(
+            message=f"Failed to search for tickets visible to user with id"
+                    f" '{user_id}'",
+            code=424,
+            result=False
+        )
+        logger.error(response.message)
+        return response
+
+    tickets = _parse_items(models.Ticket, models.PartialTicket,
+                           db_search_result, fields)
+
+    response = api_resp.GetAllTicketsResponse(
+        message=f"Tickets visible to user with id '{user_id}' retrieved"
+                f" successfully",
+        tickets=tickets,
+        next_cursor=next_cursor
+    )
+    logger.info(response.message)
+    return response
+
+
+async def get_project(project_id: str) -> api_resp.GetProjectResponse:
     """
     Get a project by id
     """
     index = config_info.DB_INDEXES[config_info.Entities.PROJECT]
-    db_get_result = db.get_item(index, project_id)
+    db_get_result = await storage.get_item(index, project_id)
 
     if not db_get_result:
         response = api_resp.GetProjectResponse(
@@ -468,8 +789,9 @@ def get_project(project_id: str) -> api_resp.GetProjectResponse:
     return response
 
 
-def create_project(
-        project_req: api_req.CreateProjectRequest) -> api_resp.Response:
+async def create_project(
+        project_req: api_req.CreateProjectRequest,
+        refresh: Optional[str] = None) -> api_resp.Response:
     """
     Create a project
     """
@@ -482,8 +804,13 @@ def create_project(
     project_dict["modified_by"] = project_dict["created_by"]
     project = models.Project.parse_obj(project_dict)
 
-    owner_user = get_user(project.created_by).user
-    if owner_user is None:
+    users_index = config_info.DB_INDEXES[config_info.Entities.USER]
+    owner_id = project.created_by.lower()
+    member_ids = [member_id.lower() for member_id in set(project.members)]
+    missing_users = await storage.get_missing_items(
+        users_index, [owner_id] + member_ids)
+
+    if owner_id in missing_users:
         response = api_resp.Response(
             message=f"Failed to create project with id '{project.project_id}'"
                     f" due to non-existent user with id"
@@ -494,22 +821,19 @@ def create_project(
         logger.error(response.message)
         return response
 
-    members = set(project.members)
-    for member_id in members:
-        member_user = get_user(member_id).user
-        if member_user is None:
-            response = api_resp.Response(
-                message=f"Failed to create project with id"
-                        f" '{project.project_id}' due to non-existent member"
-                        f" with id '{member_id}'",
-                code=424,
-                result=False
-            )
-            logger.error(response.message)
-            return response
+    if missing_users:
+        response = api_resp.Response(
+            message=f"Failed to create project with id"
+                    f" '{project.project_id}' due to non-existent member"
+                    f" with id '{missing_users[0]}'",
+            code=424,
+            result=False
+        )
+        logger.error(response.message)
+        return response
 
-    db_create_result = db.create_item(
-        index, project.dict(), project.project_id)
+    db_create_result = await storage.create_item(
+        index, project.dict(), project.project_id, refresh=refresh)
 
     if not db_create_result:
         response = api_resp.Response(
@@ -520,6 +844,8 @@ def create_project(
         logger.error(response.message)
         return response
 
+    permissions.invalidate_all()
+
     response = api_resp.Response(
         message=f"Project with id '{project.project_id}' created successfully"
     )
@@ -527,9 +853,10 @@ def create_project(
     return response
 
 
-def update_project(
+async def update_project(
         project_id: str,
-        project_req: api_req.UpdateProjectRequest) -> api_resp.Response:
+        project_req: api_req.UpdateProjectRequest,
+        refresh: Optional[str] = None) -> api_resp.Response:
     """
     Update a project
     """
@@ -537,9 +864,14 @@ def update_project(
     project_dict = project_req.dict()
     project_dict["modified_at"] = config_info.get_current_time()
 
+    users_index = config_info.DB_INDEXES[config_info.Entities.USER]
     modified_by = project_dict.get("modified_by")
-    modified_by_user = get_user(modified_by).user
-    if modified_by_user is None:
+    member_ids = [member_id.lower()
+                  for member_id in set(project_dict.get("members", []))]
+    missing_users = await storage.get_missing_items(
+        users_index, [modified_by.lower()] + member_ids)
+
+    if modified_by.lower() in missing_users:
         response = api_resp.Response(
             message=f"Failed to update project with id '{project_id}' due to"
                     f" non-existent user with id {modified_by}",
@@ -549,20 +881,18 @@ def update_project(
         logger.error(response.message)
         return response
 
-    members = set(project_dict.get("members", []))
-    for member_id in members:
-        member_user = get_user(member_id).user
-        if member_user is None:
-            response = api_resp.Response(
-                message=f"Failed to update project with id '{project_id}' due"
-                        f" to non-existent member with id '{member_id}'",
-                code=424,
-                result=False
-            )
-            logger.error(response.message)
-            return response
+    if missing_users:
+        response = api_resp.Response(
+            message=f"Failed to update project with id '{project_id}' due"
+                    f" to non-existent member with id '{missing_users[0]}'",
+            code=424,
+            result=False
+        )
+        logger.error(response.message)
+        return response
 
-    db_update_result = db.update_item(index, project_id, project_dict)
+    db_update_result = await storage.update_item(
+        index, project_id, project_dict, refresh=refresh)
 
     if not db_update_result:
         response = api_resp.Response(
@@ -573,6 +903,8 @@ def update_project(
         logger.error(response.message)
         return response
 
+    permissions.invalidate_all()
+
     response = api_resp.Response(
         message=f"Project with id '{project_id}' updated successfully"
     )
@@ -580,53 +912,85 @@ def update_project(
     return response
 
 
-def delete_project(project_id: str) -> api_resp.Response:
+async def delete_project(
+        project_id: str,
+        refresh: Optional[str] = None) -> api_resp.GetTaskResponse:
     """
-    Delete a project
+    Start deleting a project along with its tickets and their comments, as
+    a background task. The tickets and comments are deleted without
+    refreshing, the refresh mode only applies to the project itself
     """
     index = config_info.DB_INDEXES[config_info.Entities.PROJECT]
-
-    child_tickets_req = api_req.SearchTicketsRequest(parent_project=project_id)
-    child_tickets_resp = search_tickets(child_tickets_req)
-    child_tickets = [ticket.ticket_id for ticket in child_tickets_resp.tickets]
-
-    for ticket_id in child_tickets:
-        delete_ticket_response = delete_ticket(ticket_id)
-        if not delete_ticket_response.result:
-            response = api_resp.Response(
-                message=f"Failed to delete linked project with id"
-                        f" '{project_id}' due to failed ticket deletion:"
-                        f" {delete_ticket_response.message}",
-                code=424,
-                result=False
-            )
-            logger.error(response.message)
-            return response
-
-    db_delete_result = db.delete_item(index, project_id)
-
-    if not db_delete_result:
-        response = api_resp.Response(
-            message=f"Failed to delete project with id '{project_id}'",
+    if not await storage.item_exists(index, project_id):
+        response = api_resp.GetTaskResponse(
+            message=f"Failed to delete project with id '{project_id}' due"
+                    f" to non-existent project",
             code=424,
             result=False
         )
         logger.error(response.message)
         return response
 
-    response = api_resp.Response(
-        message=f"Project with id '{project_id}' deleted successfully"
+    async def delete_project_cascade(
+            task: models.BackgroundTask) -> Optional[str]:
+        tickets_index = config_info.DB_INDEXES[config_info.Entities.TICKET]
+        comments_index = config_info.DB_INDEXES[
+            config_info.Entities.COMMENT]
+
+        child_tickets = await storage.search_items(
+            tickets_index, {"parent_project": project_id},
+            includes=["ticket_id"])
+        if child_tickets is None:
+            return "failed search for linked tickets"
+        child_ticket_ids = list(child_tickets)
+
+        error_message = await _detach_descendant_tickets(
+            child_ticket_ids, project_id)
+        if error_message is not None:
+            return error_message
+        error_message = await _run_cascade([
+            ("comment deletion", storage.delete_by_query,
+             (comments_index, "ticket_id", child_ticket_ids)),
+            ("ticket deletion", storage.delete_by_query,
+             (tickets_index, "parent_project", [project_id])),
+            ("child ticket update", storage.update_by_query,
+             (tickets_index, "parent_ticket", child_ticket_ids,
+              {"parent_ticket": None,
+               "modified_at": config_info.get_current_time()}))
+        ], task)
+        if error_message is not None:
+            return error_message
+
+        if not await storage.delete_item(index, project_id, refresh=refresh):
+            return "failed project deletion"
+        permissions.invalidate_all()
+        return None
+
+    task = background_tasks.start_task(
+        f"Deletion of project with id '{project_id}'",
+        delete_project_cascade)
+
+    response = api_resp.GetTaskResponse(
+        message=f"Deletion of project with id '{project_id}' started",
+        task=task
     )
     logger.info(response.message)
     return response
 
 
-def get_all_projects() -> api_resp.GetAllProjectsResponse:
+async def get_all_projects(limit: Optional[int] = None,
+                           cursor: Optional[str] = None,
+                           sort_by: Optional[str] = None,
+                           sort_order: Optional[str] = None,
+                           fields: Optional[List[str]] = None
+                           ) -> api_resp.GetAllProjectsResponse:
     """
     Get all projects
     """
     index = config_info.DB_INDEXES[config_info.Entities.PROJECT]
-    db_get_all_result = db.get_all_items(index)
+    db_get_all_result, next_cursor = await _find_items(
+        index, {}, limit, cursor, sort_by, sort_order,
+        fields)
 
     if db_get_all_result is None:
         response = api_resp.GetAllProjectsResponse(
@@ -637,34 +1001,51 @@ def get_all_projects() -> api_resp.GetAllProjectsResponse:
         logger.error(response.message)
         return response
 
-    projects = [models.Project.parse_obj(project)
-                for project in db_get_all_result.values()]
-
-    projects.sort(key=lambda project: datetime.datetime.strptime(
-        project.modified_at, config_info.DATETIME_FORMAT), reverse=True)
+    projects = _parse_items(models.Project, models.PartialProject,
+                            db_get_all_result, fields)
 
     response = api_resp.GetAllProjectsResponse(
         message="All projects retrieved successfully",
-        projects=projects
+        projects=projects,
+        next_cursor=next_cursor
     )
     logger.info(response.message)
     return response
 
 
-def search_projects(search_req: api_req.SearchProjectsRequest
+async def search_projects(search_req: api_req.SearchProjectsRequest,
+                          limit: Optional[int] = None,
+                          cursor: Optional[str] = None,
+                          sort_by: Optional[str] = None,
+                          sort_order: Optional[str] = None,
+                          fields: Optional[List[str]] = None
                           ) -> api_resp.GetAllProjectsResponse:
     """
     Search for projects
     """
     index = config_info.DB_INDEXES[config_info.Entities.PROJECT]
-    query_dict = search_req.dict()
+    try:
+        filters = _build_filters(
+            index, search_req.filters, search_req.any_filters)
+    except ValueError as exception:
+        response = api_resp.GetAllProjectsResponse(
+            message=f"Failed to search for projects: {exception}",
+            code=422,
+            result=False
+        )
+        logger.error(response.message)
+        return response
+
+    query_dict = search_req.dict(exclude={"filters", "any_filters"})
     query_dict = {
         field: value
         for field, value in query_dict.items()
         if value is not None
     }
 
-    db_search_result = db.search_items(index, query_dict)
+    db_search_result, next_cursor = await _find_items(
+        index, query_dict, limit, cursor, sort_by, sort_order,
+        fields, filters)
 
     if db_search_result is None:
         response = api_resp.GetAllProjectsResponse(
@@ -675,30 +1056,35 @@ def search_projects(search_req: api_req.SearchProjectsRequest
         logger.error(response.message)
         return response
 
-    projects = [models.Project.parse_obj(project)
-                for project in db_search_result.values()]
-
-    projects.sort(key=lambda project: datetime.datetime.strptime(
-        project.modified_at, config_info.DATETIME_FORMAT), reverse=True)
+    projects = _parse_items(models.Project, models.PartialProject,
+                            db_search_result, fields)
 
     response = api_resp.GetAllProjectsResponse(
         message="Projects retrieved successfully",
-        projects=projects
+        projects=projects,
+        next_cursor=next_cursor
     )
     logger.info(response.message)
 
     return response
 
 
-def get_all_tickets_in_project(project_id: str
-                               ) -> api_resp.GetAllTicketsResponse:
+async def get_all_tickets_in_project(project_id: str,
+                                     limit: Optional[int] = None,
+                                     cursor: Optional[str] = None,
+                                     sort_by: Optional[str] = None,
+                                     sort_order: Optional[str] = None,
+                                     fields: Optional[List[str]] = None
+                                     ) -> api_resp.GetAllTicketsResponse:
     """
     Get all tickets in a project
     """
     index = config_info.DB_INDEXES[config_info.Entities.TICKET]
     query_dict = {"parent_project": project_id}
 
-    db_search_result = db.search_items(index, query_dict)
+    db_search_result, next_cursor = await _find_items(
+        index, query_dict, limit, cursor, sort_by, sort_order,
+        fields)
 
     if db_search_result is None:
         response = api_resp.GetAllTicketsResponse(
@@ -710,29 +1096,68 @@ def get_all_tickets_in_project(project_id: str
         logger.error(response.message)
         return response
 
-    tickets = [models.Ticket.parse_obj(ticket)
-               for ticket in db_search_result.values()]
-
-    tickets.sort(key=lambda ticket: datetime.datetime.strptime(
-        ticket.modified_at, config_info.DATETIME_FORMAT), reverse=True)
+    tickets = _parse_items(models.Ticket, models.PartialTicket,
+                           db_search_result, fields)
 
     response = api_resp.GetAllTicketsResponse(
         message=f"All tickets in project with id '{project_id}' retrieved"
                 f" successfully",
-        tickets=tickets
+        tickets=tickets,
+        next_cursor=next_cursor
     )
     logger.info(response.message)
     return response
 
 
-def add_member_to_project(project_id: str,
-                          user_id: str) -> api_resp.Response:
+async def get_project_ticket_stats(
+        project_id: str,
+        interval: str = "month") -> api_resp.GetStatsResponse:
+    """
+    Get the number of tickets in a project per status, priority, type and
+    assignee, open or closed, and created per interval
+    """
+    index = config_info.DB_INDEXES[config_info.Entities.TICKET]
+    query_dict = {"parent_project": project_id}
+    aggs = _build_ticket_stats_aggs(
+        {
+            "status": "status",
+            "priority": "priority",
+            "type": "type",
+            "assignee": "assignee"
+        },
+        interval
+    )
+
+    db_aggregate_result = await storage.aggregate(index, query_dict, aggs)
+
+    if db_aggregate_result is None:
+        response = api_resp.GetStatsResponse(
+            message=f"Failed to retrieve ticket stats of project with id"
+                    f" '{project_id}'",
+            code=424,
+            result=False
+        )
+        logger.error(response.message)
+        return response
+
+    response = api_resp.GetStatsResponse(
+        message=f"Ticket stats of project with id '{project_id}' retrieved"
+                f" successfully",
+        stats=db_aggregate_result
+    )
+    logger.info(response.message)
+    return response
+
+
+async def add_member_to_project(
+        project_id: str,
+        user_id: str,
+        refresh: Optional[str] = None) -> api_resp.Response:
     """
     Add a member to a project
     """
     projects_index = config_info.DB_INDEXES[config_info.Entities.PROJECT]
-    project = get_project(project_id).project
-    if project is None:
+    if not await storage.item_exists(projects_index, project_id):
         response = api_resp.Response(
             message=f"Failed to add user with id '{user_id}' to project with"
                     f" id '{project_id}' due to non-existent project",
@@ -742,8 +1167,8 @@ def add_member_to_project(project_id: str,
         logger.error(response.message)
         return response
 
-    user = get_user(user_id).user
-    if user is None:
+    users_index = config_info.DB_INDEXES[config_info.Entities.USER]
+    if not await storage.item_exists(users_index, user_id):
         response = api_resp.Response(
             message=f"Failed to add user with id '{user_id}' to project with"
                     f" id '{project_id}' due to non-existent user",
@@ -753,13 +1178,8 @@ def add_member_to_project(project_id: str,
         logger.error(response.message)
         return response
 
-    project_dict = project.dict()
-    members = project_dict["members"]
-    members.add(user_id)
-    project_dict["members"] = members
-
-    db_update_project_result = db.update_item(projects_index, project_id,
-                                              project_dict)
+    db_update_project_result = await storage.add_to_set(
+        projects_index, project_id, "members", user_id, refresh=refresh)
 
     if not db_update_project_result:
         response = api_resp.Response(
@@ -771,6 +1191,8 @@ def add_member_to_project(project_id: str,
         logger.error(response.message)
         return response
 
+    permissions.invalidate_user(user_id)
+
     response = api_resp.Response(
         message=f"User with id '{user_id}' added to project with id"
                 f" '{project_id}' successfully"
@@ -779,14 +1201,15 @@ def add_member_to_project(project_id: str,
     return response
 
 
-def remove_member_from_project(project_id: str,
-                               user_id: str) -> api_resp.Response:
+async def remove_member_from_project(
+        project_id: str,
+        user_id: str,
+        refresh: Optional[str] = None) -> api_resp.Response:
     """
     Remove a member from a project
     """
     projects_index = config_info.DB_INDEXES[config_info.Entities.PROJECT]
-    project = get_project(project_id).project
-    if project is None:
+    if not await storage.item_exists(projects_index, project_id):
         response = api_resp.Response(
             message=f"Failed to remove user with id '{user_id}' from project"
                     f" with id '{project_id}' due to non-existent project",
@@ -796,16 +1219,8 @@ def remove_member_from_project(project_id: str,
         logger.error(response.message)
         return response
 
-    project_dict = project.dict()
-    members = set(project_dict["members"])
-    members.discard(user_id)
-    project_dict["members"] = list(members)
-
-    db_update_project_result = db.update_item(projects_index, project_id,
-                                              project_dict)
-
-    user = get_user(user_id).user
-    if user is None:
+    users_index = config_info.DB_INDEXES[config_info.Entities.USER]
+    if not await storage.item_exists(users_index, user_id):
         response = api_resp.Response(
             message=f"Failed to remove user with id '{user_id}' from project"
                     f" with id '{project_id}' due to non-existent user",
@@ -815,6 +1230,9 @@ def remove_member_from_project(project_id: str,
         logger.error(response.message)
         return response
 
+    db_update_project_result = await storage.remove_from_set(
+        projects_index, project_id, "members", user_id, refresh=refresh)
+
     if not db_update_project_result:
         response = api_resp.Response(
             message=f"Failed to remove user with id '{user_id}' from project"
@@ -825,6 +1243,8 @@ def remove_member_from_project(project_id: str,
         logger.error(response.message)
         return response
 
+    permissions.invalidate_user(user_id)
+
     response = api_resp.Response(
         message=f"User with id '{user_id}' removed from project with id"
                 f" '{project_id}' successfully"
@@ -833,108 +1253,122 @@ def remove_member_from_project(project_id: str,
     return response
 
 
-def is_user_owner_of_project(project_id: str,
-                             user_id: str) -> api_resp.Response:
+async def _check_user_permission(user_id: str,
+                                 entity: str,
+                                 entity_id: str,
+                                 permission: str) -> api_resp.Response:
     """
-    Check if a user is the owner of a project
+    Check a single right of a user on an entity against their effective
+    rights
     """
-    project = get_project(project_id).project
-    if project is None:
-        response = api_resp.Response(
-            message=f"Failed to check if user with id '{user_id}' is owner of"
-                    f" project with id '{project_id}' due to non-existent"
-                    f" project",
-            code=424,
-            result=False
-        )
-        logger.error(response.message)
-        return response
+    user_id = user_id.lower()
+    relation = (
+        "a member" if permission == config_info.Permissions.MEMBER
+        else "the owner"
+    )
 
-    user = get_user(user_id).user
-    if user is None:
+    results = await permissions.check_permissions(
+        user_id, [(entity, entity_id, permission)])
+
+    if results is None or results[0] is None:
+        missing = "user" if results is None else entity
         response = api_resp.Response(
-            message=f"Failed to check if user with id '{user_id}' is owner of"
-                    f" project with id '{project_id}' due to non-existent"
-                    f" user",
+            message=f"Failed to check if user with id '{user_id}' is"
+                    f" {permission} of {entity} with id '{entity_id}' due to"
+                    f" non-existent {missing}",
             code=424,
             result=False
         )
         logger.error(response.message)
         return response
 
-    if project.created_by == user_id or user.is_admin:
+    if results[0]:
         response = api_resp.Response(
-            message=f"User with id '{user_id}' is the owner of project with"
-                    f" id '{project_id}'",
-            result=True
+            message=f"User with id '{user_id}' is {relation} of {entity}"
+                    f" with id '{entity_id}'"
         )
         logger.info(response.message)
         return response
 
     response = api_resp.Response(
-        message=f"User with id '{user_id}' is not the owner of project with"
-                f" id '{project_id}'",
+        message=f"User with id '{user_id}' is not {relation} of {entity}"
+                f" with id '{entity_id}'",
         result=False
     )
     logger.info(response.message)
     return response
 
 
-def is_user_member_of_project(project_id: str,
-                              user_id: str) -> api_resp.Response:
+async def check_user_permissions(
+        user_id: str,
+        check_req: api_req.CheckPermissionsRequest
+) -> api_resp.CheckPermissionsResponse:
     """
-    Check if a user is a member of a project
+    Check many rights of a user on projects, tickets and comments at once
     """
-    project = get_project(project_id).project
-    if project is None:
-        response = api_resp.Response(
-            message=f"Failed to check if user with id '{user_id}' is member of"
-                    f" project with id '{project_id}' due to non-existent"
-                    f" project",
-            code=424,
+    user_id = user_id.lower()
+    checks = [
+        (check.entity, check.entity_id, check.permission)
+        for check in check_req.checks
+    ]
+
+    try:
+        results = await permissions.check_permissions(user_id, checks)
+    except ValueError as exception:
+        response = api_resp.CheckPermissionsResponse(
+            message=f"Failed to check permissions of user with id"
+                    f" '{user_id}': {exception}",
+            code=422,
             result=False
         )
         logger.error(response.message)
         return response
 
-    user = get_user(user_id).user
-    if user is None:
-        response = api_resp.Response(
-            message=f"Failed to check if user with id '{user_id}' is member of"
-                    f" project with id '{project_id}' due to non-existent"
-                    f" user",
+    if results is None:
+        response = api_resp.CheckPermissionsResponse(
+            message=f"Failed to check permissions of user with id"
+                    f" '{user_id}' due to non-existent user",
             code=424,
             result=False
         )
         logger.error(response.message)
         return response
 
-    if (user_id in project.members
-            or project.created_by == user_id
-            or user.is_admin):
-        response = api_resp.Response(
-            message=f"User with id '{user_id}' is a member of project with"
-                    f" id '{project_id}'",
-            result=True
-        )
-        logger.info(response.message)
-        return response
-
-    response = api_resp.Response(
-        message=f"User with id '{user_id}' is not a member of project with"
-                f" id '{project_id}'",
-        result=False
+    response = api_resp.CheckPermissionsResponse(
+        message=f"Permissions of user with id '{user_id}' checked"
+                f" successfully",
+        permissions=results
     )
     logger.info(response.message)
     return response
 
 
-def get_ticket(ticket_id: str) -> api_resp.GetTicketResponse:
+async def is_user_owner_of_project(project_id: str,
+                                   user_id: str) -> api_resp.Response:
+    """
+    Check if a user is the owner of a project
+    """
+    return await _check_user_permission(
+        user_id, config_info.Entities.PROJECT, project_id,
+        config_info.Permissions.OWNER)
+
+
+async def is_user_member_of_project(project_id: str,
+                                    user_id: str) -> api_resp.Response:
+    """
+    Check if a user is a member of a project
+    """
+    return await _check_user_permission(
+        user_id, config_info.Entities.PROJECT, project_id,
+        config_info.Permissions.MEMBER)
+
+
+async def get_ticket(ticket_id: str) -> api_resp.GetTicketResponse:
     """
     Get a ticket by id
     """
     index = config_info.DB_INDEXES[config_info.Entities.TICKET]
-    db_get_result = db.get_item(index, ticket_id)
+    db_get_result = await storage.get_item(index, ticket_id)
 
     if not db_get_result:
         response = api_resp.GetTicketResponse(
@@ -954,20 +1388,132 @@ def get_ticket(ticket_id: str) -> api_resp.GetTicketResponse:
     return response
 
 
-def create_ticket(
-        ticket_req: api_req.CreateTicketRequest) -> api_resp.Response:
+async def _get_ticket_ancestors(
+        parent_ticket: Optional[str]) -> Optional[List[str]]:
     """
-    Create a ticket
+    Get the ancestors of a ticket placed under a parent ticket, from the root
+    down to the parent, or None if the parent ticket does not exist. Walks
+    up the parent tickets past those written before their ancestors were
+    kept, stopping at missing tickets and at cycles
     """
-    if not ticket_req.ticket_id:
-        ticket_req.ticket_id = str(uuid.uuid4())
-    created_by = get_user(ticket_req.created_by).user
-    assignee = (
-        get_user(ticket_req.assignee).user
-        if ticket_req.assignee else None
-    )
-    if (created_by is None
-            or (assignee is None and ticket_req.assignee is not None)):
+    if not parent_ticket:
+        return []
+    index = config_info.DB_INDEXES[config_info.Entities.TICKET]
+    includes = ["ticket_id", "parent_ticket", "ancestors"]
+    parent = await storage.get_item(index, parent_ticket, includes=includes)
+    if not parent:
+        return None
+    ancestors = [parent_ticket]
+    while "ancestors" not in parent:
+        next_parent = parent.get("parent_ticket")
+        if not next_parent or next_parent in ancestors:
+            return ancestors
+        parent = await storage.get_item(
+            index, next_parent, includes=includes)
+        if not parent:
+            return ancestors
+        ancestors.insert(0, next_parent)
+    return parent["ancestors"] + ancestors
+
+
+async def _rebase_descendant_tickets(
+        ticket_id: str,
+        ancestors: List[str],
+        refresh: Optional[str] = None) -> Optional[str]:
+    """
+    Replace the ancestors of all the descendants of a ticket, down to and
+    including that ticket, with the given ones after it was moved or
+    deleted, returning an error message on failure
+    """
+    index = config_info.DB_INDEXES[config_info.Entities.TICKET]
+    descendants = await storage.search_items(
+        index, {}, includes=["ticket_id", "ancestors"],
+        filters=[db.build_term_filter("ancestors", ticket_id)])
+    if descendants is None:
+        return "failed search for descendant tickets"
+
+    updates = {}
+    for descendant_id, descendant in descendants.items():
+        old_ancestors = descendant["ancestors"]
+        new_ancestors = (
+            ancestors + old_ancestors[old_ancestors.index(ticket_id) + 1:])
+        updates[descendant_id] = {
+            "ancestors": new_ancestors,
+            "depth": len(new_ancestors)
+        }
+    if not updates:
+        return None
+
+    _, failed = await storage.bulk_update(index, updates, refresh=refresh)
+    if failed:
+        return f"failed update of descendant tickets {list(failed)}"
+    return None
+
+
+async def _detach_descendant_tickets(
+        ticket_ids: List[str],
+        project_id: str,
+        refresh: Optional[str] = None) -> Optional[str]:
+    """
+    Cut the ancestors of the descendants of the tickets of a project that
+    are in other projects down to the ones below the last ticket of the
+    project, before the project is deleted, returning an error message on
+    failure
+    """
+    index = config_info.DB_INDEXES[config_info.Entities.TICKET]
+    descendants: Dict[str, Dict[str, Any]] = {}
+    for chunk in db.chunk_values(ticket_ids):
+        found = await storage.search_items(
+            index, {}, includes=["ticket_id", "ancestors"],
+            filters=[db.build_bool_filter(
+                filter_=[db.build_terms_filter("ancestors", chunk)],
+                must_not=[db.build_term_filter("parent_project", project_id)]
+            )])
+        if found is None:
+            return "failed search for descendant tickets"
+        descendants.update(found)
+
+    deleted = set(ticket_ids)
+    updates = {}
+    for descendant_id, descendant in descendants.items():
+        old_ancestors = descendant["ancestors"]
+        last_deleted = max(
+            position for position, ancestor in enumerate(old_ancestors)
+            if ancestor in deleted
+        )
+        new_ancestors = old_ancestors[last_deleted + 1:]
+        updates[descendant_id] = {
+            "ancestors": new_ancestors,
+            "depth": len(new_ancestors)
+        }
+    if not updates:
+        return None
+
+    _, failed = await storage.bulk_update(index, updates, refresh=refresh)
+    if failed:
+        return f"failed update of descendant tickets {list(failed)}"
+    return None
+
+
+async def create_ticket(
+        ticket_req: api_req.CreateTicketRequest,
+        refresh: Optional[str] = None) -> api_resp.Response:
+    """
+    Create a ticket, allocating its id from the parent project counter if
+    none is given
+    """
+    users_index = config_info.DB_INDEXES[config_info.Entities.USER]
+    projects_index = config_info.DB_INDEXES[config_info.Entities.PROJECT]
+    tickets_index = config_info.DB_INDEXES[config_info.Entities.TICKET]
+
+    references = [(users_index, ticket_req.created_by.lower())]
+    if ticket_req.assignee:
+        references.append((users_index, ticket_req.assignee.lower()))
+    if ticket_req.parent_project:
+        references.append((projects_index, ticket_req.parent_project))
+    found, missing = await storage.items_exist(references)
+
+    if any(index == users_index for index, _ in missing):
         response = api_resp.Response(
             message=f"Failed to create ticket with id '{ticket_req.ticket_id}'"
                     f" due to non-existent user",
@@ -977,11 +1523,7 @@ def create_ticket(
         logger.error(response.message)
         return response
 
-    parent_project = (
-        get_project(ticket_req.parent_project).project
-        if ticket_req.parent_project else None
-    )
-    if parent_project is None:
+    if (projects_index, ticket_req.parent_project) not in found:
         response = api_resp.Response(
             message=f"Failed to create ticket with id '{ticket_req.ticket_id}'"
                     f" due to non-existent project",
@@ -991,28 +1533,46 @@ def create_ticket(
         logger.error(response.message)
         return response
 
-    if ticket_req.parent_ticket:
-        parent_ticket = get_ticket(ticket_req.parent_ticket).ticket
-        if parent_ticket is None and ticket_req.parent_ticket is not None:
-            response = api_resp.Response(
-                message=f"Failed to create ticket with id"
-                        f" '{ticket_req.ticket_id}'"
-                        f" due to non-existent parent ticket",
-                code=424,
-                result=False
-            )
-            logger.error(response.message)
-            return response
+    ancestors = await _get_ticket_ancestors(ticket_req.parent_ticket)
 
-    index = config_info.DB_INDEXES[config_info.Entities.TICKET]
+    if ancestors is None:
+        response = api_resp.Response(
+            message=f"Failed to create ticket with id"
+                    f" '{ticket_req.ticket_id}'"
+                    f" due to non-existent parent ticket",
+            code=424,
+            result=False
+        )
+        logger.error(response.message)
+        return response
+
+    counter_result = await storage.increment_counter(
+        projects_index, ticket_req.parent_project, "next_ticket_id")
+
+    if counter_result is None:
+        response = api_resp.Response(
+            message=f"Failed to allocate an id for a ticket in project with"
+                    f" id '{ticket_req.parent_project}'",
+            code=424,
+            result=False
+        )
+        logger.error(response.message)
+        return response
+
+    if not ticket_req.ticket_id:
+        ticket_req.ticket_id = f"{ticket_req.parent_project}-{counter_result}"
+
+    index = tickets_index
     ticket_dict = ticket_req.dict()
     ticket_dict["created_at"] = config_info.get_current_time()
     ticket_dict["modified_at"] = ticket_dict["created_at"]
     ticket_dict["modified_by"] = ticket_dict["created_by"]
+    ticket_dict["ancestors"] = ancestors
+    ticket_dict["depth"] = len(ancestors)
     ticket = models.Ticket.parse_obj(ticket_dict)
 
-    db_create_result = db.create_item(
-        index, ticket.dict(), ticket.ticket_id)
+    db_create_result = await storage.create_item(
+        index, ticket.dict(), ticket.ticket_id, refresh=refresh)
 
     if not db_create_result:
         response = api_resp.Response(
@@ -1023,12 +1583,6 @@ def create_ticket(
         logger.error(response.message)
         return response
 
-    db.update_item(
-        config_info.DB_INDEXES[config_info.Entities.PROJECT],
-        ticket.parent_project,
-        {"next_ticket_id": parent_project.next_ticket_id + 1}
-    )
-
     response = api_resp.Response(
         message=f"Ticket with id '{ticket.ticket_id}' created successfully"
     )
@@ -1036,17 +1590,26 @@ def create_ticket(
     return response
 
 
-def update_ticket(
+async def update_ticket(
         ticket_id: str,
-        ticket_req: api_req.UpdateTicketRequest) -> api_resp.Response:
+        ticket_req: api_req.UpdateTicketRequest,
+        refresh: Optional[str] = None) -> api_resp.Response:
     """
     Update a ticket
     """
-    modified_by = get_user(ticket_req.modified_by).user
-    assignee = (get_user(ticket_req.assignee).user
-                if ticket_req.assignee else None)
-    if (modified_by is None or
-            (assignee is None and ticket_req.assignee is not None)):
+    users_index = config_info.DB_INDEXES[config_info.Entities.USER]
+    projects_index = config_info.DB_INDEXES[config_info.Entities.PROJECT]
+    tickets_index = config_info.DB_INDEXES[config_info.Entities.TICKET]
+
+    references = [
+        (users_index, ticket_req.modified_by.lower()),
+        (projects_index, ticket_req.parent_project)
+    ]
+    if ticket_req.assignee:
+        references.append((users_index, ticket_req.assignee.lower()))
+    _, missing = await storage.items_exist(references)
+
+    if any(index == users_index for index, _ in missing):
         response = api_resp.Response(
             message=f"Failed to update ticket with id '{ticket_id}' due to"
                     f" non-existent user",
@@ -1056,8 +1619,7 @@ def update_ticket(
         logger.error(response.message)
         return response
 
-    parent_project = get_project(ticket_req.parent_project).project
-    if parent_project is None:
+    if (projects_index, ticket_req.parent_project) in missing:
         response = api_resp.Response(
             message=f"Failed to update ticket with id '{ticket_id}' due to"
                     f" non-existent project",
@@ -1067,8 +1629,9 @@ def update_ticket(
         logger.error(response.message)
         return response
 
-    parent_ticket = get_ticket(ticket_req.parent_ticket).ticket
-    if parent_ticket is None and ticket_req.parent_ticket is not None:
+    ancestors = await _get_ticket_ancestors(ticket_req.parent_ticket)
+
+    if ancestors is None:
         response = api_resp.Response(
             message=f"Failed to update ticket with id '{ticket_id}' due to"
                     f" non-existent parent ticket",
@@ -1078,11 +1641,25 @@ def update_ticket(
         logger.error(response.message)
         return response
 
-    index = config_info.DB_INDEXES[config_info.Entities.TICKET]
+    if ticket_id in ancestors:
+        response = api_resp.Response(
+            message=f"Failed to update ticket with id '{ticket_id}' due to"
+                    f" parent ticket being the ticket itself or one of its"
+                    f" descendants",
+            code=424,
+            result=False
+        )
+        logger.error(response.message)
+        return response
+
+    index = tickets_index
     ticket_dict = ticket_req.dict()
     ticket_dict["modified_at"] = config_info.get_current_time()
+    ticket_dict["ancestors"] = ancestors
+    ticket_dict["depth"] = len(ancestors)
 
-    db_update_result = db.update_item(index, ticket_id, ticket_dict)
+    db_update_result = await storage.update_item(
+        index, ticket_id, ticket_dict, refresh=refresh)
 
     if not db_update_result:
         response = api_resp.Response(
@@ -1093,6 +1670,18 @@ def update_ticket(
         logger.error(response.message)
         return response
 
+    error_message = await _rebase_descendant_tickets(
+        ticket_id, ancestors + [ticket_id], refresh=refresh)
+    if error_message is not None:
+        response = api_resp.Response(
+            message=f"Failed to update ticket with id '{ticket_id}' due to"
+                    f" {error_message}",
+            code=424,
+            result=False
+        )
+        logger.error(response.message)
+        return response
+
     response = api_resp.Response(
         message=f"Ticket with id '{ticket_id}' updated successfully"
     )
@@ -1100,61 +1689,59 @@ def update_ticket(
     return response
 
 
-def delete_ticket(ticket_id: str) -> api_resp.Response:
+async def _run_cascade(
+        steps: List[Tuple[str, Callable[..., Awaitable[Any]], Tuple]],
+        task: Optional[models.BackgroundTask] = None,
+        refresh: Optional[str] = None) -> Optional[str]:
+    """
+    Run the by-query steps of a cascading delete one after the other,
+    refreshing as requested, reporting their progress on the given task if
+    any and returning an error message on failure
+    """
+    for step, operation, args in steps:
+        progress = None
+        if task is not None:
+            progress = background_tasks.track_step(task, step)
+        task_status = await operation(
+            *args, progress=progress, refresh=refresh)
+        if task_status is None:
+            return f"failed {step}"
+        if task_status["failures"]:
+            return f"failed {step} for {task_status['failures']} items"
+    return None
+
+
+async def delete_ticket(ticket_id: str,
+                        refresh: Optional[str] = None) -> api_resp.Response:
     """
     Delete a ticket
     """
     index = config_info.DB_INDEXES[config_info.Entities.TICKET]
+    comments_index = config_info.DB_INDEXES[config_info.Entities.COMMENT]
+
+    error_message = await _rebase_descendant_tickets(
+        ticket_id, [], refresh=refresh)
+    if error_message is None:
+        error_message = await _run_cascade([
+            ("comment deletion", storage.delete_by_query,
+             (comments_index, "ticket_id", [ticket_id])),
+            ("child ticket update", storage.update_by_query,
+             (index, "parent_ticket", [ticket_id],
+              {"parent_ticket": None,
+               "modified_at": config_info.get_current_time()}))
+        ], refresh=refresh)
+    if error_message is not None:
+        response = api_resp.Response(
+            message=f"Failed to delete ticket with id '{ticket_id}' due to"
+                    f" {error_message}",
+            code=424,
+            result=False
+        )
+        logger.error(response.message)
+        return response
 
-    child_comments_req = api_req.SearchCommentsRequest(ticket_id=ticket_id)
-    child_comments_resp = search_comments(child_comments_req)
-    child_comments = [comment.comment_id
-                      for comment in child_comments_resp.comments]
-
-    for comment_id in child_comments:
-        delete_comment_resp = delete_comment(comment_id)
-        if not delete_comment_resp.result:
-            response = api_resp.Response(
-                message=f"Failed to delete linked ticket with id '{ticket_id}'"
-                        f" due to failed comment deletion:"
-                        f" {delete_comment_resp.message}",
-                code=424,
-                result=False
-            )
-            logger.error(response.message)
-            return response
-
-    child_tickets_req = api_req.SearchTicketsRequest(parent_ticket=ticket_id)
-    child_tickets_resp = search_tickets(child_tickets_req)
-    child_tickets = child_tickets_resp.tickets
-
-    for child_ticket in child_tickets:
-        update_ticket_req = api_req.UpdateTicketRequest(
-            title=child_ticket.title,
-            description=child_ticket.description,
-            type=child_ticket.type,
-            priority=child_ticket.priority,
-            status=child_ticket.status,
-            assignee=child_ticket.assignee,
-            modified_by=child_ticket.modified_by,
-            parent_project=child_ticket.parent_project,
-            parent_ticket=None
-        )
-        update_ticket_resp = update_ticket(child_ticket.ticket_id,
-                                           update_ticket_req)
-        if not update_ticket_resp.result:
-            response = api_resp.Response(
-                message=f"Failed to delete ticket with id '{ticket_id}'"
-                        f" due to failed child ticket update:"
-                        f" {update_ticket_resp.message}",
-                code=424,
-                result=False
-            )
-            logger.error(response.message)
-            return response
-
-
-    db_delete_result = db.delete_item(index, ticket_id)
+    db_delete_result = await storage.delete_item(
+        index, ticket_id, refresh=refresh)
 
     if not db_delete_result:
         response = api_resp.Response(
@@ -1172,12 +1759,19 @@ def delete_ticket(ticket_id: str) -> api_resp.Response:
     return response
 
 
-def get_all_tickets() -> api_resp.GetAllTicketsResponse:
+async def get_all_tickets(limit: Optional[int] = None,
+                          cursor: Optional[str] = None,
+                          sort_by: Optional[str] = None,
+                          sort_order: Optional[str] = None,
+                          fields: Optional[List[str]] = None
+                          ) -> api_resp.GetAllTicketsResponse:
     """
     Get all tickets
     """
     index = config_info.DB_INDEXES[config_info.Entities.TICKET]
-    db_get_all_result = db.get_all_items(index)
+    db_get_all_result, next_cursor = await _find_items(
+        index, {}, limit, cursor, sort_by, sort_order,
+        fields)
 
     if db_get_all_result is None:
         response = api_resp.GetAllTicketsResponse(
@@ -1188,34 +1782,51 @@ def get_all_tickets() -> api_resp.GetAllTicketsResponse:
         logger.error(response.message)
         return response
 
-    tickets = [models.Ticket.parse_obj(ticket)
-               for ticket in db_get_all_result.values()]
-
-    tickets.sort(key=lambda ticket: datetime.datetime.strptime(
-        ticket.modified_at, config_info.DATETIME_FORMAT), reverse=True)
+    tickets = _parse_items(models.Ticket, models.PartialTicket,
+                           db_get_all_result, fields)
 
     response = api_resp.GetAllTicketsResponse(
         message="All tickets retrieved successfully",
-        tickets=tickets
+        tickets=tickets,
+        next_cursor=next_cursor
     )
     logger.info(response.message)
     return response
 
 
-def search_tickets(search_req: api_req.SearchTicketsRequest
+async def search_tickets(search_req: api_req.SearchTicketsRequest,
+                         limit: Optional[int] = None,
+                         cursor: Optional[str] = None,
+                         sort_by: Optional[str] = None,
+                         sort_order: Optional[str] = None,
+                         fields: Optional[List[str]] = None
                          ) -> api_resp.GetAllTicketsResponse:
     """
     Search for tickets
     """
     index = config_info.DB_INDEXES[config_info.Entities.TICKET]
-    query_dict = search_req.dict()
+    try:
+        filters = _build_filters(
+            index, search_req.filters, search_req.any_filters)
+    except ValueError as exception:
+        response = api_resp.GetAllTicketsResponse(
+            message=f"Failed to search for tickets: {exception}",
+            code=422,
+            result=False
+        )
+        logger.error(response.message)
+        return response
+
+    query_dict = search_req.dict(exclude={"filters", "any_filters"})
     query_dict = {
         field: value
         for field, value in query_dict.items()
         if value is not None
     }
 
-    db_search_result = db.search_items(index, query_dict)
+    db_search_result, next_cursor = await _find_items(
+        index, query_dict, limit, cursor, sort_by, sort_order,
+        fields, filters)
 
     if db_search_result is None:
         response = api_resp.GetAllTicketsResponse(
@@ -1226,29 +1837,34 @@ def search_tickets(search_req: api_req.SearchTicketsRequest
         logger.error(response.message)
         return response
 
-    tickets = [models.Ticket.parse_obj(ticket)
-               for ticket in db_search_result.values()]
-
-    tickets.sort(key=lambda ticket: datetime.datetime.strptime(
-        ticket.modified_at, config_info.DATETIME_FORMAT), reverse=True)
+    tickets = _parse_items(models.Ticket, models.PartialTicket,
+                           db_search_result, fields)
 
     response = api_resp.GetAllTicketsResponse(
         message="Tickets retrieved successfully",
-        tickets=tickets
+        tickets=tickets,
+        next_cursor=next_cursor
     )
     logger.info(response.message)
     return response
 
 
-def get_all_comments_for_ticket(ticket_id: str
-                                ) -> api_resp.GetAllCommentsResponse:
+async def get_all_comments_for_ticket(ticket_id: str,
+                                      limit: Optional[int] = None,
+                                      cursor: Optional[str] = None,
+                                      sort_by: Optional[str] = None,
+                                      sort_order: Optional[str] = None,
+                                      fields: Optional[List[str]] = None
+                                      ) -> api_resp.GetAllCommentsResponse:
     """
     Get all comments for a given ticket
     """
     index = config_info.DB_INDEXES[config_info.Entities.COMMENT]
     query_dict = {"ticket_id": ticket_id}
 
-    db_search_result = db.search_items(index, query_dict)
+    db_search_result, next_cursor = await _find_items(
+        index, query_dict, limit, cursor, sort_by, sort_order,
+        fields)
 
     if db_search_result is None:
         response = api_resp.GetAllCommentsResponse(
@@ -1260,30 +1876,35 @@ def get_all_comments_for_ticket(ticket_id: str
         logger.error(response.message)
         return response
 
-    comments = [models.Comment.parse_obj(comment)
-                for comment in db_search_result.values()]
-
-    comments.sort(key=lambda comment: datetime.datetime.strptime(
-        comment.created_at, config_info.DATETIME_FORMAT))
+    comments = _parse_items(models.Comment, models.PartialComment,
+                            db_search_result, fields)
 
     response = api_resp.GetAllCommentsResponse(
         message=f"All comments for ticket with id '{ticket_id}' retrieved"
                 f" successfully",
-        comments=comments
+        comments=comments,
+        next_cursor=next_cursor
     )
     logger.info(response.message)
     return response
 
 
-def get_all_children_tickets(ticket_id: str
-                             ) -> api_resp.GetAllTicketsResponse:
+async def get_all_children_tickets(ticket_id: str,
+                                   limit: Optional[int] = None,
+                                   cursor: Optional[str] = None,
+                                   sort_by: Optional[str] = None,
+                                   sort_order: Optional[str] = None,
+                                   fields: Optional[List[str]] = None
+                                   ) -> api_resp.GetAllTicketsResponse:
     """
     Get all children tickets for a given ticket
     """
     index = config_info.DB_INDEXES[config_info.Entities.TICKET]
     query_dict = {"parent_ticket": ticket_id}
 
-    db_search_result = db.search_items(index, query_dict)
+    db_search_result, next_cursor = await _find_items(
+        index, query_dict, limit, cursor, sort_by, sort_order,
+        fields)
 
     if db_search_result is None:
         response = api_resp.GetAllTicketsResponse(
@@ -1295,29 +1916,127 @@ def get_all_children_tickets(ticket_id: str
         logger.error(response.message)
         return response
 
-    tickets = [models.Ticket.parse_obj(ticket)
-               for ticket in db_search_result.values()]
-
-    tickets.sort(key=lambda ticket: datetime.datetime.strptime(
-        ticket.modified_at, config_info.DATETIME_FORMAT), reverse=True)
+    tickets = _parse_items(models.Ticket, models.PartialTicket,
+                           db_search_result, fields)
 
     response = api_resp.GetAllTicketsResponse(
         message=f"All children tickets for ticket with id '{ticket_id}'"
                 f" retrieved successfully",
+        tickets=tickets,
+        next_cursor=next_cursor
+    )
+    logger.info(response.message)
+    return response
+
+
+async def get_all_descendant_tickets(
+        ticket_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        sort_order: Optional[str] = None,
+        fields: Optional[List[str]] = None
+) -> api_resp.GetAllTicketsResponse:
+    """
+    Get all descendant tickets for a given ticket, at any depth
+    """
+    index = config_info.DB_INDEXES[config_info.Entities.TICKET]
+    filters = [db.build_term_filter("ancestors", ticket_id)]
+
+    db_search_result, next_cursor = await _find_items(
+        index, {}, limit, cursor, sort_by, sort_order,
+        fields, filters)
+
+    if db_search_result is None:
+        response = api_resp.GetAllTicketsResponse(
+            message=f"Failed to retrieve all descendant tickets for ticket"
+                    f" with id '{ticket_id}'",
+            code=424,
+            result=False
+        )
+        logger.error(response.message)
+        return response
+
+    tickets = _parse_items(models.Ticket, models.PartialTicket,
+                           db_search_result, fields)
+
+    response = api_resp.GetAllTicketsResponse(
+        message=f"All descendant tickets for ticket with id '{ticket_id}'"
+                f" retrieved successfully",
+        tickets=tickets,
+        next_cursor=next_cursor
+    )
+    logger.info(response.message)
+    return response
+
+
+async def get_all_ancestor_tickets(
+        ticket_id: str,
+        fields: Optional[List[str]] = None
+) -> api_resp.GetAllTicketsResponse:
+    """
+    Get all ancestor tickets for a given ticket, from the root down to its
+    parent
+    """
+    index = config_info.DB_INDEXES[config_info.Entities.TICKET]
+    ticket = await storage.get_item(
+        index, ticket_id,
+        includes=["ticket_id", "parent_ticket", "ancestors"])
+
+    if not ticket:
+        response = api_resp.GetAllTicketsResponse(
+            message=f"Ticket with id '{ticket_id}' not found",
+            code=404,
+            result=False
+        )
+        logger.error(response.message)
+        return response
+
+    ancestors = ticket.get("ancestors")
+    if ancestors is None:
+        ancestors = await _get_ticket_ancestors(
+            ticket.get("parent_ticket")) or []
+    refs = [(index, ancestor) for ancestor in ancestors]
+    found, missing = await storage.get_items_from_indexes(
+        refs, includes=fields)
+
+    if missing:
+        response = api_resp.GetAllTicketsResponse(
+            message=f"Failed to retrieve all ancestor tickets for ticket with"
+                    f" id '{ticket_id}' due to non-existent tickets"
+                    f" {[ancestor for _, ancestor in missing]}",
+            code=424,
+            result=False
+        )
+        logger.error(response.message)
+        return response
+
+    tickets = _parse_items(
+        models.Ticket, models.PartialTicket,
+        {ancestor: found[(index, ancestor)] for _, ancestor in refs},
+        fields)
+
+    response = api_resp.GetAllTicketsResponse(
+        message=f"All ancestor tickets for ticket with id '{ticket_id}'"
+                f" retrieved successfully",
         tickets=tickets
     )
     logger.info(response.message)
     return response
 
 
-def change_ticket_status(ticket_id: str, status: str) -> api_resp.Response:
+async def change_ticket_status(
+        ticket_id: str,
+        status: str,
+        refresh: Optional[str] = None) -> api_resp.Response:
     """
     Change the status of a ticket
     """
     index = config_info.DB_INDEXES[config_info.Entities.TICKET]
     ticket_dict = {"status": status}
 
-    db_update_result = db.update_item(index, ticket_id, ticket_dict)
+    db_update_result = await storage.update_item(
+        index, ticket_id, ticket_dict, refresh=refresh)
 
     if not db_update_result:
         response = api_resp.Response(
@@ -1337,12 +2056,12 @@ def change_ticket_status(ticket_id: str, status: str) -> api_resp.Response:
     return response
 
 
-def get_comment(comment_id: str) -> api_resp.GetCommentResponse:
+async def get_comment(comment_id: str) -> api_resp.GetCommentResponse:
     """
     Get a comment by id
     """
     index = config_info.DB_INDEXES[config_info.Entities.COMMENT]
-    db_get_result = db.get_item(index, comment_id)
+    db_get_result = await storage.get_item(index, comment_id)
 
     if not db_get_result:
         response = api_resp.GetCommentResponse(
@@ -1362,75 +2081,31 @@ def get_comment(comment_id: str) -> api_resp.GetCommentResponse:
     return response
 
 
-def is_user_owner_of_ticket(ticket_id: str,
-                            user_id: str) -> api_resp.Response:
+async def is_user_owner_of_ticket(ticket_id: str,
+                                  user_id: str) -> api_resp.Response:
     """
     Check if a user is the owner of a ticket
     """
-    user = get_user(user_id).user
-    if user is None:
-        response = api_resp.Response(
-            message=f"Failed to check if user with id '{user_id}' is owner of"
-                    f" ticket with id '{ticket_id}' due to non-existent user",
-            code=424,
-            result=False
-        )
-        logger.error(response.message)
-        return response
+    return await _check_user_permission(
+        user_id, config_info.Entities.TICKET, ticket_id,
+        config_info.Permissions.OWNER)
 
-    ticket = get_ticket(ticket_id).ticket
-    if ticket is None:
-        response = api_resp.Response(
-            message=f"Failed to check if user with id '{user_id}' is owner of"
-                    f" ticket with id '{ticket_id}' due to non-existent"
-                    f" ticket",
-            code=424,
-            result=False
-        )
-        logger.error(response.message)
-        return response
 
-    project = get_project(ticket.parent_project).project
-    if project is None:
-        response = api_resp.Response(
-            message=f"Failed to check if user with id '{user_id}' is owner of"
-                    f" ticket with id '{ticket_id}' due to non-existent"
-                    f" parent project",
-            code=424,
-            result=False
-        )
-        logger.error(response.message)
-        return response
-
-    if (user.username == ticket.created_by
-            or user.username == project.created_by
-            or user.is_admin
-            or is_user_owner_of_ticket(ticket.parent_ticket, user_id).result):
-        response = api_resp.Response(
-            message=f"User with id '{user.username}' is the owner of ticket"
-                    f" with id '{ticket_id}'"
-        )
-        logger.info(response.message)
-        return response
-
-    response = api_resp.Response(
-        message=f"User with id '{user.username}' is not the owner of ticket"
-                f" with id '{ticket_id}'",
-        result=False
-    )
-    logger.info(response.message)
-    return response
-
-
-def create_comment(
-        comment_req: api_req.CreateCommentRequest) -> api_resp.Response:
+async def create_comment(
+        comment_req: api_req.CreateCommentRequest,
+        refresh: Optional[str] = None) -> api_resp.Response:
     """
-    Create a comment
+    Create a comment, allocating its id from the ticket counter if none is
+    given
     """
-    if not comment_req.comment_id:
-        comment_req.comment_id = str(uuid.uuid4())
-    user = get_user(comment_req.created_by).user
-    if user is None:
+    users_index = config_info.DB_INDEXES[config_info.Entities.USER]
+    tickets_index = config_info.DB_INDEXES[config_info.Entities.TICKET]
+    found, _ = await storage.items_exist([
+        (users_index, comment_req.created_by.lower()),
+        (tickets_index, comment_req.ticket_id)
+    ])
+
+    if (users_index, comment_req.created_by.lower()) not in found:
         response = api_resp.Response(
             message=f"Failed to create comment with id"
                     f" '{comment_req.comment_id}' due to non-existent user"
@@ -1441,8 +2116,7 @@ def create_comment(
         logger.error(response.message)
         return response
 
-    ticket = get_ticket(comment_req.ticket_id).ticket
-    if ticket is None:
+    if (tickets_index, comment_req.ticket_id) not in found:
         response = api_resp.Response(
             message=f"Failed to create comment with id"
                     f" '{comment_req.comment_id}' due to non-existent ticket"
@@ -1453,6 +2127,22 @@ def create_comment(
         logger.error(response.message)
         return response
 
+    counter_result = await storage.increment_counter(
+        tickets_index, comment_req.ticket_id, "next_comment_id")
+
+    if counter_result is None:
+        response = api_resp.Response(
+            message=f"Failed to allocate an id for a comment on ticket with"
+                    f" id '{comment_req.ticket_id}'",
+            code=424,
+            result=False
+        )
+        logger.error(response.message)
+        return response
+
+    if not comment_req.comment_id:
+        comment_req.comment_id = f"{comment_req.ticket_id}-{counter_result}"
+
     index = config_info.DB_INDEXES[config_info.Entities.COMMENT]
     comment_dict = comment_req.dict()
     comment_dict["created_at"] = config_info.get_current_time()
@@ -1460,8 +2150,8 @@ def create_comment(
     comment_dict["modified_by"] = comment_dict["created_by"]
     comment = models.Comment.parse_obj(comment_dict)
 
-    db_create_result = db.create_item(
-        index, comment.dict(), comment.comment_id)
+    db_create_result = await storage.create_item(
+        index, comment.dict(), comment.comment_id, refresh=refresh)
 
     if not db_create_result:
         response = api_resp.Response(
@@ -1472,12 +2162,6 @@ def create_comment(
         logger.error(response.message)
         return response
 
-    db.update_item(
-        config_info.DB_INDEXES[config_info.Entities.TICKET],
-        comment.ticket_id,
-        {"next_comment_id": ticket.next_comment_id + 1}
-    )
-
     response = api_resp.Response(
         message=f"Comment with id '{comment.comment_id}' created successfully"
     )
@@ -1485,12 +2169,14 @@ def create_comment(
     return response
 
 
-def delete_comment(comment_id: str) -> api_resp.Response:
+async def delete_comment(comment_id: str,
+                         refresh: Optional[str] = None) -> api_resp.Response:
     """
     Delete a comment
     """
     index = config_info.DB_INDEXES[config_info.Entities.COMMENT]
-    db_delete_result = db.delete_item(index, comment_id)
+    db_delete_result = await storage.delete_item(
+        index, comment_id, refresh=refresh)
 
     if not db_delete_result:
         response = api_resp.Response(
@@ -1508,12 +2194,19 @@ def delete_comment(comment_id: str) -> api_resp.Response:
     return response
 
 
-def get_all_comments() -> api_resp.GetAllCommentsResponse:
+async def get_all_comments(limit: Optional[int] = None,
+                           cursor: Optional[str] = None,
+                           sort_by: Optional[str] = None,
+                           sort_order: Optional[str] = None,
+                           fields: Optional[List[str]] = None
+                           ) -> api_resp.GetAllCommentsResponse:
     """
     Get all comments
     """
     index = config_info.DB_INDEXES[config_info.Entities.COMMENT]
-    db_get_all_result = db.get_all_items(index)
+    db_get_all_result, next_cursor = await _find_items(
+        index, {}, limit, cursor, sort_by, sort_order,
+        fields)
 
     if db_get_all_result is None:
         response = api_resp.GetAllCommentsResponse(
@@ -1524,34 +2217,51 @@ def get_all_comments() -> api_resp.GetAllCommentsResponse:
         logger.error(response.message)
         return response
 
-    comments = [models.Comment.parse_obj(comment)
-                for comment in db_get_all_result.values()]
-
-    comments.sort(key=lambda comment: datetime.datetime.strptime(
-        comment.modified_at, config_info.DATETIME_FORMAT))
+    comments = _parse_items(models.Comment, models.PartialComment,
+                            db_get_all_result, fields)
 
     response = api_resp.GetAllCommentsResponse(
         message="All comments retrieved successfully",
-        comments=comments
+        comments=comments,
+        next_cursor=next_cursor
     )
     logger.info(response.message)
     return response
 
 
-def search_comments(search_req: api_req.SearchCommentsRequest
+async def search_comments(search_req: api_req.SearchCommentsRequest,
+                          limit: Optional[int] = None,
+                          cursor: Optional[str] = None,
+                          sort_by: Optional[str] = None,
+                          sort_order: Optional[str] = None,
+                          fields: Optional[List[str]] = None
                           ) -> api_resp.GetAllCommentsResponse:
     """
     Search for comments
     """
     index = config_info.DB_INDEXES[config_info.Entities.COMMENT]
-    query_dict = search_req.dict()
+    try:
+        filters = _build_filters(
+            index, search_req.filters, search_req.any_filters)
+    except ValueError as exception:
+        response = api_resp.GetAllCommentsResponse(
+            message=f"Failed to search for comments: {exception}",
+            code=422,
+            result=False
+        )
+        logger.error(response.message)
+        return response
+
+    query_dict = search_req.dict(exclude={"filters", "any_filters"})
     query_dict = {
         field: value
         for field, value in query_dict.items()
         if value is not None
     }
 
-    db_search_result = db.search_items(index, query_dict)
+    db_search_result, next_cursor = await _find_items(
+        index, query_dict, limit, cursor, sort_by, sort_order,
+        fields, filters)
 
     if db_search_result is None:
         response = api_resp.GetAllCommentsResponse(
@@ -1562,73 +2272,73 @@ def search_comments(search_req: api_req.SearchCommentsRequest
         logger.error(response.message)
         return response
 
-    comments = [models.Comment.parse_obj(comment)
-                for comment in db_search_result.values()]
-
-    comments.sort(key=lambda comment: datetime.datetime.strptime(
-        comment.created_at, config_info.DATETIME_FORMAT))
+    comments = _parse_items(models.Comment, models.PartialComment,
+                            db_search_result, fields)
 
     response = api_resp.GetAllCommentsResponse(
         message="Comments retrieved successfully",
-        comments=comments
+        comments=comments,
+        next_cursor=next_cursor
     )
     logger.info(response.message)
     return response
 
 
-def is_user_owner_of_comment(comment_id: str,
-                             user_id: str) -> api_resp.Response:
+async def is_user_owner_of_comment(comment_id: str,
+                                   user_id: str) -> api_resp.Response:
     """
     Check if a user is the owner of a comment
     """
-    user = get_user(user_id).user
-    if user is None:
-        response = api_resp.Response(
-            message=f"Failed to check if user with id '{user_id}' is owner of"
-                    f" comment with id '{comment_id}' due to non-existent"
-                    f" user",
-            code=424,
-            result=False
-        )
-        logger.error(response.message)
-        return response
+    return await _check_user_permission(
+        user_id, config_info.Entities.COMMENT, comment_id,
+        config_info.Permissions.OWNER)
 
-    comment = get_comment(comment_id).comment
-    if comment is None:
-        response = api_resp.Response(
-            message=f"Failed to check if user with id '{user_id}' is owner of"
-                    f" comment with id '{comment_id}' due to non-existent"
-                    f" comment",
-            code=424,
+
+async def get_task(task_id: str) -> api_resp.GetTaskResponse:
+    """
+    Get a background task by id
+    """
+    task = background_tasks.get_task(task_id)
+
+    if task is None:
+        response = api_resp.GetTaskResponse(
+            message=f"Task with id '{task_id}' not found",
+            code=404,
             result=False
         )
         logger.error(response.message)
         return response
 
-    if (user.username == comment.created_by
-            or user.is_admin
-            or is_user_owner_of_ticket(comment.ticket_id, user_id).result):
-        response = api_resp.Response(
-            message=f"User with id '{user.username}' is the owner of comment"
-                    f" with id '{comment_id}'"
-        )
-        logger.info(response.message)
-        return response
+    response = api_resp.GetTaskResponse(
+        message=f"Task with id '{task_id}' retrieved successfully",
+        task=task
+    )
+    logger.info(response.message)
+    return response
 
-    response = api_resp.Response(
-        message=f"User with id '{user.username}' is not the owner of comment"
-                f" with id '{comment_id}'",
-        result=False
+
+async def get_cache_stats() -> api_resp.GetStatsResponse:
+    """
+    Get the hit, miss, eviction, expiration and invalidation counters of the
+    entity cache per index and of the cache of effective rights
+    """
+    response = api_resp.GetStatsResponse(
+        message="Cache stats retrieved successfully",
+        stats={
+            **storage.get_cache_stats(),
+            **permissions.get_cache_stats()
+        }
     )
     logger.info(response.message)
     return response
 
 
-def ai_endpoint(ai_req: api_req.AIRequest) -> api_resp.AIResponse:
+async def ai_endpoint(ai_req: api_req.AIRequest) -> api_resp.AIResponse:
     """
     AI endpoint
     """
-    response_message, chat_history = ai.get_openai_response(**ai_req.dict())
+    response_message, chat_history = await run_in_threadpool(
+        ai.get_openai_response, **ai_req.dict())
 
     if not response_message or not chat_history:
         response = api_resp.AIResponse(
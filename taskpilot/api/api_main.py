@@ -1,11 +1,19 @@
 """Main project file for API service."""
+import math
+
+from typing import Awaitable, Callable, List, Optional
+
 import fastapi
 import uvicorn
 
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse, Response
 
 from taskpilot.common import config_info, api_request_classes as api_req
 from taskpilot.api import api_endpoint_helpers as api_help
+from taskpilot.api import db_mappings
+from taskpilot.api import entity_cache
+from taskpilot.api import db_operations as db
+from taskpilot.api import storage_backends as storage
 from taskpilot.api import api_response_classes as api_resp
 
 
@@ -16,6 +24,89 @@ app = fastapi.FastAPI(
 )
 
 
+def sort_by_query(entity: str) -> Optional[str]:
+    """Query parameter accepting the fields an entity can be sorted by"""
+    index = config_info.DB_INDEXES[entity]
+    sort_fields = "|".join(db_mappings.get_sort_fields(index))
+    return fastapi.Query(None, pattern=f"^({sort_fields})$")
+
+
+def limit_query() -> int:
+    """Query parameter accepting the page sizes the database can serve"""
+    return fastapi.Query(config_info.API_PAGE_SIZE, ge=1,
+                         le=config_info.API_MAX_PAGE_SIZE)
+
+
+def sort_order_query() -> Optional[str]:
+    """Query parameter accepting the sort orders"""
+    sort_orders = "|".join(db_mappings.SORT_ORDERS)
+    return fastapi.Query(None, pattern=f"^({sort_orders})$")
+
+
+def interval_query() -> str:
+    """Query parameter accepting the intervals of the date histograms"""
+    intervals = "|".join(db_mappings.HISTOGRAM_FORMATS)
+    return fastapi.Query("month", pattern=f"^({intervals})$")
+
+
+def refresh_query() -> Optional[str]:
+    """Query parameter accepting the refresh modes of the writes"""
+    refresh_modes = "|".join(config_info.DB_REFRESH_MODES)
+    return fastapi.Query(None, pattern=f"^({refresh_modes})$")
+
+
+@app.on_event("startup")
+async def open_storage_backend() -> None:
+    """Open the storage backend used by this worker."""
+    await storage.open_backend()
+
+
+@app.on_event("shutdown")
+async def close_storage_backend() -> None:
+    """Close the storage backend used by this worker."""
+    await storage.close_backend()
+
+
+@app.middleware("http")
+async def bind_request_scope(
+        request: fastapi.Request,
+        call_next: Callable[[fastapi.Request], Awaitable[Response]]
+) -> Response:
+    """Load every item at most once while serving a request."""
+    with entity_cache.request_scope():
+        return await call_next(request)
+
+
+@app.exception_handler(db.DatabaseUnavailableError)
+async def database_unavailable(
+        _request: fastapi.Request,
+        exception: db.DatabaseUnavailableError) -> JSONResponse:
+    """Tell the client when to retry while the database is unavailable."""
+    response = api_resp.Response(
+        message=f"Database unavailable: {exception}",
+        code=503,
+        result=False
+    )
+    return JSONResponse(
+        status_code=response.code,
+        content=response.dict(),
+        headers={"Retry-After": str(math.ceil(max(exception.retry_after, 1)))}
+    )
+
+
+@app.exception_handler(db.InvalidCursorError)
+async def invalid_cursor(
+        _request: fastapi.Request,
+        exception: db.InvalidCursorError) -> JSONResponse:
+    """Reject a cursor that was not issued for a previous page."""
+    response = api_resp.Response(
+        message=f"Failed to retrieve the page: {exception}",
+        code=422,
+        result=False
+    )
+    return JSONResponse(status_code=response.code, content=response.dict())
+
+
 @app.get("/", include_in_schema=False)
 async def redirect_to_docs() -> RedirectResponse:
     """Redirect to the API documentation."""
@@ -28,18 +119,19 @@ async def get_user(user_id: str) -> api_resp.GetUserResponse:
     """
     Get a user by id
     """
-    response = api_help.get_user(user_id)
+    response = await api_help.get_user(user_id)
     return response
 
 
 @app.post(config_info.API_ROUTES[config_info.APIOperations.USERS_CREATE],
           tags=["Users"])
 async def create_user(
-        user_req: api_req.CreateUserRequest) -> api_resp.Response:
+        user_req: api_req.CreateUserRequest,
+        refresh: Optional[str] = refresh_query()) -> api_resp.Response:
     """
     Create a user
     """
-    response = api_help.create_user(user_req)
+    response = await api_help.create_user(user_req, refresh=refresh)
     return response
 
 
@@ -47,100 +139,156 @@ async def create_user(
          tags=["Users"])
 async def update_user(
         user_id: str,
-        user_req: api_req.UpdateUserRequest) -> api_resp.Response:
+        user_req: api_req.UpdateUserRequest,
+        refresh: Optional[str] = refresh_query()) -> api_resp.Response:
     """
     Update a user
     """
-    response = api_help.update_user(user_id, user_req)
+    response = await api_help.update_user(user_id, user_req, refresh=refresh)
     return response
 
 
 @app.delete(config_info.API_ROUTES[config_info.APIOperations.USERS_DELETE],
             tags=["Users"])
-async def delete_user(user_id: str) -> api_resp.Response:
+async def delete_user(
+        user_id: str,
+        refresh: Optional[str] = refresh_query()) -> api_resp.Response:
     """
     Delete a user
     """
-    response = api_help.delete_user(user_id)
+    response = await api_help.delete_user(user_id, refresh=refresh)
     return response
 
 
 @app.get(config_info.API_ROUTES[config_info.APIOperations.USERS_ALL],
          tags=["Users"])
-async def get_all_users() -> api_resp.GetAllUsersResponse:
+async def get_all_users(
+        limit: int = limit_query(),
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = sort_by_query(config_info.Entities.USER),
+        sort_order: Optional[str] = sort_order_query(),
+        fields: Optional[List[str]] = fastapi.Query(None)
+) -> api_resp.GetAllUsersResponse:
     """
     Get all users
     """
-    response = api_help.get_all_users()
+    response = await api_help.get_all_users(
+        limit=limit, cursor=cursor, sort_by=sort_by,
+        sort_order=sort_order, fields=fields)
     return response
 
 
 @app.post(config_info.API_ROUTES[config_info.APIOperations.USERS_SEARCH],
          tags=["Users"])
-async def search_users(search_req: api_req.SearchUsersRequest
-                       ) -> api_resp.GetAllUsersResponse:
+async def search_users(
+        search_req: api_req.SearchUsersRequest,
+        limit: int = limit_query(),
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = sort_by_query(config_info.Entities.USER),
+        sort_order: Optional[str] = sort_order_query(),
+        fields: Optional[List[str]] = fastapi.Query(None)
+) -> api_resp.GetAllUsersResponse:
     """
     Search for users
     """
-    response = api_help.search_users(search_req)
+    response = await api_help.search_users(
+        search_req, limit=limit, cursor=cursor, sort_by=sort_by,
+        sort_order=sort_order, fields=fields)
     return response
 
 
 @app.get(config_info.API_ROUTES[
              config_info.APIOperations.USERS_ALL_ASSIGNED_TICKETS],
          tags=["Users"])
-async def get_all_assigned_tickets(user_id: str
-                                   ) -> api_resp.GetAllTicketsResponse:
+async def get_all_assigned_tickets(
+        user_id: str,
+        limit: int = limit_query(),
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = sort_by_query(config_info.Entities.TICKET),
+        sort_order: Optional[str] = sort_order_query(),
+        fields: Optional[List[str]] = fastapi.Query(None)
+) -> api_resp.GetAllTicketsResponse:
     """
     Get all tickets assigned to a user
     """
-    response = api_help.get_all_assigned_tickets(user_id)
+    response = await api_help.get_all_assigned_tickets(
+        user_id, limit=limit, cursor=cursor, sort_by=sort_by,
+        sort_order=sort_order, fields=fields)
+    return response
+
+
+@app.get(config_info.API_ROUTES[
+             config_info.APIOperations.USERS_TICKETS_STATS],
+         tags=["Users"])
+async def get_user_ticket_stats(
+        user_id: str,
+        interval: str = interval_query()) -> api_resp.GetStatsResponse:
+    """
+    Get the ticket counts of a user per status, priority, type, project,
+    progress and creation interval
+    """
+    response = await api_help.get_user_ticket_stats(
+        user_id, interval=interval)
     return response
 
 
 @app.post(config_info.API_ROUTES[
               config_info.APIOperations.USERS_ASSIGN_TICKET],
           tags=["Users"])
-async def assign_ticket(user_id: str, ticket_id: str) -> api_resp.Response:
+async def assign_ticket(
+        user_id: str,
+        ticket_id: str,
+        refresh: Optional[str] = refresh_query()) -> api_resp.Response:
     """
     Assign a ticket to a user
     """
-    response = api_help.assign_ticket(user_id, ticket_id)
+    response = await api_help.assign_ticket(
+        user_id, ticket_id, refresh=refresh)
     return response
 
 
 @app.delete(config_info.API_ROUTES[
                 config_info.APIOperations.USERS_UNASSIGN_TICKET],
             tags=["Users"])
-async def unassign_ticket(user_id: str, ticket_id: str) -> api_resp.Response:
+async def unassign_ticket(
+        user_id: str,
+        ticket_id: str,
+        refresh: Optional[str] = refresh_query()) -> api_resp.Response:
     """
     Unassign a ticket from a user
     """
-    response = api_help.unassign_ticket(user_id, ticket_id)
+    response = await api_help.unassign_ticket(
+        user_id, ticket_id, refresh=refresh)
     return response
 
 
 @app.post(config_info.API_ROUTES[
               config_info.APIOperations.USERS_ADD_FAVORITE_TICKET],
           tags=["Users"])
-async def add_favorite_ticket(user_id: str,
-                              ticket_id: str) -> api_resp.Response:
+async def add_favorite_ticket(
+        user_id: str,
+        ticket_id: str,
+        refresh: Optional[str] = refresh_query()) -> api_resp.Response:
     """
     Add a ticket to a user's favorites
     """
-    response = api_help.add_favorite_ticket(user_id, ticket_id)
+    response = await api_help.add_favorite_ticket(
+        user_id, ticket_id, refresh=refresh)
     return response
 
 
 @app.delete(config_info.API_ROUTES[
                 config_info.APIOperations.USERS_REMOVE_FAVORITE_TICKET],
             tags=["Users"])
-async def remove_favorite_ticket(user_id: str,
-                                 ticket_id: str) -> api_resp.Response:
+async def remove_favorite_ticket(
+        user_id: str,
+        ticket_id: str,
+        refresh: Optional[str] = refresh_query()) -> api_resp.Response:
     """
     Remove a ticket from a user's favorites
     """
-    response = api_help.remove_favorite_ticket(user_id, ticket_id)
+    response = await api_help.remove_favorite_ticket(
+        user_id, ticket_id, refresh=refresh)
     return response
 
 
@@ -150,17 +298,62 @@ async def login_user(login_req: api_req.LoginRequest) -> api_resp.Response:
     """
     Log in a user
     """
-    response = api_help.login_user(login_req)
+    response = await api_help.login_user(login_req)
     return response
 
 
 @app.get(config_info.API_ROUTES[config_info.APIOperations.USERS_ALL_PROJECTS],
          tags=["Users"])
-async def get_user_projects(user_id: str) -> api_resp.GetAllProjectsResponse:
+async def get_user_projects(
+        user_id: str,
+        limit: int = limit_query(),
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = sort_by_query(config_info.Entities.PROJECT),
+        sort_order: Optional[str] = sort_order_query(),
+        fields: Optional[List[str]] = fastapi.Query(None)
+) -> api_resp.GetAllProjectsResponse:
+    """
+    Get all projects a user is a member or the creator of
+    """
+    response = await api_help.get_user_projects(
+        user_id, limit=limit, cursor=cursor, sort_by=sort_by,
+        sort_order=sort_order, fields=fields)
+    return response
+
+
+@app.post(config_info.API_ROUTES[
+              config_info.APIOperations.USERS_SEARCH_VISIBLE_TICKETS],
+          tags=["Users"])
+async def search_user_visible_tickets(
+        user_id: str,
+        search_req: api_req.SearchTicketsRequest,
+        limit: int = limit_query(),
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = sort_by_query(config_info.Entities.TICKET),
+        sort_order: Optional[str] = sort_order_query(),
+        fields: Optional[List[str]] = fastapi.Query(None)
+) -> api_resp.GetAllTicketsResponse:
     """
-    Get all projects for a user
+    Search for tickets in all the projects a user is a member or the creator
+    of
     """
-    response = api_help.get_user_projects(user_id)
+    response = await api_help.search_user_visible_tickets(
+        user_id, search_req, limit=limit, cursor=cursor, sort_by=sort_by,
+        sort_order=sort_order, fields=fields)
+    return response
+
+
+@app.post(config_info.API_ROUTES[
+              config_info.APIOperations.USERS_CHECK_PERMISSIONS],
+          tags=["Users"])
+async def check_user_permissions(
+        user_id: str,
+        check_req: api_req.CheckPermissionsRequest
+) -> api_resp.CheckPermissionsResponse:
+    """
+    Check many rights of a user on projects, tickets and comments at once
+    """
+    response = await api_help.check_user_permissions(user_id, check_req)
     return response
 
 
@@ -170,18 +363,19 @@ async def get_project(project_id: str) -> api_resp.GetProjectResponse:
     """
     Get a project by id
     """
-    response = api_help.get_project(project_id)
+    response = await api_help.get_project(project_id)
     return response
 
 
 @app.post(config_info.API_ROUTES[config_info.APIOperations.PROJECTS_CREATE],
           tags=["Projects"])
 async def create_project(
-        project_req: api_req.CreateProjectRequest) -> api_resp.Response:
+        project_req: api_req.CreateProjectRequest,
+        refresh: Optional[str] = refresh_query()) -> api_resp.Response:
     """
     Create a project
     """
-    response = api_help.create_project(project_req)
+    response = await api_help.create_project(project_req, refresh=refresh)
     return response
 
 
@@ -189,78 +383,127 @@ async def create_project(
          tags=["Projects"])
 async def update_project(
         project_id: str,
-        project_req: api_req.UpdateProjectRequest) -> api_resp.Response:
+        project_req: api_req.UpdateProjectRequest,
+        refresh: Optional[str] = refresh_query()) -> api_resp.Response:
     """
     Update a project
     """
-    response = api_help.update_project(project_id, project_req)
+    response = await api_help.update_project(
+        project_id, project_req, refresh=refresh)
     return response
 
 
 @app.delete(config_info.API_ROUTES[config_info.APIOperations.PROJECTS_DELETE],
             tags=["Projects"])
-async def delete_project(project_id: str) -> api_resp.Response:
+async def delete_project(
+        project_id: str,
+        refresh: Optional[str] = refresh_query()) -> api_resp.GetTaskResponse:
     """
-    Delete a project
+    Start deleting a project
     """
-    response = api_help.delete_project(project_id)
+    response = await api_help.delete_project(project_id, refresh=refresh)
     return response
 
 
 @app.get(config_info.API_ROUTES[config_info.APIOperations.PROJECTS_ALL],
          tags=["Projects"])
-async def get_all_projects() -> api_resp.GetAllProjectsResponse:
+async def get_all_projects(
+        limit: int = limit_query(),
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = sort_by_query(config_info.Entities.PROJECT),
+        sort_order: Optional[str] = sort_order_query(),
+        fields: Optional[List[str]] = fastapi.Query(None)
+) -> api_resp.GetAllProjectsResponse:
     """
     Get all projects
     """
-    response = api_help.get_all_projects()
+    response = await api_help.get_all_projects(
+        limit=limit, cursor=cursor, sort_by=sort_by,
+        sort_order=sort_order, fields=fields)
     return response
 
 
 @app.post(config_info.API_ROUTES[config_info.APIOperations.PROJECTS_SEARCH],
           tags=["Projects"])
-async def search_projects(search_req: api_req.SearchProjectsRequest
-                          ) -> api_resp.GetAllProjectsResponse:
+async def search_projects(
+        search_req: api_req.SearchProjectsRequest,
+        limit: int = limit_query(),
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = sort_by_query(config_info.Entities.PROJECT),
+        sort_order: Optional[str] = sort_order_query(),
+        fields: Optional[List[str]] = fastapi.Query(None)
+) -> api_resp.GetAllProjectsResponse:
     """
     Search for projects
     """
-    response = api_help.search_projects(search_req)
+    response = await api_help.search_projects(
+        search_req, limit=limit, cursor=cursor, sort_by=sort_by,
+        sort_order=sort_order, fields=fields)
     return response
 
 
 @app.get(config_info.API_ROUTES[
              config_info.APIOperations.PROJECTS_ALL_TICKETS],
          tags=["Projects"])
-async def get_all_tickets_in_project(project_id: str
-                                     ) -> api_resp.GetAllTicketsResponse:
+async def get_all_tickets_in_project(
+        project_id: str,
+        limit: int = limit_query(),
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = sort_by_query(config_info.Entities.TICKET),
+        sort_order: Optional[str] = sort_order_query(),
+        fields: Optional[List[str]] = fastapi.Query(None)
+) -> api_resp.GetAllTicketsResponse:
     """
     Get all tickets in a project
     """
-    response = api_help.get_all_tickets_in_project(project_id)
+    response = await api_help.get_all_tickets_in_project(
+        project_id, limit=limit, cursor=cursor, sort_by=sort_by,
+        sort_order=sort_order, fields=fields)
+    return response
+
+
+@app.get(config_info.API_ROUTES[
+             config_info.APIOperations.PROJECTS_TICKETS_STATS],
+         tags=["Projects"])
+async def get_project_ticket_stats(
+        project_id: str,
+        interval: str = interval_query()) -> api_resp.GetStatsResponse:
+    """
+    Get the ticket counts of a project per status, priority, type,
+    assignee, progress and creation interval
+    """
+    response = await api_help.get_project_ticket_stats(
+        project_id, interval=interval)
     return response
 
 
 @app.post(config_info.API_ROUTES[
               config_info.APIOperations.PROJECTS_ADD_MEMBER],
             tags=["Projects"])
-async def add_member_to_project(project_id: str,
-                                user_id: str) -> api_resp.Response:
+async def add_member_to_project(
+        project_id: str,
+        user_id: str,
+        refresh: Optional[str] = refresh_query()) -> api_resp.Response:
     """
     Add a member to a project
     """
-    response = api_help.add_member_to_project(project_id, user_id)
+    response = await api_help.add_member_to_project(
+        project_id, user_id, refresh=refresh)
     return response
 
 
 @app.delete(config_info.API_ROUTES[
                 config_info.APIOperations.PROJECTS_REMOVE_MEMBER],
             tags=["Projects"])
-async def remove_member_from_project(project_id: str,
-                                     user_id: str) -> api_resp.Response:
+async def remove_member_from_project(
+        project_id: str,
+        user_id: str,
+        refresh: Optional[str] = refresh_query()) -> api_resp.Response:
     """
     Remove a member from a project
     """
-    response = api_help.remove_member_from_project(project_id, user_id)
+    response = await api_help.remove_member_from_project(
+        project_id, user_id, refresh=refresh)
     return response
 
 
@@ -272,7 +515,7 @@ async def is_user_owner_of_project(project_id: str,
     """
     Check if a user is the owner of a project
     """
-    response = api_help.is_user_owner_of_project(project_id, user_id)
+    response = await api_help.is_user_owner_of_project(project_id, user_id)
     return response
 
 
@@ -284,7 +527,7 @@ async def is_user_member_of_project(project_id: str,
     """
     Check if a user is a member of a project
     """
-    response = api_help.is_user_member_of_project(project_id, user_id)
+    response = await api_help.is_user_member_of_project(project_id, user_id)
     return response
 
 
@@ -294,18 +537,19 @@ async def get_ticket(ticket_id: str) -> api_resp.GetTicketResponse:
     """
     Get a ticket by id
     """
-    response = api_help.get_ticket(ticket_id)
+    response = await api_help.get_ticket(ticket_id)
     return response
 
 
 @app.post(config_info.API_ROUTES[config_info.APIOperations.TICKETS_CREATE],
           tags=["Tickets"])
 async def create_ticket(
-        ticket_req: api_req.CreateTicketRequest) -> api_resp.Response:
+        ticket_req: api_req.CreateTicketRequest,
+        refresh: Optional[str] = refresh_query()) -> api_resp.Response:
     """
     Create a ticket
     """
-    response = api_help.create_ticket(ticket_req)
+    response = await api_help.create_ticket(ticket_req, refresh=refresh)
     return response
 
 
@@ -313,78 +557,153 @@ async def create_ticket(
          tags=["Tickets"])
 async def update_ticket(
         ticket_id: str,
-        ticket_req: api_req.UpdateTicketRequest) -> api_resp.Response:
+        ticket_req: api_req.UpdateTicketRequest,
+        refresh: Optional[str] = refresh_query()) -> api_resp.Response:
     """
     Update a ticket
     """
-    response = api_help.update_ticket(ticket_id, ticket_req)
+    response = await api_help.update_ticket(
+        ticket_id, ticket_req, refresh=refresh)
     return response
 
 
 @app.delete(config_info.API_ROUTES[config_info.APIOperations.TICKETS_DELETE],
             tags=["Tickets"])
-async def delete_ticket(ticket_id: str) -> api_resp.Response:
+async def delete_ticket(
+        ticket_id: str,
+        refresh: Optional[str] = refresh_query()) -> api_resp.Response:
     """
     Delete a ticket
     """
-    response = api_help.delete_ticket(ticket_id)
+    response = await api_help.delete_ticket(ticket_id, refresh=refresh)
     return response
 
 
 @app.get(config_info.API_ROUTES[config_info.APIOperations.TICKETS_ALL],
          tags=["Tickets"])
-async def get_all_tickets() -> api_resp.GetAllTicketsResponse:
+async def get_all_tickets(
+        limit: int = limit_query(),
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = sort_by_query(config_info.Entities.TICKET),
+        sort_order: Optional[str] = sort_order_query(),
+        fields: Optional[List[str]] = fastapi.Query(None)
+) -> api_resp.GetAllTicketsResponse:
     """
     Get all tickets
     """
-    response = api_help.get_all_tickets()
+    response = await api_help.get_all_tickets(
+        limit=limit, cursor=cursor, sort_by=sort_by,
+        sort_order=sort_order, fields=fields)
     return response
 
 
 @app.post(config_info.API_ROUTES[config_info.APIOperations.TICKETS_SEARCH],
           tags=["Tickets"])
-async def search_tickets(search_req: api_req.SearchTicketsRequest
-                         ) -> api_resp.GetAllTicketsResponse:
+async def search_tickets(
+        search_req: api_req.SearchTicketsRequest,
+        limit: int = limit_query(),
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = sort_by_query(config_info.Entities.TICKET),
+        sort_order: Optional[str] = sort_order_query(),
+        fields: Optional[List[str]] = fastapi.Query(None)
+) -> api_resp.GetAllTicketsResponse:
     """
     Search for tickets
     """
-    response = api_help.search_tickets(search_req)
+    response = await api_help.search_tickets(
+        search_req, limit=limit, cursor=cursor, sort_by=sort_by,
+        sort_order=sort_order, fields=fields)
     return response
 
 
 @app.get(config_info.API_ROUTES[
              config_info.APIOperations.TICKETS_ALL_COMMENTS],
          tags=["Tickets"])
-async def get_all_comments_for_ticket(ticket_id: str
-                                      ) -> api_resp.GetAllCommentsResponse:
+async def get_all_comments_for_ticket(
+        ticket_id: str,
+        limit: int = limit_query(),
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = sort_by_query(config_info.Entities.COMMENT),
+        sort_order: Optional[str] = sort_order_query(),
+        fields: Optional[List[str]] = fastapi.Query(None)
+) -> api_resp.GetAllCommentsResponse:
     """
     Get all comments for a given ticket
     """
-    response = api_help.get_all_comments_for_ticket(ticket_id)
+    response = await api_help.get_all_comments_for_ticket(
+        ticket_id, limit=limit, cursor=cursor, sort_by=sort_by,
+        sort_order=sort_order, fields=fields)
     return response
 
 
 @app.get(config_info.API_ROUTES[
              config_info.APIOperations.TICKETS_ALL_CHILDREN],
          tags=["Tickets"])
-async def get_all_children_tickets(ticket_id: str
-                                   ) -> api_resp.GetAllTicketsResponse:
+async def get_all_children_tickets(
+        ticket_id: str,
+        limit: int = limit_query(),
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = sort_by_query(config_info.Entities.TICKET),
+        sort_order: Optional[str] = sort_order_query(),
+        fields: Optional[List[str]] = fastapi.Query(None)
+) -> api_resp.GetAllTicketsResponse:
     """
     Get all children tickets for a given ticket
     """
-    response = api_help.get_all_children_tickets(ticket_id)
+    response = await api_help.get_all_children_tickets(
+        ticket_id, limit=limit, cursor=cursor, sort_by=sort_by,
+        sort_order=sort_order, fields=fields)
+    return response
+
+
+@app.get(config_info.API_ROUTES[
+             config_info.APIOperations.TICKETS_ALL_DESCENDANTS],
+         tags=["Tickets"])
+async def get_all_descendant_tickets(
+        ticket_id: str,
+        limit: int = limit_query(),
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = sort_by_query(config_info.Entities.TICKET),
+        sort_order: Optional[str] = sort_order_query(),
+        fields: Optional[List[str]] = fastapi.Query(None)
+) -> api_resp.GetAllTicketsResponse:
+    """
+    Get all descendant tickets for a given ticket, at any depth
+    """
+    response = await api_help.get_all_descendant_tickets(
+        ticket_id, limit=limit, cursor=cursor, sort_by=sort_by,
+        sort_order=sort_order, fields=fields)
+    return response
+
+
+@app.get(config_info.API_ROUTES[
+             config_info.APIOperations.TICKETS_ALL_ANCESTORS],
+         tags=["Tickets"])
+async def get_all_ancestor_tickets(
+        ticket_id: str,
+        fields: Optional[List[str]] = fastapi.Query(None)
+) -> api_resp.GetAllTicketsResponse:
+    """
+    Get all ancestor tickets for a given ticket, from the root down to its
+    parent
+    """
+    response = await api_help.get_all_ancestor_tickets(
+        ticket_id, fields=fields)
     return response
 
 
 @app.put(config_info.API_ROUTES[
              config_info.APIOperations.TICKETS_CHANGE_STATUS],
          tags=["Tickets"])
-async def change_ticket_status(ticket_id: str,
-                               status: str) -> api_resp.Response:
+async def change_ticket_status(
+        ticket_id: str,
+        status: str,
+        refresh: Optional[str] = refresh_query()) -> api_resp.Response:
     """
     Change the status of a ticket
     """
-    response = api_help.change_ticket_status(ticket_id, status)
+    response = await api_help.change_ticket_status(
+        ticket_id, status, refresh=refresh)
     return response
 
 
@@ -396,7 +715,7 @@ async def is_user_owner_of_ticket(ticket_id: str,
     """
     Check if a user is the owner of a ticket
     """
-    response = api_help.is_user_owner_of_ticket(ticket_id, user_id)
+    response = await api_help.is_user_owner_of_ticket(ticket_id, user_id)
     return response
 
 
@@ -406,49 +725,68 @@ async def get_comment(comment_id: str) -> api_resp.GetCommentResponse:
     """
     Get a comment by id
     """
-    response = api_help.get_comment(comment_id)
+    response = await api_help.get_comment(comment_id)
     return response
 
 
 @app.post(config_info.API_ROUTES[config_info.APIOperations.COMMENTS_CREATE],
           tags=["Comments"])
 async def create_comment(
-        comment_req: api_req.CreateCommentRequest) -> api_resp.Response:
+        comment_req: api_req.CreateCommentRequest,
+        refresh: Optional[str] = refresh_query()) -> api_resp.Response:
     """
     Create a comment
     """
-    response = api_help.create_comment(comment_req)
+    response = await api_help.create_comment(comment_req, refresh=refresh)
     return response
 
 
 @app.delete(config_info.API_ROUTES[config_info.APIOperations.COMMENTS_DELETE],
             tags=["Comments"])
-async def delete_comment(comment_id: str) -> api_resp.Response:
+async def delete_comment(
+        comment_id: str,
+        refresh: Optional[str] = refresh_query()) -> api_resp.Response:
     """
     Delete a comment
     """
-    response = api_help.delete_comment(comment_id)
+    response = await api_help.delete_comment(comment_id, refresh=refresh)
     return response
 
 
 @app.get(config_info.API_ROUTES[config_info.APIOperations.COMMENTS_ALL],
          tags=["Comments"])
-async def get_all_comments() -> api_resp.GetAllCommentsResponse:
+async def get_all_comments(
+        limit: int = limit_query(),
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = sort_by_query(config_info.Entities.COMMENT),
+        sort_order: Optional[str] = sort_order_query(),
+        fields: Optional[List[str]] = fastapi.Query(None)
+) -> api_resp.GetAllCommentsResponse:
     """
     Get all comments
     """
-    response = api_help.get_all_comments()
+    response = await api_help.get_all_comments(
+        limit=limit, cursor=cursor, sort_by=sort_by,
+        sort_order=sort_order, fields=fields)
     return response
 
 
 @app.post(config_info.API_ROUTES[config_info.APIOperations.COMMENTS_SEARCH],
           tags=["Comments"])
-async def search_comments(search_req: api_req.SearchCommentsRequest
-                          ) -> api_resp.GetAllCommentsResponse:
+async def search_comments(
+        search_req: api_req.SearchCommentsRequest,
+        limit: int = limit_query(),
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = sort_by_query(config_info.Entities.COMMENT),
+        sort_order: Optional[str] = sort_order_query(),
+        fields: Optional[List[str]] = fastapi.Query(None)
+) -> api_resp.GetAllCommentsResponse:
     """
     Search for comments
     """
-    response = api_help.search_comments(search_req)
+    response = await api_help.search_comments(
+        search_req, limit=limit, cursor=cursor, sort_by=sort_by,
+        sort_order=sort_order, fields=fields)
     return response
 
 
@@ -460,7 +798,27 @@ async def is_user_owner_of_comment(comment_id: str,
     """
     Check if a user is the owner of a comment
     """
-    response = api_help.is_user_owner_of_comment(comment_id, user_id)
+    response = await api_help.is_user_owner_of_comment(comment_id, user_id)
+    return response
+
+
+@app.get(config_info.API_ROUTES[config_info.APIOperations.TASKS_GET],
+         tags=["Tasks"])
+async def get_task(task_id: str) -> api_resp.GetTaskResponse:
+    """
+    Get a background task by id
+    """
+    response = await api_help.get_task(task_id)
+    return response
+
+
+@app.get(config_info.API_ROUTES[config_info.APIOperations.CACHE_STATS],
+         tags=["Cache"])
+async def get_cache_stats() -> api_resp.GetStatsResponse:
+    """
+    Get the counters of the entity cache
+    """
+    response = await api_help.get_cache_stats()
     return response
 
 
@@ -470,7 +828,7 @@ async def ai_endpoint(ai_req: api_req.AIRequest) -> api_resp.AIResponse:
     """
     AI endpoint
     """
-    response = api_help.ai_endpoint(ai_req)
+    response = await api_help.ai_endpoint(ai_req)
     return response
 
 
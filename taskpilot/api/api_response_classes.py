@@ -1,5 +1,5 @@
 """API response classes"""
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Union
 from pydantic import BaseModel
 
 from taskpilot.common import models
@@ -19,7 +19,9 @@ class GetUserResponse(Response):
 
 class GetAllUsersResponse(Response):
     """Get all users response model"""
-    users: Optional[List[models.User]] = None
+    users: Optional[
+        List[Union[models.User, models.PartialUser]]] = None
+    next_cursor: Optional[str] = None
 
 
 class GetProjectResponse(Response):
@@ -29,7 +31,9 @@ class GetProjectResponse(Response):
 
 class GetAllProjectsResponse(Response):
     """Get all projects response model"""
-    projects: Optional[List[models.Project]] = None
+    projects: Optional[
+        List[Union[models.Project, models.PartialProject]]] = None
+    next_cursor: Optional[str] = None
 
 
 class GetTicketResponse(Response):
@@ -39,7 +43,9 @@ class GetTicketResponse(Response):
 
 class GetAllTicketsResponse(Response):
     """Get all tickets response model"""
-    tickets: Optional[List[models.Ticket]] = None
+    tickets: Optional[
+        List[Union[models.Ticket, models.PartialTicket]]] = None
+    next_cursor: Optional[str] = None
 
 
 class GetCommentResponse(Response):
@@ -49,7 +55,27 @@ class GetCommentResponse(Response):
 
 class GetAllCommentsResponse(Response):
     """Get all comments response model"""
-    comments: Optional[List[models.Comment]] = None
+    comments: Optional[
+        List[Union[models.Comment, models.PartialComment]]] = None
+    next_cursor: Optional[str] = None
+
+
+class GetStatsResponse(Response):
+    """Get stats response model, counting items per bucket"""
+    stats: Optional[Dict[str, Dict[str, int]]] = None
+
+
+class CheckPermissionsResponse(Response):
+    """
+    Check permissions response model, telling for every check if the user
+    has the right, or None if the entity does not exist
+    """
+    permissions: Optional[List[Optional[bool]]] = None
+
+
+class GetTaskResponse(Response):
+    """Get background task response model"""
+    task: Optional[models.BackgroundTask] = None
 
 
 class AIResponse(Response):
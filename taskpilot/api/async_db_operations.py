@@ -0,0 +1,876 @@
+"""Asynchronous database operations for the API service"""
+import asyncio
+import time
+import uuid
+
+from typing import (Any, AsyncIterator, Callable, Dict, Iterable, List,
+                    Optional, Tuple)
+from elastic_transport import ConnectionError as TransportConnectionError
+from elastic_transport import (AsyncTransport, ConnectionTimeout,
+                               TransportApiResponse)
+from elasticsearch import AsyncElasticsearch, ConflictError, helpers
+
+from taskpilot.api import db_mappings
+from taskpilot.api import db_operations as db
+from taskpilot.common import config_info
+
+
+logger = config_info.get_logger()
+
+
+class AsyncResilientTransport(AsyncTransport):
+    """
+    Async transport sending every request through the circuit breaker with
+    the timeout of its kind, retrying only the reads with backoff
+    """
+
+    async def perform_request(self,
+                              method: str,
+                              target: str,
+                              **options: Any) -> TransportApiResponse:
+        options = db.get_request_options(method, target, options)
+        attempt = 0
+        while True:
+            db.circuit_breaker.before_request()
+            try:
+                response = await super().perform_request(
+                    method, target, **options)
+                error = db.check_response(method, target, response)
+            except (TransportConnectionError, ConnectionTimeout) as exception:
+                error = db.record_failure(method, target, exception)
+            if error is None:
+                return response
+            if not db.should_retry(method, target, attempt):
+                raise error
+            await asyncio.sleep(db.get_retry_delay(attempt))
+            attempt += 1
+
+
+class _SharedConnection:
+    """Holder for the async Elasticsearch client shared by the worker"""
+    client: Optional[AsyncElasticsearch] = None
+
+
+def init_connection() -> Optional[AsyncElasticsearch]:
+    """Create the pooled async database client, if not already created"""
+    if _SharedConnection.client is not None:
+        return _SharedConnection.client
+    try:
+        _SharedConnection.client = AsyncElasticsearch(
+            config_info.DB_URL,
+            connections_per_node=config_info.DB_POOL_SIZE,
+            transport_class=AsyncResilientTransport,
+            headers={
+                "connection": (
+                    "keep-alive" if config_info.DB_KEEP_ALIVE else "close"
+                )
+            }
+        )
+        logger.info(
+            f"Generated async Elasticsearch client with a pool of"
+            f" {config_info.DB_POOL_SIZE} connections"
+        )
+    except Exception as exception:
+        logger.error(
+            f"Failed to generate async Elasticsearch client: {exception}"
+        )
+    return _SharedConnection.client
+
+
+async def close_connection() -> None:
+    """Close the pooled async database client and release its connections"""
+    if _SharedConnection.client is None:
+        return
+    try:
+        await _SharedConnection.client.close()
+        logger.info("Closed async Elasticsearch client")
+    except Exception as exception:
+        logger.error(
+            f"Failed to close async Elasticsearch client: {exception}"
+        )
+    _SharedConnection.client = None
+
+
+def get_connection() -> Optional[AsyncElasticsearch]:
+    """Get the shared async connection to the database"""
+    if _SharedConnection.client is not None:
+        return _SharedConnection.client
+    return init_connection()
+
+
+async def wait_for_database() -> None:
+    """
+    Wait for the database to answer, up to the startup timeout, raising
+    DatabaseUnavailableError if it does not
+    """
+    conn = get_connection()
+    deadline = time.monotonic() + config_info.DB_STARTUP_TIMEOUT
+    while True:
+        try:
+            await conn.info()
+            return
+        except db.DatabaseUnavailableError as exception:
+            if time.monotonic() >= deadline:
+                raise
+            logger.info("Waiting for the database to become available")
+            await asyncio.sleep(max(exception.retry_after,
+                                    config_info.DB_TASK_POLL_INTERVAL))
+
+
+async def backfill_ticket_paths(index: str) -> None:
+    """
+    Store the ancestors and the depth of every ticket of an index, computed
+    from the parent tickets, for the tickets written before they were kept
+    """
+    tickets = await search_items(index, {}, includes=["parent_ticket"])
+    if tickets is None:
+        raise RuntimeError(f"failed to read the tickets of index {index}")
+    parents = {
+        ticket_id: ticket.get("parent_ticket")
+        for ticket_id, ticket in tickets.items()
+    }
+    _, failed = await bulk_update(index, db.build_ticket_paths(parents),
+                                  config_info.DBRefreshModes.TRUE)
+    if failed:
+        raise RuntimeError(
+            f"failed to backfill the paths of tickets {list(failed)}")
+
+
+async def migrate_index(index: str, source: str) -> None:
+    """
+    Copy the documents of the concrete index an index resolves to into a
+    new index with the current mappings version, backfilling the fields
+    derived from others, then atomically swap the alias of the index onto
+    the new one
+    """
+    conn = get_connection()
+    target = db_mappings.get_versioned_index(index)
+    await conn.options(ignore_status=400).indices.create(
+        index=target, **db_mappings.get_index_body(index))
+    response = await conn.reindex(
+        source={"index": source},
+        dest={"index": target, "op_type": "create"},
+        conflicts="proceed",
+        refresh=True,
+        wait_for_completion=False
+    )
+    task_status = await wait_for_task(response["task"])
+    if task_status["failures"]:
+        raise RuntimeError(
+            f"failed to copy {task_status['failures']} documents from"
+            f" {source} to {target}"
+        )
+    if index == config_info.DB_INDEXES[config_info.Entities.TICKET]:
+        await backfill_ticket_paths(target)
+    await conn.indices.update_aliases(
+        actions=db.build_alias_swap(index, source))
+    logger.info(f"Migrated index {index} from {source} to {target}:"
+                f" {task_status}")
+
+
+async def ensure_indexes() -> bool:
+    """
+    Apply the index templates and make every index an alias of a concrete
+    index with the current mappings version, creating the missing ones and
+    migrating the outdated ones, including those bootstrapped with dynamic
+    mappings. Returns False if any index is not up to date, in which case
+    queries relying on the mappings would silently miss documents
+    """
+    conn = get_connection()
+    success = True
+    for index in config_info.DB_INDEXES.values():
+        try:
+            await conn.indices.put_index_template(
+                **db_mappings.get_index_template(index))
+            if not await conn.indices.exists(index=index):
+                await conn.options(ignore_status=400).indices.create(
+                    index=db_mappings.get_versioned_index(index),
+                    aliases={index: {}},
+                    **db_mappings.get_index_body(index)
+                )
+                logger.info(f"Created index {index}")
+                continue
+            response = await conn.indices.get_mapping(index=index)
+            source = db.get_migration_source(index, response.body)
+            if source is not None:
+                await migrate_index(index, source)
+        except db.DatabaseUnavailableError:
+            raise
+        except Exception as exception:
+            logger.error(f"Failed to bootstrap index {index}: {exception}")
+            success = False
+    return success
+
+
+async def get_item(index: str,
+                   item_id: str,
+                   includes: Optional[List[str]] = None,
+                   excludes: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Get an item from the database, optionally restricted to some fields"""
+    conn = get_connection()
+    try:
+        item = await conn.get(index=index, id=item_id,
+                              **db.build_source_filter(includes, excludes))
+        item_dict = item.body["_source"]
+        logger.info(
+            f"Retrieved item with id {item_id} from index {index}: {item_dict}"
+        )
+    except db.DatabaseUnavailableError:
+        raise
+    except Exception as exception:
+        logger.error(
+            f"Failed to retrieve item with id {item_id} from index {index}:"
+            f" {exception}"
+        )
+        item_dict = {}
+    return item_dict
+
+
+async def get_versioned_item(
+        index: str,
+        item_id: str) -> Tuple[Dict[str, Any], Optional[Dict[str, int]]]:
+    """
+    Get an item from the database along with the version to make a
+    conditional write on
+    """
+    conn = get_connection()
+    try:
+        response = await conn.get(index=index, id=item_id)
+    except db.DatabaseUnavailableError:
+        raise
+    except Exception as exception:
+        logger.error(
+            f"Failed to retrieve item with id {item_id} from index {index}:"
+            f" {exception}"
+        )
+        return {}, None
+    version = {
+        "if_seq_no": response["_seq_no"],
+        "if_primary_term": response["_primary_term"]
+    }
+    logger.info(f"Retrieved item with id {item_id} from index {index} at"
+                f" version {version}")
+    return response["_source"], version
+
+
+async def get_items_from_indexes(
+        refs: List[Tuple[str, str]],
+        includes: Optional[List[str]] = None,
+        excludes: Optional[List[str]] = None
+) -> Tuple[Dict[Tuple[str, str], Dict[str, Any]], List[Tuple[str, str]]]:
+    """
+    Get items identified by (index, id) pairs from the database in a single
+    round trip, returning the found items and the missing references
+    """
+    refs = list(dict.fromkeys(refs))
+    if not refs:
+        return {}, []
+    conn = get_connection()
+    try:
+        response = await conn.mget(
+            docs=[
+                {"_index": index, "_id": item_id} for index, item_id in refs
+            ],
+            **db.build_source_filter(includes, excludes)
+        )
+        found, missing = db.parse_multi_get(response)
+        logger.info(f"Retrieved {len(found)} items, missing {missing}")
+    except db.DatabaseUnavailableError:
+        raise
+    except Exception as exception:
+        logger.error(f"Failed to retrieve items {refs}: {exception}")
+        found, missing = {}, refs
+    return found, missing
+
+
+async def item_exists(index: str, item_id: str) -> bool:
+    """Check if an item exists in the database without fetching it"""
+    conn = get_connection()
+    try:
+        exists = bool(await conn.exists(index=index, id=item_id))
+    except db.DatabaseUnavailableError:
+        raise
+    except Exception as exception:
+        logger.error(
+            f"Failed to check if item with id {item_id} exists in index"
+            f" {index}: {exception}"
+        )
+        return False
+    logger.info(f"Item with id {item_id} exists in index {index}: {exists}")
+    return exists
+
+
+async def items_exist(
+        refs: List[Tuple[str, str]]
+) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """
+    Check which items identified by (index, id) pairs exist in the database
+    in a single round trip without fetching them, returning the existing and
+    the missing references
+    """
+    refs = list(dict.fromkeys(refs))
+    if not refs:
+        return [], []
+    conn = get_connection()
+    try:
+        response = await conn.mget(
+            docs=[
+                {"_index": index, "_id": item_id} for index, item_id in refs
+            ],
+            source=False
+        )
+        found, missing = db.parse_multi_get(response)
+        logger.info(f"Found {len(found)} items, missing {missing}")
+    except db.DatabaseUnavailableError:
+        raise
+    except Exception as exception:
+        logger.error(f"Failed to check if items {refs} exist: {exception}")
+        return [], refs
+    return list(found), missing
+
+
+async def get_items(
+        index: str,
+        item_ids: List[str],
+        includes: Optional[List[str]] = None,
+        excludes: Optional[List[str]] = None
+) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """
+    Get multiple items from an index in a single round trip, returning the
+    found items and the missing ids
+    """
+    found, missing = await get_items_from_indexes(
+        [(index, item_id) for item_id in item_ids], includes, excludes
+    )
+    return (
+        {item_id: item for (_, item_id), item in found.items()},
+        [item_id for _, item_id in missing]
+    )
+
+
+async def iter_items(
+        index: str,
+        query_dict: Optional[Dict[str, Any]] = None,
+        page_size: int = config_info.DB_PAGE_SIZE,
+        sort: Optional[List[Dict[str, str]]] = None,
+        includes: Optional[List[str]] = None,
+        excludes: Optional[List[str]] = None,
+        filters: Optional[List[Dict[str, Any]]] = None
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Stream the items matching a query in the given sort order. Results
+    fitting in one page are served by a plain search, the pages after the
+    first one of larger results are read using a point in time so that
+    they stay consistent however many pages there are
+    """
+    conn = get_connection()
+    response = await conn.search(**db.build_scan_request(
+        index, query_dict, page_size, sort=sort, includes=includes,
+        excludes=excludes, filters=filters))
+    hits = response["hits"]["hits"]
+    for hit in hits[:page_size]:
+        yield hit["_id"], hit["_source"]
+    if len(hits) <= page_size:
+        return
+    async for item_id, item in iter_items_in_point_in_time(
+            index, query_dict, page_size, sort=sort, includes=includes,
+            excludes=excludes, filters=filters,
+            search_after=hits[page_size - 1]["sort"]):
+        yield item_id, item
+
+
+async def iter_items_in_point_in_time(
+        index: str,
+        query_dict: Optional[Dict[str, Any]] = None,
+        page_size: int = config_info.DB_PAGE_SIZE,
+        sort: Optional[List[Dict[str, str]]] = None,
+        includes: Optional[List[str]] = None,
+        excludes: Optional[List[str]] = None,
+        filters: Optional[List[Dict[str, Any]]] = None,
+        search_after: Optional[List[Any]] = None
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Stream the items matching a query page by page in the given sort order,
+    following the given sort values if any, using a point in time so that
+    the results stay consistent however many pages there are
+    """
+    conn = get_connection()
+    request = db.build_point_in_time_request(
+        index, query_dict, page_size, sort=sort, includes=includes,
+        excludes=excludes, filters=filters)
+    keep_alive = config_info.DB_POINT_IN_TIME_KEEP_ALIVE
+    pit = await conn.open_point_in_time(index=index, keep_alive=keep_alive)
+    pit_id = pit["id"]
+    try:
+        while True:
+            response = await conn.search(
+                pit={"id": pit_id, "keep_alive": keep_alive},
+                search_after=search_after, **request)
+            pit_id, hits, search_after = db.parse_scan_page(
+                response, page_size)
+            for hit in hits:
+                yield hit["_id"], hit["_source"]
+            if search_after is None:
+                return
+    finally:
+        try:
+            await conn.close_point_in_time(id=pit_id)
+        except Exception as exception:
+            logger.error(f"Failed to close point in time: {exception}")
+
+
+async def get_all_items(
+        index: str,
+        sort: Optional[List[Dict[str, str]]] = None,
+        includes: Optional[List[str]] = None,
+        excludes: Optional[List[str]] = None
+) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Get all items from the database"""
+    try:
+        items_dict = {
+            item_id: item
+            async for item_id, item in iter_items(
+                index, sort=sort, includes=includes, excludes=excludes)
+        }
+        logger.info(f"Retrieved all {len(items_dict)} items from index"
+                    f" {index}")
+    except db.DatabaseUnavailableError:
+        raise
+    except Exception as exception:
+        logger.error(
+            f"Failed to retrieve all items from index {index}: {exception}"
+        )
+        items_dict = None
+    return items_dict
+
+
+async def search_page(
+        index: str,
+        query_dict: Dict[str, Any],
+        limit: int,
+        cursor: Optional[str] = None,
+        sort: Optional[List[Dict[str, str]]] = None,
+        includes: Optional[List[str]] = None,
+        excludes: Optional[List[str]] = None,
+        filters: Optional[List[Dict[str, Any]]] = None
+) -> Optional[Tuple[Dict[str, Dict[str, Any]], Optional[str]]]:
+    """
+    Get a page of at most limit items matching a query and the filters,
+    following the given cursor, along with the cursor of the next page
+    """
+    conn = get_connection()
+    try:
+        response = await conn.search(**db.build_page_request(
+            index, query_dict, limit, cursor, sort, includes, excludes,
+            filters))
+        items_dict, next_cursor = db.parse_page_response(response, limit)
+        logger.info(f"Retrieved a page of {len(items_dict)} items from index"
+                    f" {index} that satisfy the query {query_dict}")
+    except db.DatabaseUnavailableError:
+        raise
+    except Exception as exception:
+        logger.error(
+            f"Failed to retrieve a page of items from index {index} that"
+            f" satisfy the query {query_dict}: {exception}"
+        )
+        return None
+    return items_dict, next_cursor
+
+
+async def count_items(
+        index: str,
+        query_dict: Dict[str, Any],
+        filters: Optional[List[Dict[str, Any]]] = None) -> Optional[int]:
+    """Count the items in the database that satisfy a query and the filters"""
+    conn = get_connection()
+    try:
+        response = await conn.count(
+            index=index, query=db.build_query(index, query_dict, filters))
+    except db.DatabaseUnavailableError:
+        raise
+    except Exception as exception:
+        logger.error(
+            f"Failed to count items from index {index} that satisfy the query"
+            f" {query_dict}: {exception}"
+        )
+        return None
+    logger.info(f"Counted {response['count']} items from index {index} that"
+                f" satisfy the query {query_dict}")
+    return response["count"]
+
+
+async def aggregate(
+        index: str,
+        query_dict: Dict[str, Any],
+        aggs: Dict[str, Dict[str, Any]],
+        filters: Optional[List[Dict[str, Any]]] = None
+) -> Optional[Dict[str, Dict[str, int]]]:
+    """
+    Count the items that satisfy a query and the filters in the buckets of
+    the aggregations, without fetching any of them
+    """
+    conn = get_connection()
+    try:
+        response = await conn.search(**db.build_aggregation_request(
+            index, query_dict, aggs, filters))
+    except db.DatabaseUnavailableError:
+        raise
+    except Exception as exception:
+        logger.error(
+            f"Failed to aggregate items from index {index} that satisfy the"
+            f" query {query_dict}: {exception}"
+        )
+        return None
+    logger.info(f"Aggregated items from index {index} that satisfy the"
+                f" query {query_dict}")
+    return db.parse_aggregations(response)
+
+
+async def create_item(index: str,
+                      item: Dict[str, Any],
+                      item_id: Optional[str] = None,
+                      refresh: Optional[str] = None) -> Optional[str]:
+    """Create an item in the database, refreshing as requested"""
+    if not item_id:
+        item_id = str(uuid.uuid4())
+    conn = get_connection()
+    try:
+        response = await conn.index(
+            index=index,
+            id=item_id,
+            body=item,
+            op_type="create",
+            refresh=refresh
+        )
+    except db.DatabaseUnavailableError:
+        raise
+    except Exception as exception:
+        logger.error(
+            f"Failed to create item with id {item_id} in index {index}:"
+            f" {exception}"
+        )
+        return None
+    logger.info(f"Created item with id {item_id} in index {index}: {item}")
+    return response["_id"] if response["result"] == "created" else None
+
+
+async def update_item(index: str,
+                      item_id: str,
+                      item: Dict[str, Any],
+                      version: Optional[Dict[str, int]] = None,
+                      refresh: Optional[str] = None) -> bool:
+    """
+    Update an item in the database, only if it is still at the given
+    version when one is given, refreshing as requested
+    """
+    conn = get_connection()
+    try:
+        response = await conn.update(
+            index=index,
+            id=item_id,
+            body={
+                "doc": item
+            },
+            refresh=refresh,
+            **(version or {})
+        )
+    except ConflictError as exception:
+        if version is not None:
+            raise db.VersionConflictError(
+                f"Item {item_id} in index {index} changed since version"
+                f" {version}"
+            ) from exception
+        logger.error(
+            f"Failed to update item {item_id} in index {index}: {exception}"
+        )
+        return False
+    except db.DatabaseUnavailableError:
+        raise
+    except Exception as exception:
+        logger.error(
+            f"Failed to update item {item_id} in index {index}: {exception}"
+        )
+        return False
+    logger.info(f"Updated item {item_id} in index {index}: {item}")
+    return response["result"] == "updated"
+
+
+async def increment_counter(index: str,
+                            item_id: str,
+                            field: str) -> Optional[int]:
+    """
+    Atomically increment a counter field of an item, returning the value
+    it had before the increment
+    """
+    conn = get_connection()
+    try:
+        response = await conn.update(
+            index=index,
+            id=item_id,
+            **db.build_increment_request(field)
+        )
+    except db.DatabaseUnavailableError:
+        raise
+    except Exception as exception:
+        logger.error(
+            f"Failed to increment {field} of item {item_id} in index"
+            f" {index}: {exception}"
+        )
+        return None
+    value = response["get"]["_source"][field] - 1
+    logger.info(f"Allocated {field} {value} of item {item_id} in index"
+                f" {index}")
+    return value
+
+
+async def update_set(index: str,
+                     item_id: str,
+                     script: str,
+                     field: str,
+                     value: Any,
+                     refresh: Optional[str] = None) -> bool:
+    """
+    Add or remove a value of a set field of an item in place, refreshing as
+    requested
+    """
+    conn = get_connection()
+    try:
+        response = await conn.update(
+            index=index,
+            id=item_id,
+            refresh=refresh,
+            **db.build_set_request(script, field, value)
+        )
+    except db.DatabaseUnavailableError:
+        raise
+    except Exception as exception:
+        logger.error(
+            f"Failed to update {field} of item {item_id} in index {index}:"
+            f" {exception}"
+        )
+        return False
+    logger.info(f"Updated {field} of item {item_id} in index {index}:"
+                f" {response['result']}")
+    return response["result"] in {"updated", "noop"}
+
+
+async def add_to_set(index: str,
+                     item_id: str,
+                     field: str,
+                     value: Any,
+                     refresh: Optional[str] = None) -> bool:
+    """Add a value to a set field of an item, if not already there"""
+    return await update_set(
+        index, item_id, db.ADD_TO_SET_SCRIPT, field, value, refresh)
+
+
+async def remove_from_set(index: str,
+                          item_id: str,
+                          field: str,
+                          value: Any,
+                          refresh: Optional[str] = None) -> bool:
+    """Remove a value from a set field of an item, if there"""
+    return await update_set(
+        index, item_id, db.REMOVE_FROM_SET_SCRIPT, field, value, refresh)
+
+
+async def delete_item(index: str,
+                      item_id: str,
+                      refresh: Optional[str] = None) -> bool:
+    """Delete an item from the database, refreshing as requested"""
+    conn = get_connection()
+    try:
+        response = await conn.delete(index=index, id=item_id, refresh=refresh)
+    except db.DatabaseUnavailableError:
+        raise
+    except Exception as exception:
+        logger.error(
+            f"Failed to delete item {item_id} from index {index}: {exception}"
+        )
+        return False
+    logger.info(f"Deleted item {item_id} from {index}")
+    return response["result"] == "deleted"
+
+
+async def search_items(
+        index: str,
+        query_dict: Dict[str, Any],
+        sort: Optional[List[Dict[str, str]]] = None,
+        includes: Optional[List[str]] = None,
+        excludes: Optional[List[str]] = None,
+        filters: Optional[List[Dict[str, Any]]] = None
+) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Search for items in the database matching a query and the filters"""
+    if not query_dict and not filters:
+        return await get_all_items(index, sort, includes, excludes)
+    try:
+        items_dict = {
+            item_id: item
+            async for item_id, item in iter_items(
+                index, query_dict, sort=sort, includes=includes,
+                excludes=excludes, filters=filters)
+        }
+        logger.info(f"Retrieved {len(items_dict)} items from index {index}"
+                    f" that satisfy the query {query_dict}")
+    except db.DatabaseUnavailableError:
+        raise
+    except Exception as exception:
+        logger.error(
+            f"Failed to retrieve items from index {index} that satisfy the"
+            f" query {query_dict}: {exception}"
+        )
+        items_dict = None
+    return items_dict
+
+
+async def bulk_write(actions: Iterable[Dict[str, Any]],
+                     refresh: Optional[str] = None
+                     ) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Send actions to the _bulk endpoint in chunks bounded by count and size,
+    returning the ids of the succeeded items and the errors of the failed ones
+    """
+    conn = get_connection()
+    actions = list(actions)
+    succeeded_ids = []
+    failed = {}
+    try:
+        async for succeeded, result in helpers.async_streaming_bulk(
+                conn, actions, **db.get_bulk_options(refresh)):
+            item_id, error = db.parse_bulk_result(succeeded, result)
+            if error is None:
+                succeeded_ids.append(item_id)
+            else:
+                failed[item_id] = error
+    except db.DatabaseUnavailableError:
+        raise
+    except Exception as exception:
+        db.fail_unreported_actions(actions, succeeded_ids, failed, exception)
+    db.log_bulk_result(succeeded_ids, failed)
+    return succeeded_ids, failed
+
+
+async def bulk_create(index: str,
+                      items: Dict[str, Dict[str, Any]],
+                      refresh: Optional[str] = None
+                      ) -> Tuple[List[str], Dict[str, str]]:
+    """Create many items, keyed by id, in the database"""
+    return await bulk_write(
+        db.build_bulk_actions("create", index, items), refresh)
+
+
+async def bulk_update(index: str,
+                      items: Dict[str, Dict[str, Any]],
+                      refresh: Optional[str] = None
+                      ) -> Tuple[List[str], Dict[str, str]]:
+    """Partially update many items, keyed by id, in the database"""
+    return await bulk_write(
+        db.build_bulk_actions("update", index, items), refresh)
+
+
+async def bulk_delete(index: str,
+                      item_ids: List[str],
+                      refresh: Optional[str] = None
+                      ) -> Tuple[List[str], Dict[str, str]]:
+    """Delete many items from the database"""
+    return await bulk_write(
+        db.build_bulk_actions("delete", index, dict.fromkeys(item_ids)),
+        refresh
+    )
+
+
+async def wait_for_task(
+        task_id: str,
+        progress: Optional[Callable[[Dict[str, int]], None]] = None
+) -> Dict[str, int]:
+    """
+    Poll a by-query task until it completes, reporting its progress counts
+    along the way, and return its final counts
+    """
+    conn = get_connection()
+    while True:
+        response = await conn.tasks.get(task_id=task_id)
+        task_status = db.parse_task_status(response)
+        if progress is not None:
+            progress(task_status)
+        if response["completed"]:
+            if "error" in response:
+                raise RuntimeError(response["error"].get("reason"))
+            return task_status
+        await asyncio.sleep(config_info.DB_TASK_POLL_INTERVAL)
+
+
+async def delete_by_query(
+        index: str,
+        field: str,
+        values: List[Any],
+        progress: Optional[Callable[[Dict[str, int]], None]] = None,
+        refresh: Optional[str] = None
+) -> Optional[Dict[str, int]]:
+    """
+    Delete the items whose field has one of the given values in throttled
+    tasks, one per chunk of values, returning their total counts
+    """
+    conn = get_connection()
+    task_status = db.get_empty_task_status()
+    try:
+        for chunk in db.chunk_values(values):
+            response = await conn.delete_by_query(
+                index=index,
+                **db.build_by_query_request(field, chunk, refresh=refresh)
+            )
+            task_status = db.add_task_statuses(
+                task_status,
+                await wait_for_task(
+                    response["task"],
+                    db.offset_progress(task_status, progress))
+            )
+    except db.DatabaseUnavailableError:
+        raise
+    except Exception as exception:
+        logger.error(
+            f"Failed to delete items from index {index} by {field}:"
+            f" {exception}"
+        )
+        return None
+    logger.info(f"Deleted items from index {index} by {field}: {task_status}")
+    return task_status
+
+
+async def update_by_query(
+        index: str,
+        field: str,
+        values: List[Any],
+        item: Dict[str, Any],
+        progress: Optional[Callable[[Dict[str, int]], None]] = None,
+        refresh: Optional[str] = None
+) -> Optional[Dict[str, int]]:
+    """
+    Set the fields of a partial document on the items whose field has one
+    of the given values in throttled tasks, one per chunk of values,
+    returning their total counts
+    """
+    conn = get_connection()
+    task_status = db.get_empty_task_status()
+    try:
+        for chunk in db.chunk_values(values):
+            response = await conn.update_by_query(
+                index=index,
+                **db.build_by_query_request(field, chunk, item, refresh)
+            )
+            task_status = db.add_task_statuses(
+                task_status,
+                await wait_for_task(
+                    response["task"],
+                    db.offset_progress(task_status, progress))
+            )
+    except db.DatabaseUnavailableError:
+        raise
+    except Exception as exception:
+        logger.error(
+            f"Failed to update items in index {index} by {field}:"
+            f" {exception}"
+        )
+        return None
+    logger.info(f"Updated items in index {index} by {field}: {task_status}")
+    return task_status
@@ -0,0 +1,96 @@
+"""Background tasks the API service runs on behalf of its clients"""
+import asyncio
+import uuid
+
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from taskpilot.api import entity_cache
+from taskpilot.common import config_info, models
+
+
+logger = config_info.get_logger()
+
+TASK_COUNTS = ("total", "deleted", "updated", "version_conflicts", "failures")
+
+
+class _SharedTasks:
+    """Holder for the background tasks tracked by the whole worker"""
+    tasks: Dict[str, models.BackgroundTask] = {}
+    running: Set[asyncio.Task] = set()
+
+
+def _forget_completed_tasks() -> None:
+    """Stop tracking the oldest completed tasks once over the limit"""
+    excess = len(_SharedTasks.tasks) - config_info.API_MAX_TRACKED_TASKS
+    completed = [
+        task_id
+        for task_id, task in _SharedTasks.tasks.items()
+        if task.status != config_info.TaskStatuses.RUNNING
+    ]
+    for task_id in completed[:max(excess, 0)]:
+        del _SharedTasks.tasks[task_id]
+
+
+async def _run_task(
+        task: models.BackgroundTask,
+        function: Callable[[models.BackgroundTask], Awaitable[Optional[str]]]
+) -> None:
+    """Run the function of a task and record how it ended"""
+    entity_cache.leave_request_scope()
+    try:
+        error_message = await function(task)
+    except Exception as exception:
+        error_message = str(exception)
+    task.completed_at = config_info.get_current_time()
+    if error_message is None:
+        task.status = config_info.TaskStatuses.COMPLETED
+        task.message = f"{task.description} completed successfully"
+        logger.info(task.message)
+    else:
+        task.status = config_info.TaskStatuses.FAILED
+        task.message = f"{task.description} failed: {error_message}"
+        logger.error(task.message)
+
+
+def start_task(
+        description: str,
+        function: Callable[[models.BackgroundTask], Awaitable[Optional[str]]]
+) -> models.BackgroundTask:
+    """
+    Start running a function in the background and track it as a task. The
+    function gets the task to report its progress on and returns an error
+    message on failure
+    """
+    task = models.BackgroundTask(
+        task_id=str(uuid.uuid4()),
+        description=description,
+        status=config_info.TaskStatuses.RUNNING,
+        created_at=config_info.get_current_time()
+    )
+    _SharedTasks.tasks[task.task_id] = task
+    _forget_completed_tasks()
+    handle = asyncio.create_task(_run_task(task, function))
+    _SharedTasks.running.add(handle)
+    handle.add_done_callback(_SharedTasks.running.discard)
+    logger.info(f"Started task {task.task_id}: {description}")
+    return task
+
+
+def get_task(task_id: str) -> Optional[models.BackgroundTask]:
+    """Get a task tracked by this worker"""
+    return _SharedTasks.tasks.get(task_id)
+
+
+def track_step(task: models.BackgroundTask,
+               step: str) -> Callable[[Dict[str, int]], None]:
+    """
+    Mark a task as running a step and get the callback adding the progress
+    counts of the step to the counts of the steps before it
+    """
+    task.step = step
+    base_counts = {count: getattr(task, count) for count in TASK_COUNTS}
+
+    def progress(task_status: Dict[str, int]) -> None:
+        for count in TASK_COUNTS:
+            setattr(task, count, base_counts[count] + task_status[count])
+    return progress
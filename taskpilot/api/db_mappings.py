@@ -0,0 +1,215 @@
+"""Explicit mappings of the database indexes"""
+import re
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from taskpilot.common import config_info
+from taskpilot.common.config_info import Entities
+
+
+MAPPINGS_VERSION = 2
+
+DATE_FORMAT = "dd-MM-yyyy HH:mm:ss"
+
+HISTOGRAM_FORMATS = {
+    "day": "yyyy-MM-dd",
+    "month": "yyyy-MM",
+    "year": "yyyy"
+}
+
+TEXT_ANALYZER = "taskpilot_text"
+
+INDEX_SETTINGS = {
+    "analysis": {
+        "analyzer": {
+            TEXT_ANALYZER: {
+                "type": "custom",
+                "tokenizer": "standard",
+                "filter": ["lowercase", "asciifolding"]
+            }
+        }
+    }
+}
+
+_KEYWORD = {"type": "keyword"}
+_BOOLEAN = {"type": "boolean"}
+_INTEGER = {"type": "integer"}
+_DATE = {"type": "date", "format": DATE_FORMAT}
+_TEXT = {"type": "text", "analyzer": TEXT_ANALYZER}
+_SORTABLE_TEXT = {
+    "type": "text",
+    "analyzer": TEXT_ANALYZER,
+    "fields": {"sort": {"type": "keyword", "ignore_above": 256}}
+}
+
+ENTITY_PROPERTIES = {
+    Entities.USER: {
+        "username": _KEYWORD,
+        "email": _KEYWORD,
+        "full_name": _SORTABLE_TEXT,
+        "hashed_password": {"type": "keyword", "index": False},
+        "is_admin": _BOOLEAN,
+        "disabled": _BOOLEAN,
+        "favorite_tickets": _KEYWORD
+    },
+    Entities.PROJECT: {
+        "project_id": _KEYWORD,
+        "title": _SORTABLE_TEXT,
+        "description": _TEXT,
+        "created_by": _KEYWORD,
+        "created_at": _DATE,
+        "modified_by": _KEYWORD,
+        "modified_at": _DATE,
+        "members": _KEYWORD,
+        "next_ticket_id": _INTEGER
+    },
+    Entities.TICKET: {
+        "ticket_id": _KEYWORD,
+        "title": _SORTABLE_TEXT,
+        "description": _TEXT,
+        "type": _KEYWORD,
+        "priority": _KEYWORD,
+        "status": _KEYWORD,
+        "assignee": _KEYWORD,
+        "created_by": _KEYWORD,
+        "created_at": _DATE,
+        "modified_by": _KEYWORD,
+        "modified_at": _DATE,
+        "parent_project": _KEYWORD,
+        "parent_ticket": _KEYWORD,
+        "ancestors": _KEYWORD,
+        "depth": _INTEGER,
+        "next_comment_id": _INTEGER
+    },
+    Entities.COMMENT: {
+        "comment_id": _KEYWORD,
+        "ticket_id": _KEYWORD,
+        "text": _TEXT,
+        "created_by": _KEYWORD,
+        "created_at": _DATE
+    }
+}
+
+DEFAULT_SORT = {
+    Entities.USER: ("username", "asc"),
+    Entities.PROJECT: ("modified_at", "desc"),
+    Entities.TICKET: ("modified_at", "desc"),
+    Entities.COMMENT: ("created_at", "asc")
+}
+
+SORT_ORDERS = ("asc", "desc")
+
+PRIVATE_FIELDS = {
+    Entities.USER: ["hashed_password"]
+}
+
+ARRAY_FIELDS = {
+    Entities.USER: ["favorite_tickets"],
+    Entities.PROJECT: ["members"],
+    Entities.TICKET: ["ancestors"]
+}
+
+
+def get_entity(index: str) -> str:
+    """Get the entity stored in an index or in one of its versioned indexes"""
+    entities = {
+        index_name: entity
+        for entity, index_name in config_info.DB_INDEXES.items()
+    }
+    return entities[re.sub(r"-v\d+$", "", index)]
+
+
+def get_index_mappings(index: str) -> Dict[str, Any]:
+    """Get the mappings of an index, tagged with the mappings version"""
+    return {
+        "_meta": {"version": MAPPINGS_VERSION},
+        "properties": ENTITY_PROPERTIES[get_entity(index)]
+    }
+
+
+def get_text_fields(index: str) -> List[str]:
+    """Get the analyzed text fields of an index"""
+    properties = get_index_mappings(index)["properties"]
+    return [
+        field
+        for field, mapping in properties.items()
+        if mapping["type"] == "text"
+    ]
+
+
+def get_filter_fields(index: str) -> List[str]:
+    """Get the fields of an index that filters can match exact values of"""
+    properties = get_index_mappings(index)["properties"]
+    return [
+        field
+        for field, mapping in properties.items()
+        if mapping["type"] != "text" and mapping.get("index", True)
+    ]
+
+
+def get_sort_fields(index: str) -> Dict[str, str]:
+    """
+    Get the fields an index can be sorted by, along with the indexed field
+    the sort is executed on
+    """
+    properties = get_index_mappings(index)["properties"]
+    sort_fields = {}
+    for field, mapping in properties.items():
+        if mapping["type"] == "text":
+            if "sort" in mapping.get("fields", {}):
+                sort_fields[field] = f"{field}.sort"
+        elif mapping.get("index", True):
+            sort_fields[field] = field
+    return sort_fields
+
+
+def resolve_sort(index: str,
+                 sort_by: Optional[str] = None,
+                 sort_order: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Get the field and the order to sort an index by, defaulting to the usual
+    ordering of the entity stored in the index
+    """
+    if sort_by is None:
+        sort_by, default_order = DEFAULT_SORT[get_entity(index)]
+        sort_order = sort_order or default_order
+    sort_order = sort_order or "asc"
+    if sort_by not in get_sort_fields(index):
+        raise ValueError(f"index {index} cannot be sorted by {sort_by}")
+    if sort_order not in SORT_ORDERS:
+        raise ValueError(f"unknown sort order {sort_order}")
+    return sort_by, sort_order
+
+
+def get_versioned_index(index: str) -> str:
+    """
+    Get the name of the concrete index holding the documents of an index
+    with the current mappings version, which the index is an alias of
+    """
+    return f"{index}-v{MAPPINGS_VERSION}"
+
+
+def get_index_body(index: str) -> Dict[str, Any]:
+    """Get the settings and the mappings to create an index with"""
+    return {
+        "settings": INDEX_SETTINGS,
+        "mappings": get_index_mappings(index)
+    }
+
+
+def get_index_template(index: str) -> Dict[str, Any]:
+    """
+    Get the index template applying the mappings to an index and to its
+    versioned concrete indexes
+    """
+    return {
+        "name": f"taskpilot-{index}",
+        "index_patterns": [index, f"{index}-v*"],
+        "version": MAPPINGS_VERSION,
+        "template": get_index_body(index)
+    }
+
+
+def get_mappings_version(mappings: Dict[str, Any]) -> int:
+    """Get the mappings version an existing index was bootstrapped with"""
+    return mappings.get("_meta", {}).get("version", 0)
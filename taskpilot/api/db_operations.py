@@ -1,149 +1,996 @@
 """Database operations for the application"""
-import uuid
+import base64
+import json
+import random
+import threading
+import time
 
-from typing import Any, Dict, Optional
-from elasticsearch import Elasticsearch
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Optional,
+                    Tuple)
+from elastic_transport import ConnectionError as TransportConnectionError
+from elastic_transport import (ConnectionTimeout, Transport,
+                               TransportApiResponse)
+from elastic_transport.client_utils import DEFAULT
+from elasticsearch import Elasticsearch, helpers
 
+from taskpilot.api import db_mappings
 from taskpilot.common import config_info
 
 
 logger = config_info.get_logger()
 
 
+class VersionConflictError(Exception):
+    """Raised when an item changed since the version a write was based on"""
+
+
+class DatabaseUnavailableError(Exception):
+    """
+    Raised when the database failed to serve a request because it is down,
+    overloaded or too slow to answer
+    """
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(DatabaseUnavailableError):
+    """Raised instead of sending a request while the circuit is open"""
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor was not issued for a previous page"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker failing requests fast once the database failed too many
+    times in a row. After the reset timeout requests go through again, and
+    the first one failing opens the circuit anew
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.lock = threading.Lock()
+
+    def get_retry_after(self) -> float:
+        """Get the seconds left until requests are let through again"""
+        if self.opened_at is None:
+            return 0
+        return max(self.opened_at + self.reset_timeout - time.monotonic(), 0)
+
+    def before_request(self) -> None:
+        """Let a request through, unless the circuit is open"""
+        with self.lock:
+            retry_after = self.get_retry_after()
+        if retry_after > 0:
+            raise CircuitOpenError(
+                f"Database circuit breaker is open for another"
+                f" {retry_after:.1f} seconds",
+                retry_after
+            )
+
+    def record_success(self) -> None:
+        """Close the circuit after the database answered a request"""
+        with self.lock:
+            if self.opened_at is not None:
+                logger.info("Database circuit breaker closed")
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        """Count a failed request, opening the circuit past the threshold"""
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                logger.error(
+                    f"Database circuit breaker opened after {self.failures}"
+                    f" failed requests in a row"
+                )
+
+
+circuit_breaker = CircuitBreaker(config_info.DB_BREAKER_FAILURE_THRESHOLD,
+                                 config_info.DB_BREAKER_RESET_TIMEOUT)
+
+READ_METHODS = ("GET", "HEAD")
+READ_ENDPOINTS = ("_search", "_mget", "_count", "_pit")
+BULK_ENDPOINTS = ("_bulk", "_delete_by_query", "_update_by_query")
+
+
+def get_endpoint(target: str) -> str:
+    """Get the last path segment of a request target"""
+    return target.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1]
+
+
+def is_read_request(method: str, target: str) -> bool:
+    """Check if a request only reads, so it is safe to retry"""
+    return method in READ_METHODS or get_endpoint(target) in READ_ENDPOINTS
+
+
+def get_request_options(method: str,
+                        target: str,
+                        options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Get the transport options of a request, with the timeout of its kind
+    unless the caller chose one, and without the retries of the transport
+    """
+    options = dict(options, max_retries=0)
+    if options.get("request_timeout", DEFAULT) is DEFAULT:
+        if get_endpoint(target) in BULK_ENDPOINTS:
+            options["request_timeout"] = config_info.DB_BULK_TIMEOUT
+        elif is_read_request(method, target):
+            options["request_timeout"] = config_info.DB_READ_TIMEOUT
+        else:
+            options["request_timeout"] = config_info.DB_WRITE_TIMEOUT
+    return options
+
+
+def record_failure(method: str,
+                   target: str,
+                   reason: Any) -> DatabaseUnavailableError:
+    """Count a failed request on the circuit breaker and get its error"""
+    circuit_breaker.record_failure()
+    message = f"Database request {method} {target} failed: {reason}"
+    logger.error(message)
+    return DatabaseUnavailableError(message, circuit_breaker.get_retry_after())
+
+
+def check_response(method: str,
+                   target: str,
+                   response: TransportApiResponse
+                   ) -> Optional[DatabaseUnavailableError]:
+    """
+    Record a response on the circuit breaker, getting the error to raise
+    when its status shows the database is unavailable
+    """
+    status = response.meta.status
+    if status in config_info.DB_UNAVAILABLE_STATUSES:
+        return record_failure(method, target, f"status {status}")
+    circuit_breaker.record_success()
+    return None
+
+
+def should_retry(method: str, target: str, attempt: int) -> bool:
+    """Check if a failed request is a read with retries left"""
+    return (is_read_request(method, target)
+            and attempt < config_info.DB_READ_RETRIES)
+
+
+def get_retry_delay(attempt: int) -> float:
+    """Get the jittered exponential backoff before retrying a request"""
+    backoff = min(config_info.DB_RETRY_BACKOFF * 2 ** attempt,
+                  config_info.DB_MAX_RETRY_BACKOFF)
+    return random.uniform(0, backoff)
+
+
+class ResilientTransport(Transport):
+    """
+    Transport sending every request through the circuit breaker with the
+    timeout of its kind, retrying only the reads with backoff
+    """
+
+    def perform_request(self,
+                        method: str,
+                        target: str,
+                        **options: Any) -> TransportApiResponse:
+        options = get_request_options(method, target, options)
+        attempt = 0
+        while True:
+            circuit_breaker.before_request()
+            try:
+                response = super().perform_request(method, target, **options)
+                error = check_response(method, target, response)
+            except (TransportConnectionError, ConnectionTimeout) as exception:
+                error = record_failure(method, target, exception)
+            if error is None:
+                return response
+            if not should_retry(method, target, attempt):
+                raise error
+            time.sleep(get_retry_delay(attempt))
+            attempt += 1
+
+
+class _SharedConnection:
+    """Holder for the Elasticsearch client shared by the whole worker"""
+    client: Optional[Elasticsearch] = None
+    lock = threading.Lock()
+
+
+def init_connection() -> Optional[Elasticsearch]:
+    """Create the pooled database client, if not already created"""
+    with _SharedConnection.lock:
+        if _SharedConnection.client is not None:
+            return _SharedConnection.client
+        try:
+            _SharedConnection.client = Elasticsearch(
+                config_info.DB_URL,
+                connections_per_node=config_info.DB_POOL_SIZE,
+                transport_class=ResilientTransport,
+                headers={
+                    "connection": (
+                        "keep-alive" if config_info.DB_KEEP_ALIVE else "close"
+                    )
+                }
+            )
+            logger.info(
+                f"Generated Elasticsearch client with a pool of"
+                f" {config_info.DB_POOL_SIZE} connections"
+            )
+        except Exception as exception:
+            logger.error(
+                f"Failed to generate Elasticsearch client: {exception}"
+            )
+        return _SharedConnection.client
+
+
+def close_connection() -> None:
+    """Close the pooled database client and release its connections"""
+    with _SharedConnection.lock:
+        if _SharedConnection.client is None:
+            return
+        try:
+            _SharedConnection.client.close()
+            logger.info("Closed Elasticsearch client")
+        except Exception as exception:
+            logger.error(f"Failed to close Elasticsearch client: {exception}")
+        _SharedConnection.client = None
+
+
 def get_connection() -> Optional[Elasticsearch]:
-    """Get connection to the database"""
-    try:
-        conn = Elasticsearch(config_info.DB_URL)
-        logger.info("Generated Elasticsearch client")
-    except Exception as exception:
-        logger.error(f"Failed to generate Elasticsearch client: {exception}")
-        conn = None
-    return conn
+    """Get the shared connection to the database"""
+    if _SharedConnection.client is not None:
+        return _SharedConnection.client
+    return init_connection()
 
 
-def get_item(index: str, item_id: str) -> Dict[str, Any]:
-    """Get an item from the database"""
-    conn = get_connection()
-    try:
-        item = conn.get(index=index, id=item_id)
-        item_dict = item.body["_source"]
-        logger.info(
-            f"Retrieved item with id {item_id} from index {index}: {item_dict}"
-        )
-    except Exception as exception:
-        logger.error(
-            f"Failed to retrieve item with id {item_id} from index {index}:"
-            f" {exception}"
-        )
-        item_dict = {}
-    return item_dict
+RANGE_BOUNDS = ("gt", "gte", "lt", "lte")
 
 
-def get_all_items(index: str) -> Optional[Dict[str, Dict[str, Any]]]:
-    """Get all items from the database"""
-    conn = get_connection()
-    try:
-        items = conn.search(index=index, size=10000)
-        items_dict = {
-            item["_id"]: item["_source"]
-            for item in items["hits"]["hits"]
+def build_term_filter(field: str, value: Any) -> Dict[str, Any]:
+    """Build a filter matching the items whose field has the given value"""
+    return {"term": {field: value}}
+
+
+def build_terms_filter(field: str, values: List[Any]) -> Dict[str, Any]:
+    """Build a filter matching the items whose field has any of the values"""
+    return {"terms": {field: list(values)}}
+
+
+def build_range_filter(field: str, **bounds: Any) -> Dict[str, Any]:
+    """
+    Build a filter matching the items whose field is within the given gt,
+    gte, lt and lte bounds
+    """
+    unknown = set(bounds) - set(RANGE_BOUNDS)
+    if unknown:
+        raise ValueError(f"unknown range bounds {sorted(unknown)}")
+    return {"range": {field: bounds}}
+
+
+def build_prefix_filter(field: str, prefix: str) -> Dict[str, Any]:
+    """Build a filter matching the items whose field starts with a prefix"""
+    return {"prefix": {field: prefix}}
+
+
+def build_exists_filter(field: str) -> Dict[str, Any]:
+    """Build a filter matching the items that have a value for a field"""
+    return {"exists": {"field": field}}
+
+
+def build_bool_filter(
+        filter_: Optional[List[Dict[str, Any]]] = None,
+        must_not: Optional[List[Dict[str, Any]]] = None,
+        should: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Combine filters into one matching the items that match all the filter_
+    ones, none of the must_not ones and, if any, one of the should ones
+    """
+    clauses: Dict[str, Any] = {}
+    if filter_:
+        clauses["filter"] = filter_
+    if must_not:
+        clauses["must_not"] = must_not
+    if should:
+        clauses["should"] = should
+        clauses["minimum_should_match"] = 1
+    return {"bool": clauses}
+
+
+def build_query(index: str,
+                query_dict: Dict[str, Any],
+                filters: Optional[List[Dict[str, Any]]] = None
+                ) -> Dict[str, Any]:
+    """
+    Build an Elasticsearch query matching all the given field values, using
+    full-text matches on analyzed fields and exact terms on the others, and
+    all the given filters
+    """
+    text_fields = db_mappings.get_text_fields(index)
+    conditions = []
+    for field, value in query_dict.items():
+        if field in text_fields:
+            conditions.append(
+                {"match": {field: {"query": value, "operator": "and"}}})
+        elif isinstance(value, list):
+            conditions.extend(
+                build_term_filter(field, element) for element in value)
+        else:
+            conditions.append(build_term_filter(field, value))
+    conditions.extend(filters or [])
+    return {"bool": {"filter": conditions}}
+
+
+def build_terms_agg(
+        field: str,
+        size: int = config_info.DB_AGGREGATION_SIZE) -> Dict[str, Any]:
+    """
+    Build an aggregation counting the items per value of a field, keeping
+    the size most common values
+    """
+    return {"terms": {"field": field, "size": size}}
+
+
+def build_filters_agg(filters: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Build an aggregation counting the items matching each named filter"""
+    return {"filters": {"filters": filters}}
+
+
+def build_date_histogram_agg(field: str, interval: str) -> Dict[str, Any]:
+    """
+    Build an aggregation counting the items per day, month or year of a
+    date field, skipping the empty intervals
+    """
+    return {
+        "date_histogram": {
+            "field": field,
+            "calendar_interval": interval,
+            "format": db_mappings.HISTOGRAM_FORMATS[interval],
+            "min_doc_count": 1
         }
-        logger.info(f"Retrieved all items from index {index}: {items_dict}")
-    except Exception as exception:
-        logger.error(
-            f"Failed to retrieve all items from index {index}: {exception}"
+    }
+
+
+def build_aggregation_request(
+        index: str,
+        query_dict: Dict[str, Any],
+        aggs: Dict[str, Dict[str, Any]],
+        filters: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Build the search request running aggregations without any hits"""
+    return {
+        "index": index,
+        "query": build_query(index, query_dict, filters),
+        "aggs": aggs,
+        "size": 0
+    }
+
+
+def parse_aggregations(
+        response: Dict[str, Any]) -> Dict[str, Dict[str, int]]:
+    """Get the item count of every bucket of every aggregation"""
+    aggregations = {}
+    for name, result in response["aggregations"].items():
+        buckets = result["buckets"]
+        if isinstance(buckets, dict):
+            aggregations[name] = {
+                key: bucket["doc_count"] for key, bucket in buckets.items()
+            }
+        else:
+            aggregations[name] = {
+                str(bucket.get("key_as_string", bucket["key"])):
+                    bucket["doc_count"]
+                for bucket in buckets
+            }
+    return aggregations
+
+
+def get_migration_source(index: str,
+                         mappings: Dict[str, Any]) -> Optional[str]:
+    """
+    Get the concrete index an index has to be migrated from, given the
+    mappings of the concrete indexes it resolves to, or None if it already
+    is an alias of an index with the current mappings version
+    """
+    if len(mappings) != 1:
+        raise ValueError(
+            f"index {index} resolves to several indexes {list(mappings)}")
+    (source, source_mappings), = mappings.items()
+    version = db_mappings.get_mappings_version(source_mappings["mappings"])
+    if version > db_mappings.MAPPINGS_VERSION:
+        raise ValueError(
+            f"index {index} uses mappings version {version}, newer than"
+            f" {db_mappings.MAPPINGS_VERSION}"
         )
-        items_dict = None
-    return items_dict
+    if version == db_mappings.MAPPINGS_VERSION and source != index:
+        return None
+    return source
+
+
+def build_alias_swap(index: str, source: str) -> List[Dict[str, Any]]:
+    """
+    Build the alias actions pointing an index at its current versioned
+    index instead of the concrete index it was migrated from, dropping the
+    source when it held the name the alias takes over
+    """
+    target = db_mappings.get_versioned_index(index)
+    if source == index:
+        remove_source = {"remove_index": {"index": source}}
+    else:
+        remove_source = {"remove": {"index": source, "alias": index}}
+    return [{"add": {"index": target, "alias": index}}, remove_source]
+
 
+def build_ticket_paths(
+        parents: Dict[str, Optional[str]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Get the ancestors, from the root down to the parent, and the depth of
+    every ticket from the parent ticket of each, leaving out the parents
+    that do not exist and cutting any cycle at the ticket reached twice
+    """
+    paths: Dict[str, List[str]] = {}
+    for ticket_id in parents:
+        if ticket_id in paths:
+            continue
+        chain = [ticket_id]
+        parent = parents[ticket_id]
+        while parent in parents and parent not in paths:
+            if parent in chain:
+                parent = None
+                break
+            chain.append(parent)
+            parent = parents[parent]
+        ancestors = paths[parent] + [parent] if parent in paths else []
+        for chain_ticket in reversed(chain):
+            paths[chain_ticket] = ancestors
+            ancestors = ancestors + [chain_ticket]
+    return {
+        ticket_id: {"ancestors": ancestors, "depth": len(ancestors)}
+        for ticket_id, ancestors in paths.items()
+    }
 
-def create_item(index: str,
-                item: Dict[str, Any],
-                item_id: Optional[str] = None) -> Optional[str]:
-    """Create an item in the database"""
-    if not item_id:
-        item_id = str(uuid.uuid4())
+
+def backfill_ticket_paths(index: str) -> None:
+    """
+    Store the ancestors and the depth of every ticket of an index, computed
+    from the parent tickets, for the tickets written before they were kept
+    """
+    parents = {
+        ticket_id: ticket.get("parent_ticket")
+        for ticket_id, ticket in iter_items_in_point_in_time(
+            index, includes=["parent_ticket"])
+    }
+    _, failed = bulk_update(index, build_ticket_paths(parents),
+                            config_info.DBRefreshModes.TRUE)
+    if failed:
+        raise RuntimeError(
+            f"failed to backfill the paths of tickets {list(failed)}")
+
+
+def migrate_index(index: str, source: str) -> None:
+    """
+    Copy the documents of the concrete index an index resolves to into a
+    new index with the current mappings version, backfilling the fields
+    derived from others, then atomically swap the alias of the index onto
+    the new one
+    """
     conn = get_connection()
-    try:
-        response = conn.index(
-            index=index,
-            id=item_id,
-            body=item,
-            op_type="create"
-        )
-    except Exception as exception:
-        logger.error(
-            f"Failed to create item with id {item_id} in index {index}:"
-            f" {exception}"
+    target = db_mappings.get_versioned_index(index)
+    conn.options(ignore_status=400).indices.create(
+        index=target, **db_mappings.get_index_body(index))
+    response = conn.reindex(
+        source={"index": source},
+        dest={"index": target, "op_type": "create"},
+        conflicts="proceed",
+        refresh=True,
+        wait_for_completion=False
+    )
+    task_status = wait_for_task(response["task"])
+    if task_status["failures"]:
+        raise RuntimeError(
+            f"failed to copy {task_status['failures']} documents from"
+            f" {source} to {target}"
         )
-        return None
-    logger.info(f"Created item with id {item_id} in index {index}: {item}")
-    return response["_id"] if response["result"] == "created" else None
+    if index == config_info.DB_INDEXES[config_info.Entities.TICKET]:
+        backfill_ticket_paths(target)
+    conn.indices.update_aliases(actions=build_alias_swap(index, source))
+    logger.info(f"Migrated index {index} from {source} to {target}:"
+                f" {task_status}")
 
 
-def update_item(index: str, item_id: str, item: Dict[str, Any]) -> bool:
-    """Update an item in the database"""
+def ensure_indexes() -> bool:
+    """
+    Apply the index templates and make every index an alias of a concrete
+    index with the current mappings version, creating the missing ones and
+    migrating the outdated ones, including those bootstrapped with dynamic
+    mappings. Returns False if any index is not up to date, in which case
+    queries relying on the mappings would silently miss documents
+    """
     conn = get_connection()
+    success = True
+    for index in config_info.DB_INDEXES.values():
+        try:
+            conn.indices.put_index_template(
+                **db_mappings.get_index_template(index))
+            if not conn.indices.exists(index=index):
+                conn.options(ignore_status=400).indices.create(
+                    index=db_mappings.get_versioned_index(index),
+                    aliases={index: {}},
+                    **db_mappings.get_index_body(index)
+                )
+                logger.info(f"Created index {index}")
+                continue
+            response = conn.indices.get_mapping(index=index)
+            source = get_migration_source(index, response.body)
+            if source is not None:
+                migrate_index(index, source)
+        except DatabaseUnavailableError:
+            raise
+        except Exception as exception:
+            logger.error(f"Failed to bootstrap index {index}: {exception}")
+            success = False
+    return success
+
+
+def build_source_filter(
+        includes: Optional[List[str]] = None,
+        excludes: Optional[List[str]] = None) -> Dict[str, List[str]]:
+    """Build the parameters restricting the returned document fields"""
+    source_filter = {}
+    if includes:
+        source_filter["source_includes"] = includes
+    if excludes:
+        source_filter["source_excludes"] = excludes
+    return source_filter
+
+
+def parse_multi_get(
+        response: Dict[str, Any]
+) -> Tuple[Dict[Tuple[str, str], Dict[str, Any]], List[Tuple[str, str]]]:
+    """Split a multi-get response into found documents and missing refs"""
+    found = {}
+    missing = []
+    for doc in response["docs"]:
+        ref = (doc["_index"], doc["_id"])
+        if doc.get("found"):
+            found[ref] = doc.get("_source", {})
+        else:
+            missing.append(ref)
+    return found, missing
+
+
+def encode_cursor(sort_values: List[Any]) -> str:
+    """Encode the sort values of the last returned item as an opaque cursor"""
+    return base64.urlsafe_b64encode(
+        json.dumps(sort_values).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """
+    Decode a cursor into the sort values to search after, raising
+    InvalidCursorError when it was not issued for a previous page
+    """
     try:
-        response = conn.update(
-            index=index,
-            id=item_id,
-            body={
-                "doc": item
-            }
-        )
-    except Exception as exception:
-        logger.error(
-            f"Failed to update item {item_id} in index {index}: {exception}"
-        )
-        return False
-    logger.info(f"Updated item {item_id} in index {index}: {item}")
-    return response["result"] == "updated"
+        sort_values = json.loads(
+            base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except ValueError as exception:
+        raise InvalidCursorError(f"invalid cursor '{cursor}'") from exception
+    if not isinstance(sort_values, list) or not sort_values:
+        raise InvalidCursorError(f"invalid cursor '{cursor}'")
+    return sort_values
+
+
+def get_page_sort(index: str) -> List[Dict[str, str]]:
+    """Get a sort of the index giving every item a stable position"""
+    return [{config_info.DB_ID_FIELDS[db_mappings.get_entity(index)]: "asc"}]
 
 
-def delete_item(index: str, item_id: str) -> bool:
-    """Delete an item from the database"""
+def build_sort(index: str,
+               sort_by: Optional[str] = None,
+               sort_order: Optional[str] = None) -> List[Dict[str, str]]:
+    """
+    Build the Elasticsearch sort of an index on a field, defaulting to the
+    usual ordering of the entity stored in the index
+    """
+    sort_by, sort_order = db_mappings.resolve_sort(index, sort_by, sort_order)
+    sort_fields = db_mappings.get_sort_fields(index)
+    return [{sort_fields[sort_by]: sort_order}]
+
+
+def build_page_request(index: str,
+                       query_dict: Dict[str, Any],
+                       limit: int,
+                       cursor: Optional[str] = None,
+                       sort: Optional[List[Dict[str, str]]] = None,
+                       includes: Optional[List[str]] = None,
+                       excludes: Optional[List[str]] = None,
+                       filters: Optional[List[Dict[str, Any]]] = None
+                       ) -> Dict[str, Any]:
+    """Build the search request for the page of items following a cursor"""
+    request = {
+        "index": index,
+        "query": build_query(index, query_dict, filters),
+        "sort": (sort or []) + get_page_sort(index),
+        "size": limit,
+        **build_source_filter(includes, excludes)
+    }
+    if cursor:
+        request["search_after"] = decode_cursor(cursor)
+    return request
+
+
+def parse_page_response(
+        response: Dict[str, Any],
+        limit: int) -> Tuple[Dict[str, Dict[str, Any]], Optional[str]]:
+    """Get the items of a page and the cursor of the next page, if any"""
+    hits = response["hits"]["hits"]
+    items_dict = {hit["_id"]: hit["_source"] for hit in hits}
+    next_cursor = (
+        encode_cursor(hits[-1]["sort"])
+        if hits and len(hits) == limit
+        else None
+    )
+    return items_dict, next_cursor
+
+
+def build_scan_request(index: str,
+                       query_dict: Optional[Dict[str, Any]] = None,
+                       page_size: int = config_info.DB_PAGE_SIZE,
+                       sort: Optional[List[Dict[str, str]]] = None,
+                       includes: Optional[List[str]] = None,
+                       excludes: Optional[List[str]] = None,
+                       filters: Optional[List[Dict[str, Any]]] = None
+                       ) -> Dict[str, Any]:
+    """
+    Build the search request for the first page of a scan, without a point
+    in time so that small results cost a single request, asking for one
+    more item than a page to tell whether more pages follow
+    """
+    return {
+        "index": index,
+        "query": build_query(index, query_dict or {}, filters),
+        "sort": (sort or []) + get_page_sort(index),
+        "size": page_size + 1,
+        **build_source_filter(includes, excludes)
+    }
+
+
+def build_point_in_time_request(
+        index: str,
+        query_dict: Optional[Dict[str, Any]] = None,
+        page_size: int = config_info.DB_PAGE_SIZE,
+        sort: Optional[List[Dict[str, str]]] = None,
+        includes: Optional[List[str]] = None,
+        excludes: Optional[List[str]] = None,
+        filters: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Build the search request for the pages of a scan read using a point in
+    time, sorted like the first page so that they can follow it
+    """
+    return {
+        "query": build_query(index, query_dict or {}, filters),
+        "sort": (sort or []) + get_page_sort(index),
+        "size": page_size,
+        **build_source_filter(includes, excludes)
+    }
+
+
+def parse_scan_page(
+        response: Dict[str, Any],
+        page_size: int
+) -> Tuple[str, List[Dict[str, Any]], Optional[List[Any]]]:
+    """
+    Get the renewed point in time id, the hits and, unless it was the last
+    page, the sort values to search after of a page of a scan
+    """
+    hits = response["hits"]["hits"]
+    search_after = hits[-1]["sort"] if len(hits) == page_size else None
+    return response["pit_id"], hits, search_after
+
+
+def iter_items_in_point_in_time(
+        index: str,
+        query_dict: Optional[Dict[str, Any]] = None,
+        page_size: int = config_info.DB_PAGE_SIZE,
+        sort: Optional[List[Dict[str, str]]] = None,
+        includes: Optional[List[str]] = None,
+        excludes: Optional[List[str]] = None,
+        filters: Optional[List[Dict[str, Any]]] = None,
+        search_after: Optional[List[Any]] = None
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Stream the items matching a query page by page in the given sort order,
+    following the given sort values if any, using a point in time so that
+    the results stay consistent however many pages there are
+    """
     conn = get_connection()
+    request = build_point_in_time_request(
+        index, query_dict, page_size, sort=sort, includes=includes,
+        excludes=excludes, filters=filters)
+    keep_alive = config_info.DB_POINT_IN_TIME_KEEP_ALIVE
+    pit_id = conn.open_point_in_time(index=index, keep_alive=keep_alive)["id"]
     try:
-        response = conn.delete(index=index, id=item_id)
-    except Exception as exception:
-        logger.error(
-            f"Failed to delete item {item_id} from index {index}: {exception}"
-        )
-        return False
-    logger.info(f"Deleted item {item_id} from {index}")
-    return response["result"] == "deleted"
+        while True:
+            response = conn.search(
+                pit={"id": pit_id, "keep_alive": keep_alive},
+                search_after=search_after, **request)
+            pit_id, hits, search_after = parse_scan_page(response, page_size)
+            for hit in hits:
+                yield hit["_id"], hit["_source"]
+            if search_after is None:
+                return
+    finally:
+        try:
+            conn.close_point_in_time(id=pit_id)
+        except Exception as exception:
+            logger.error(f"Failed to close point in time: {exception}")
+
+
+def build_increment_request(field: str) -> Dict[str, Any]:
+    """
+    Build the scripted update incrementing a counter field of an item and
+    returning its new value, so the counter is allocated in a single call
+    """
+    return {
+        "script": {
+            "source": "if (ctx._source[params.field] == null) {"
+                      " ctx._source[params.field] = 0 }"
+                      " ctx._source[params.field] += 1",
+            "lang": "painless",
+            "params": {"field": field}
+        },
+        "source_includes": [field],
+        "retry_on_conflict": config_info.DB_CONFLICT_RETRIES
+    }
+
+
+ADD_TO_SET_SCRIPT = (
+    "if (ctx._source[params.field] == null) {"
+    " ctx._source[params.field] = [] }"
+    " if (ctx._source[params.field].contains(params.value)) {"
+    " ctx.op = 'noop' } else {"
+    " ctx._source[params.field].add(params.value) }"
+)
+
+REMOVE_FROM_SET_SCRIPT = (
+    "if (ctx._source[params.field] == null"
+    " || !ctx._source[params.field].removeIf(v -> v == params.value)) {"
+    " ctx.op = 'noop' }"
+)
 
 
-def search_items(
+def build_set_request(script: str,
+                      field: str,
+                      value: Any) -> Dict[str, Any]:
+    """Build the scripted update adding or removing a value of a set field"""
+    return {
+        "script": {
+            "source": script,
+            "lang": "painless",
+            "params": {"field": field, "value": value}
+        },
+        "retry_on_conflict": config_info.DB_CONFLICT_RETRIES
+    }
+
+
+def build_bulk_actions(
+        op_type: str,
         index: str,
-        query_dict: Dict[str, Any]) -> Optional[Dict[str, Dict[str, Any]]]:
-    """Search for items in the database"""
-    if not query_dict:
-        return get_all_items(index)
+        items: Dict[str, Optional[Dict[str, Any]]]
+) -> Iterable[Dict[str, Any]]:
+    """Build the _bulk actions for applying an operation to many items"""
+    for item_id, item in items.items():
+        action = {"_op_type": op_type, "_index": index, "_id": item_id}
+        if op_type == "create":
+            action["_source"] = item
+        elif op_type == "update":
+            action["doc"] = item
+        yield action
+
+
+def parse_bulk_result(succeeded: bool,
+                      result: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    """Get the item id and the error, if any, of a _bulk item result"""
+    item_result = next(iter(result.values()))
+    item_id = item_result.get("_id")
+    if succeeded:
+        return item_id, None
+    error = item_result.get("error", item_result.get("status"))
+    return item_id, str(error)
+
+
+def get_bulk_options(refresh: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Get the options of the streaming bulk helpers, chunking by count and
+    size and reporting the errors per item instead of raising them
+    """
+    options = {
+        "chunk_size": config_info.DB_BULK_CHUNK_SIZE,
+        "max_chunk_bytes": config_info.DB_BULK_MAX_CHUNK_BYTES,
+        "raise_on_error": False,
+        "raise_on_exception": False
+    }
+    if refresh is not None:
+        options["refresh"] = refresh
+    return options
+
+
+def fail_unreported_actions(actions: List[Dict[str, Any]],
+                            succeeded_ids: List[str],
+                            failed: Dict[str, str],
+                            exception: Exception) -> None:
+    """
+    Record the error that interrupted a bulk operation on the items it did
+    not report a result for
+    """
+    reported = set(succeeded_ids).union(failed)
+    for action in actions:
+        if action["_id"] not in reported:
+            failed[action["_id"]] = str(exception)
+
+
+def log_bulk_result(succeeded_ids: List[str], failed: Dict[str, str]) -> None:
+    """Log the outcome of a bulk operation"""
+    if failed:
+        logger.error(f"Bulk operation failed for {len(failed)} items:"
+                     f" {failed}")
+    logger.info(f"Bulk operation succeeded for {len(succeeded_ids)} items")
+
+
+def bulk_write(actions: Iterable[Dict[str, Any]],
+               refresh: Optional[str] = None
+               ) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Send actions to the _bulk endpoint in chunks bounded by count and size,
+    returning the ids of the succeeded items and the errors of the failed ones
+    """
     conn = get_connection()
+    actions = list(actions)
+    succeeded_ids = []
+    failed = {}
     try:
-        query_body = {
-            "query": {
-                "bool": {
-                    "filter": [
-                        {"match": {f"{field}.keyword": value}}
-                        for field, value in query_dict.items()
-                    ]
-                }
-            }
-        }
-        items = conn.search(index=index, body=query_body, size=10000)
-        items_dict = {
-            item["_id"]: item["_source"]
-            for item in items["hits"]["hits"]
-        }
-        logger.info(f"Retrieved items from index {index} that satisfy the"
-                    f" query {query_dict}: {items_dict}")
+        for succeeded, result in helpers.streaming_bulk(
+                conn, actions, **get_bulk_options(refresh)):
+            item_id, error = parse_bulk_result(succeeded, result)
+            if error is None:
+                succeeded_ids.append(item_id)
+            else:
+                failed[item_id] = error
+    except DatabaseUnavailableError:
+        raise
     except Exception as exception:
-        logger.error(
-            f"Failed to retrieve items from index {index} that satisfy the"
-            f" query {query_dict}: {exception}"
-        )
-        items_dict = None
-    return items_dict
+        fail_unreported_actions(actions, succeeded_ids, failed, exception)
+    log_bulk_result(succeeded_ids, failed)
+    return succeeded_ids, failed
+
+
+def bulk_create(index: str,
+                items: Dict[str, Dict[str, Any]],
+                refresh: Optional[str] = None
+                ) -> Tuple[List[str], Dict[str, str]]:
+    """Create many items, keyed by id, in the database"""
+    return bulk_write(build_bulk_actions("create", index, items), refresh)
+
+
+def bulk_update(index: str,
+                items: Dict[str, Dict[str, Any]],
+                refresh: Optional[str] = None
+                ) -> Tuple[List[str], Dict[str, str]]:
+    """Partially update many items, keyed by id, in the database"""
+    return bulk_write(build_bulk_actions("update", index, items), refresh)
+
+
+SET_FIELDS_SCRIPT = (
+    "for (entry in params.doc.entrySet()) {"
+    " ctx._source[entry.getKey()] = entry.getValue() }"
+)
+
+
+def chunk_values(
+        values: List[Any],
+        size: int = config_info.DB_TERMS_CHUNK_SIZE) -> Iterator[List[Any]]:
+    """
+    Split values into chunks small enough for a terms query, which accepts
+    a bounded number of terms
+    """
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def build_by_query_request(
+        field: str,
+        values: List[Any],
+        item: Optional[Dict[str, Any]] = None,
+        refresh: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build a throttled delete_by_query or, given a partial document, an
+    update_by_query request, run as a task on the items whose field has one
+    of the given values. By-query requests can only refresh once they are
+    done, so any refresh mode but false refreshes
+    """
+    request = {
+        "query": {"terms": {field: values}},
+        "conflicts": "proceed",
+        "slices": "auto",
+        "requests_per_second": config_info.DB_BY_QUERY_REQUESTS_PER_SECOND,
+        "wait_for_completion": False
+    }
+    if refresh is not None:
+        request["refresh"] = refresh != config_info.DBRefreshModes.FALSE
+    if item is not None:
+        request["script"] = {
+            "source": SET_FIELDS_SCRIPT,
+            "lang": "painless",
+            "params": {"doc": item}
+        }
+    return request
+
+
+def get_empty_task_status() -> Dict[str, int]:
+    """Get the progress counts of a by-query task with nothing to do"""
+    return {
+        "total": 0,
+        "deleted": 0,
+        "updated": 0,
+        "version_conflicts": 0,
+        "failures": 0
+    }
+
+
+def parse_task_status(response: Dict[str, Any]) -> Dict[str, int]:
+    """Get the progress counts from a tasks API response"""
+    status = response.get("response") or response["task"]["status"]
+    task_status = get_empty_task_status()
+    for key in task_status:
+        if key == "failures":
+            task_status[key] = len(status.get("failures", []))
+        else:
+            task_status[key] = status.get(key, 0)
+    return task_status
+
+
+def add_task_statuses(first: Dict[str, int],
+                      second: Dict[str, int]) -> Dict[str, int]:
+    """Add up the progress counts of two by-query tasks"""
+    return {key: first[key] + second[key] for key in first}
+
+
+def offset_progress(
+        done: Dict[str, int],
+        progress: Optional[Callable[[Dict[str, int]], None]] = None
+) -> Optional[Callable[[Dict[str, int]], None]]:
+    """
+    Get the callback reporting the progress counts of a by-query task on
+    top of the counts of the tasks done before it
+    """
+    if progress is None:
+        return None
+
+    def offset(task_status: Dict[str, int]) -> None:
+        progress(add_task_statuses(done, task_status))
+    return offset
+
+
+def wait_for_task(
+        task_id: str,
+        progress: Optional[Callable[[Dict[str, int]], None]] = None
+) -> Dict[str, int]:
+    """
+    Poll a by-query task until it completes, reporting its progress counts
+    along the way, and return its final counts
+    """
+    conn = get_connection()
+    while True:
+        response = conn.tasks.get(task_id=task_id)
+        task_status = parse_task_status(response)
+        if progress is not None:
+            progress(task_status)
+        if response["completed"]:
+            if "error" in response:
+                raise RuntimeError(response["error"].get("reason"))
+            return task_status
+        time.sleep(config_info.DB_TASK_POLL_INTERVAL)
@@ -0,0 +1,147 @@
+"""Caches of the entities the API service reads"""
+import collections
+import contextlib
+import contextvars
+import copy
+import time
+
+from typing import Any, Dict, Iterator, Optional, OrderedDict, Tuple
+
+from taskpilot.common import config_info
+
+
+logger = config_info.get_logger()
+
+CACHE_COUNTERS = ("hits", "misses", "evictions", "expirations",
+                  "invalidations")
+
+
+class EntityCache:
+    """
+    Least recently used cache of items keyed by index and id, bounded in
+    size and expiring the items after a time to live. Every invalidation
+    starts a new generation, and items read during an older generation are
+    not cached, so a read racing a write never caches the overwritten item
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.generation = 0
+        self._items: OrderedDict[
+            Tuple[str, str], Tuple[float, Dict[str, Any]]
+        ] = collections.OrderedDict()
+        self._counters: Dict[str, Dict[str, int]] = collections.defaultdict(
+            lambda: dict.fromkeys(CACHE_COUNTERS, 0))
+
+    def get(self, index: str, item_id: str) -> Optional[Dict[str, Any]]:
+        """Get a copy of a cached item, or None if it is not cached"""
+        key = (index, item_id)
+        entry = self._items.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            del self._items[key]
+            self._counters[index]["expirations"] += 1
+            entry = None
+        if entry is None:
+            self._counters[index]["misses"] += 1
+            return None
+        self._items.move_to_end(key)
+        self._counters[index]["hits"] += 1
+        return copy.deepcopy(entry[1])
+
+    def put(self,
+            index: str,
+            item_id: str,
+            item: Dict[str, Any],
+            generation: int) -> None:
+        """
+        Cache a copy of an item read during the given generation, evicting
+        the least recently used items over the size bound
+        """
+        if generation != self.generation:
+            return
+        key = (index, item_id)
+        self._items[key] = (time.monotonic() + self.ttl, copy.deepcopy(item))
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            (evicted_index, _), _ = self._items.popitem(last=False)
+            self._counters[evicted_index]["evictions"] += 1
+
+    def invalidate(self, index: str, item_id: str) -> None:
+        """Drop an item after a write to it"""
+        self.generation += 1
+        if self._items.pop((index, item_id), None) is not None:
+            self._counters[index]["invalidations"] += 1
+
+    def invalidate_index(self, index: str) -> None:
+        """Drop all the items of an index after a write to many of them"""
+        self.generation += 1
+        keys = [key for key in self._items if key[0] == index]
+        for key in keys:
+            del self._items[key]
+        self._counters[index]["invalidations"] += len(keys)
+        logger.info(f"Invalidated {len(keys)} cached items of index {index}")
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Get the counters and the number of cached items of every index"""
+        sizes = collections.Counter(index for index, _ in self._items)
+        return {
+            index: {**counters, "size": sizes[index]}
+            for index, counters in self._counters.items()
+        }
+
+
+class RequestItems:
+    """
+    Identity map of the items loaded while serving a single request, so the
+    same item is read from the database at most once per request
+    """
+
+    def __init__(self) -> None:
+        self._items: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def get(self, index: str, item_id: str) -> Optional[Dict[str, Any]]:
+        """Get a copy of a loaded item, or None if it was not loaded"""
+        item = self._items.get((index, item_id))
+        return copy.deepcopy(item) if item is not None else None
+
+    def put(self, index: str, item_id: str, item: Dict[str, Any]) -> None:
+        """Remember a copy of a loaded item"""
+        self._items[(index, item_id)] = copy.deepcopy(item)
+
+    def forget(self, index: str, item_id: str) -> None:
+        """Forget an item after a write to it"""
+        self._items.pop((index, item_id), None)
+
+    def forget_index(self, index: str) -> None:
+        """Forget all the items of an index after a write to many of them"""
+        for key in [key for key in self._items if key[0] == index]:
+            del self._items[key]
+
+
+_request_items: "contextvars.ContextVar[Optional[RequestItems]]" = (
+    contextvars.ContextVar("request_items", default=None))
+
+
+@contextlib.contextmanager
+def request_scope() -> Iterator[RequestItems]:
+    """Bind a new identity map to the request being served"""
+    request_items = RequestItems()
+    token = _request_items.set(request_items)
+    try:
+        yield request_items
+    finally:
+        _request_items.reset(token)
+
+
+def leave_request_scope() -> None:
+    """
+    Unbind the identity map from a task outliving the request it was
+    started by
+    """
+    _request_items.set(None)
+
+
+def get_request_items() -> Optional[RequestItems]:
+    """Get the identity map of the request being served, if any"""
+    return _request_items.get()
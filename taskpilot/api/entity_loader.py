@@ -0,0 +1,64 @@
+"""Batched loading of the items looked up concurrently"""
+import asyncio
+import copy
+
+from typing import Any, Awaitable, Callable, Dict, List, Set, Tuple
+
+from taskpilot.common import config_info
+
+
+logger = config_info.get_logger()
+
+Ref = Tuple[str, str]
+Item = Dict[str, Any]
+LoadItems = Callable[[List[Ref]], Awaitable[Tuple[Dict[Ref, Item], List[Ref]]]]
+
+
+class EntityLoader:
+    """
+    Loader gathering the items looked up during the same event loop
+    iteration and fetching them together in a single round trip. Identical
+    lookups made during that iteration share the same fetch
+    """
+
+    def __init__(self, load_items: LoadItems) -> None:
+        self._load_items = load_items
+        self._pending: Dict[Ref, asyncio.Future] = {}
+        self._running: Set[asyncio.Task] = set()
+
+    async def load(self, index: str, item_id: str) -> Item:
+        """Get an item, or an empty dict if it does not exist"""
+        if not item_id:
+            return {}
+        ref = (index, item_id)
+        future = self._pending.get(ref)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            future = loop.create_future()
+            self._pending[ref] = future
+        return copy.deepcopy(await asyncio.shield(future))
+
+    def _dispatch(self) -> None:
+        """Start fetching the items looked up since the last dispatch"""
+        batch, self._pending = self._pending, {}
+        task = asyncio.ensure_future(self._load_batch(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _load_batch(self, batch: Dict[Ref, asyncio.Future]) -> None:
+        """Fetch a batch of items and hand them to the waiting lookups"""
+        try:
+            found, _ = await self._load_items(list(batch))
+            for ref, future in batch.items():
+                if not future.done():
+                    future.set_result(found.get(ref, {}))
+        except Exception as exception:
+            logger.error(f"Failed to load items {list(batch)}: {exception}")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exception)
+        finally:
+            for future in batch.values():
+                future.cancel()
@@ -0,0 +1,205 @@
+"""Resolution of the rights of the users on the entities"""
+import asyncio
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel
+
+from taskpilot.api import db_operations as db
+from taskpilot.api import storage_backends as storage
+from taskpilot.api.entity_cache import EntityCache
+from taskpilot.common import config_info
+from taskpilot.common.config_info import Entities, Permissions
+
+
+logger = config_info.get_logger()
+
+ACL_CACHE_KEY = "acl"
+
+Check = Tuple[str, str, str]
+
+
+class EffectiveAcl(BaseModel):
+    """Effective rights of a user, resolved once for all their checks"""
+    is_admin: bool = False
+    owned_projects: Set[str] = set()
+    member_projects: Set[str] = set()
+
+
+class _SharedAcls:
+    """Holder for the effective rights cached by the whole worker"""
+    cache = EntityCache(config_info.PERMISSIONS_CACHE_SIZE,
+                        config_info.PERMISSIONS_CACHE_TTL)
+
+
+def build_membership_filter(user_id: str) -> Dict[str, Any]:
+    """
+    Build the database filter matching the projects a user is a member or
+    the creator of
+    """
+    return db.build_bool_filter(should=[
+        db.build_term_filter("members", user_id),
+        db.build_term_filter("created_by", user_id)
+    ])
+
+
+def invalidate_user(user_id: str) -> None:
+    """Drop the cached rights of a user after a change to their rights"""
+    _SharedAcls.cache.invalidate(ACL_CACHE_KEY, user_id.lower())
+
+
+def invalidate_all() -> None:
+    """
+    Drop the cached rights of all the users after a change to the rights of
+    many of them
+    """
+    _SharedAcls.cache.invalidate_index(ACL_CACHE_KEY)
+
+
+def get_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Get the counters of the cache of effective rights"""
+    return _SharedAcls.cache.get_stats()
+
+
+async def get_effective_acl(user_id: str) -> Optional[EffectiveAcl]:
+    """
+    Get the effective rights of a user, or None if the user does not exist.
+    Rights that cannot be retrieved are denied and not cached
+    """
+    user_id = user_id.lower()
+    cached = _SharedAcls.cache.get(ACL_CACHE_KEY, user_id)
+    if cached is not None:
+        return EffectiveAcl.parse_obj(cached)
+
+    generation = _SharedAcls.cache.generation
+    user = await storage.get_item(
+        config_info.DB_INDEXES[Entities.USER], user_id,
+        includes=["username", "is_admin"])
+    if not user:
+        return None
+
+    projects = await storage.search_items(
+        config_info.DB_INDEXES[Entities.PROJECT], {},
+        includes=["project_id", "created_by"],
+        filters=[build_membership_filter(user_id)])
+    acl = EffectiveAcl(
+        is_admin=user.get("is_admin", False),
+        owned_projects={
+            project_id
+            for project_id, project in (projects or {}).items()
+            if project.get("created_by") == user_id
+        },
+        member_projects=set(projects or {})
+    )
+    if projects is None:
+        logger.error(f"Failed to resolve the rights of user with id"
+                     f" {user_id}, denying the unresolved ones")
+        return acl
+    _SharedAcls.cache.put(ACL_CACHE_KEY, user_id, acl.dict(), generation)
+    return acl
+
+
+async def _is_project_allowed(acl: EffectiveAcl,
+                              project_id: str,
+                              permission: str) -> Optional[bool]:
+    """Check a right on a project, or None if it does not exist"""
+    projects = (
+        acl.owned_projects if permission == Permissions.OWNER
+        else acl.member_projects
+    )
+    if project_id in projects:
+        return True
+    project = await storage.get_item(
+        config_info.DB_INDEXES[Entities.PROJECT], project_id,
+        includes=["project_id"])
+    return acl.is_admin if project else None
+
+
+async def _is_ticket_owner(acl: EffectiveAcl,
+                           user_id: str,
+                           ticket_id: str) -> Optional[bool]:
+    """
+    Check if a user owns a ticket, by having created it or one of its
+    ancestors or the project of any of them, or None if it does not exist
+    """
+    index = config_info.DB_INDEXES[Entities.TICKET]
+    ticket = await storage.get_item(
+        index, ticket_id,
+        includes=["ticket_id", "created_by", "parent_project",
+                  "parent_ticket", "ancestors"])
+    if not ticket:
+        return None
+    ancestors = ticket.get("ancestors", [])
+    if (acl.is_admin
+            or ticket.get("created_by") == user_id
+            or ticket.get("parent_project") in acl.owned_projects):
+        return True
+    if not ancestors and ticket.get("parent_ticket"):
+        return bool(await _is_ticket_owner(
+            acl, user_id, ticket["parent_ticket"]))
+    ancestor_tickets = await asyncio.gather(*[
+        storage.get_item(index, ancestor,
+                         includes=["created_by", "parent_project"])
+        for ancestor in ancestors
+    ])
+    return any(
+        ancestor.get("created_by") == user_id
+        or ancestor.get("parent_project") in acl.owned_projects
+        for ancestor in ancestor_tickets
+        if ancestor
+    )
+
+
+async def _is_comment_owner(acl: EffectiveAcl,
+                            user_id: str,
+                            comment_id: str) -> Optional[bool]:
+    """
+    Check if a user owns a comment, by having written it or owning its
+    ticket, or None if it does not exist
+    """
+    comment = await storage.get_item(
+        config_info.DB_INDEXES[Entities.COMMENT], comment_id,
+        includes=["comment_id", "ticket_id", "created_by"])
+    if not comment:
+        return None
+    if acl.is_admin or comment.get("created_by") == user_id:
+        return True
+    return bool(await _is_ticket_owner(acl, user_id, comment["ticket_id"]))
+
+
+async def _check(acl: EffectiveAcl,
+                 user_id: str,
+                 check: Check) -> Optional[bool]:
+    """Check a single right of a user, or None if its entity does not exist"""
+    entity, entity_id, permission = check
+    if entity == Entities.PROJECT:
+        return await _is_project_allowed(acl, entity_id, permission)
+    if entity == Entities.TICKET:
+        return await _is_ticket_owner(acl, user_id, entity_id)
+    return await _is_comment_owner(acl, user_id, entity_id)
+
+
+def validate_checks(checks: List[Check]) -> None:
+    """Raise ValueError when a check names an unknown entity or right"""
+    for entity, _, permission in checks:
+        if permission not in config_info.ENTITY_PERMISSIONS.get(entity, []):
+            raise ValueError(
+                f"cannot check right '{permission}' on entity '{entity}'")
+
+
+async def check_permissions(
+        user_id: str,
+        checks: List[Check]) -> Optional[List[Optional[bool]]]:
+    """
+    Check rights of a user, given as (entity, id, right) triples, against
+    their effective rights, looking the entities up concurrently so they are
+    fetched in batches. Gives None for the entities that do not exist, or
+    None instead of the results if the user does not exist
+    """
+    validate_checks(checks)
+    acl = await get_effective_acl(user_id)
+    if acl is None:
+        return None
+    return list(await asyncio.gather(*[
+        _check(acl, user_id.lower(), check) for check in checks
+    ]))
@@ -0,0 +1,89 @@
+"""Storage backends the API service can keep its data in"""
+import functools
+
+from typing import Any, Callable, Dict, Optional
+
+from taskpilot.api.entity_cache import EntityCache
+from taskpilot.api.storage_backends.base import StorageBackend
+from taskpilot.api.storage_backends.cached import CachedBackend
+from taskpilot.api.storage_backends.elasticsearch import ElasticsearchBackend
+from taskpilot.api.storage_backends.memory import InMemoryBackend
+from taskpilot.api.storage_backends.sqlite import SQLiteBackend
+from taskpilot.common import config_info
+
+
+class _SharedBackend:
+    """Holder for the storage backend shared by the whole worker"""
+    backend: Optional[StorageBackend] = None
+
+
+def create_backend(name: str) -> StorageBackend:
+    """Create the storage backend with the given name"""
+    if name == config_info.DBBackends.ELASTICSEARCH:
+        return ElasticsearchBackend()
+    if name == config_info.DBBackends.MEMORY:
+        return InMemoryBackend()
+    if name == config_info.DBBackends.SQLITE:
+        return SQLiteBackend(config_info.DB_SQLITE_PATH)
+    raise ValueError(f"Unknown storage backend {name}")
+
+
+def get_backend() -> StorageBackend:
+    """Get the configured storage backend, creating it if needed"""
+    if _SharedBackend.backend is None:
+        _SharedBackend.backend = CachedBackend(
+            create_backend(config_info.DB_BACKEND),
+            [
+                config_info.DB_INDEXES[entity]
+                for entity in config_info.DB_CACHED_ENTITIES
+            ],
+            EntityCache(config_info.DB_CACHE_SIZE, config_info.DB_CACHE_TTL)
+        )
+    return _SharedBackend.backend
+
+
+def set_backend(backend: StorageBackend) -> None:
+    """Replace the storage backend used by the worker"""
+    _SharedBackend.backend = backend
+
+
+def _delegate(name: str) -> Callable[..., Any]:
+    """Build a module-level shortcut to a method of the current backend"""
+    @functools.wraps(getattr(StorageBackend, name))
+    async def method(*args: Any, **kwargs: Any) -> Any:
+        return await getattr(get_backend(), name)(*args, **kwargs)
+    return method
+
+
+open_backend = _delegate("open")
+close_backend = _delegate("close")
+get_item = _delegate("get_item")
+get_versioned_item = _delegate("get_versioned_item")
+get_items = _delegate("get_items")
+item_exists = _delegate("item_exists")
+items_exist = _delegate("items_exist")
+get_missing_items = _delegate("get_missing_items")
+get_items_from_indexes = _delegate("get_items_from_indexes")
+search_items = _delegate("search_items")
+search_page = _delegate("search_page")
+count_items = _delegate("count_items")
+aggregate = _delegate("aggregate")
+create_item = _delegate("create_item")
+update_item = _delegate("update_item")
+increment_counter = _delegate("increment_counter")
+add_to_set = _delegate("add_to_set")
+remove_from_set = _delegate("remove_from_set")
+delete_item = _delegate("delete_item")
+delete_by_query = _delegate("delete_by_query")
+update_by_query = _delegate("update_by_query")
+bulk_create = _delegate("bulk_create")
+bulk_update = _delegate("bulk_update")
+bulk_delete = _delegate("bulk_delete")
+
+
+def get_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Get the counters of the entity cache, if the backend has one"""
+    backend = get_backend()
+    if isinstance(backend, CachedBackend):
+        return backend.get_cache_stats()
+    return {}
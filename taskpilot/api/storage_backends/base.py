@@ -0,0 +1,272 @@
+"""Interface of the storage backends the API service can keep its data in"""
+import abc
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+Item = Dict[str, Any]
+Ref = Tuple[str, str]
+BulkResult = Tuple[List[str], Dict[str, str]]
+Version = Dict[str, int]
+Progress = Callable[[Dict[str, int]], None]
+Filter = Dict[str, Any]
+Aggregations = Dict[str, Dict[str, int]]
+
+
+class StorageBackend(abc.ABC):
+    """
+    Storage of the users, projects, tickets and comments of the API. Writes
+    take a refresh mode out of DBRefreshModes telling whether to make them
+    visible to searches before returning, which backends whose writes are
+    always visible ignore
+    """
+
+    async def open(self) -> None:
+        """Prepare the storage for use"""
+
+    async def close(self) -> None:
+        """Release the resources held by the storage"""
+
+    @abc.abstractmethod
+    async def get_item(self,
+                       index: str,
+                       item_id: str,
+                       includes: Optional[List[str]] = None,
+                       excludes: Optional[List[str]] = None) -> Item:
+        """Get an item, or an empty dict if it does not exist"""
+
+    @abc.abstractmethod
+    async def get_versioned_item(
+            self,
+            index: str,
+            item_id: str
+    ) -> Tuple[Item, Optional[Version]]:
+        """
+        Get an item along with the version to pass back to update_item, or
+        an empty dict and None if it does not exist
+        """
+
+    @abc.abstractmethod
+    async def get_items_from_indexes(
+            self,
+            refs: List[Ref],
+            includes: Optional[List[str]] = None,
+            excludes: Optional[List[str]] = None
+    ) -> Tuple[Dict[Ref, Item], List[Ref]]:
+        """
+        Get items identified by (index, id) pairs, returning the found items
+        and the missing references
+        """
+
+    @abc.abstractmethod
+    async def item_exists(self, index: str, item_id: str) -> bool:
+        """Check if an item exists without fetching it"""
+
+    @abc.abstractmethod
+    async def items_exist(self,
+                          refs: List[Ref]) -> Tuple[List[Ref], List[Ref]]:
+        """
+        Check which items identified by (index, id) pairs exist without
+        fetching them, returning the existing and the missing references
+        """
+
+    async def get_missing_items(self,
+                                index: str,
+                                item_ids: List[str]) -> List[str]:
+        """Get the ids of the items missing from an index"""
+        _, missing = await self.items_exist(
+            [(index, item_id) for item_id in item_ids])
+        return [item_id for _, item_id in missing]
+
+    async def get_items(
+            self,
+            index: str,
+            item_ids: List[str],
+            includes: Optional[List[str]] = None,
+            excludes: Optional[List[str]] = None
+    ) -> Tuple[Dict[str, Item], List[str]]:
+        """
+        Get multiple items from an index, returning the found items and the
+        missing ids
+        """
+        found, missing = await self.get_items_from_indexes(
+            [(index, item_id) for item_id in item_ids], includes, excludes
+        )
+        return (
+            {item_id: item for (_, item_id), item in found.items()},
+            [item_id for _, item_id in missing]
+        )
+
+    @abc.abstractmethod
+    async def search_items(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            sort_by: Optional[str] = None,
+            sort_order: Optional[str] = None,
+            includes: Optional[List[str]] = None,
+            excludes: Optional[List[str]] = None,
+            filters: Optional[List[Filter]] = None
+    ) -> Optional[Dict[str, Item]]:
+        """
+        Get all the items matching a query and the filters built by the
+        db_operations filter builders, in sort order
+        """
+
+    @abc.abstractmethod
+    async def search_page(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            limit: int,
+            cursor: Optional[str] = None,
+            sort_by: Optional[str] = None,
+            sort_order: Optional[str] = None,
+            includes: Optional[List[str]] = None,
+            excludes: Optional[List[str]] = None,
+            filters: Optional[List[Filter]] = None
+    ) -> Optional[Tuple[Dict[str, Item], Optional[str]]]:
+        """
+        Get a page of at most limit items matching a query and the filters,
+        following the given cursor, along with the cursor of the next page
+        """
+
+    @abc.abstractmethod
+    async def count_items(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            filters: Optional[List[Filter]] = None) -> Optional[int]:
+        """Count the items that satisfy a query and the filters"""
+
+    @abc.abstractmethod
+    async def aggregate(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            aggs: Dict[str, Dict[str, Any]],
+            filters: Optional[List[Filter]] = None
+    ) -> Optional[Aggregations]:
+        """
+        Count the items that satisfy a query and the filters in the buckets
+        of the aggregations built by the db_operations aggregation builders
+        """
+
+    @abc.abstractmethod
+    async def create_item(self,
+                          index: str,
+                          item: Item,
+                          item_id: Optional[str] = None,
+                          refresh: Optional[str] = None) -> Optional[str]:
+        """Create an item, returning its id"""
+
+    @abc.abstractmethod
+    async def update_item(self,
+                          index: str,
+                          item_id: str,
+                          item: Item,
+                          version: Optional[Version] = None,
+                          refresh: Optional[str] = None) -> bool:
+        """
+        Partially update an item, raising VersionConflictError if a version
+        is given and the item was modified since it was read
+        """
+
+    @abc.abstractmethod
+    async def increment_counter(self,
+                                index: str,
+                                item_id: str,
+                                field: str) -> Optional[int]:
+        """
+        Atomically increment a counter field of an item, returning the
+        value it had before the increment
+        """
+
+    @abc.abstractmethod
+    async def add_to_set(self,
+                         index: str,
+                         item_id: str,
+                         field: str,
+                         value: Any,
+                         refresh: Optional[str] = None) -> bool:
+        """Add a value to a set field of an item, if not already there"""
+
+    @abc.abstractmethod
+    async def remove_from_set(self,
+                              index: str,
+                              item_id: str,
+                              field: str,
+                              value: Any,
+                              refresh: Optional[str] = None) -> bool:
+        """Remove a value from a set field of an item, if there"""
+
+    @abc.abstractmethod
+    async def delete_item(self,
+                          index: str,
+                          item_id: str,
+                          refresh: Optional[str] = None) -> bool:
+        """Delete an item"""
+
+    @abc.abstractmethod
+    async def delete_by_query(
+            self,
+            index: str,
+            field: str,
+            values: List[Any],
+            progress: Optional[Progress] = None,
+            refresh: Optional[str] = None
+    ) -> Optional[Dict[str, int]]:
+        """
+        Delete the items whose field has one of the given values in a single
+        pass, reporting progress counts along the way and returning the
+        final counts
+        """
+
+    @abc.abstractmethod
+    async def update_by_query(
+            self,
+            index: str,
+            field: str,
+            values: List[Any],
+            item: Item,
+            progress: Optional[Progress] = None,
+            refresh: Optional[str] = None
+    ) -> Optional[Dict[str, int]]:
+        """
+        Set the fields of a partial document on the items whose field has
+        one of the given values in a single pass, reporting progress counts
+        along the way and returning the final counts
+        """
+
+    @abc.abstractmethod
+    async def bulk_create(self,
+                          index: str,
+                          items: Dict[str, Item],
+                          refresh: Optional[str] = None) -> BulkResult:
+        """Create many items, keyed by id"""
+
+    @abc.abstractmethod
+    async def bulk_update(self,
+                          index: str,
+                          items: Dict[str, Item],
+                          refresh: Optional[str] = None) -> BulkResult:
+        """Partially update many items, keyed by id"""
+
+    @abc.abstractmethod
+    async def bulk_delete(self,
+                          index: str,
+                          item_ids: List[str],
+                          refresh: Optional[str] = None) -> BulkResult:
+        """Delete many items"""
+
+
+def project_item(item: Item,
+                 includes: Optional[List[str]] = None,
+                 excludes: Optional[List[str]] = None) -> Item:
+    """Restrict an item to some of its fields, like _source filtering"""
+    return {
+        field: value
+        for field, value in item.items()
+        if (not includes or field in includes)
+        and (not excludes or field not in excludes)
+    }
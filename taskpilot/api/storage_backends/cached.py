@@ -0,0 +1,299 @@
+"""Storage backend caching the items of another backend"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from taskpilot.api import entity_cache
+from taskpilot.api.entity_cache import EntityCache
+from taskpilot.api.entity_loader import EntityLoader
+from taskpilot.api.storage_backends.base import (
+    Aggregations, BulkResult, Filter, Item, Progress, Ref, StorageBackend,
+    Version, project_item)
+from taskpilot.common import config_info
+
+
+logger = config_info.get_logger()
+
+
+class CachedBackend(StorageBackend):
+    """
+    Storage wrapping another backend with a read-through cache of the items
+    of some indexes, shared by the requests of the worker, and with the
+    identity map of the request being served, remembering the items of all
+    the indexes loaded by that request. The items missing from both are
+    fetched in batches gathering the concurrent lookups. Writes made through
+    it invalidate the items they touch, while writes made by other workers
+    show once the cached items expire
+    """
+
+    def __init__(self,
+                 backend: StorageBackend,
+                 indexes: List[str],
+                 cache: EntityCache) -> None:
+        self._backend = backend
+        self._indexes = set(indexes)
+        self._cache = cache
+        self._loader = EntityLoader(backend.get_items_from_indexes)
+
+    def get_cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Get the counters of the cache"""
+        return self._cache.get_stats()
+
+    def _get_cached(self, ref: Ref) -> Optional[Item]:
+        """Get an item loaded by this request or cached by the worker"""
+        request_items = entity_cache.get_request_items()
+        item = request_items.get(*ref) if request_items else None
+        if item is None and ref[0] in self._indexes:
+            item = self._cache.get(*ref)
+            if item is not None and request_items is not None:
+                request_items.put(*ref, item)
+        return item
+
+    def _put_cached(self, ref: Ref, item: Item, generation: int) -> None:
+        """Remember an item read from the wrapped backend"""
+        request_items = entity_cache.get_request_items()
+        if request_items is not None:
+            request_items.put(*ref, item)
+        if ref[0] in self._indexes:
+            self._cache.put(*ref, item, generation)
+
+    def _invalidate(self, index: str, item_ids: Iterable[str]) -> None:
+        """Drop the cached items a write touched"""
+        request_items = entity_cache.get_request_items()
+        for item_id in item_ids:
+            if request_items is not None:
+                request_items.forget(index, item_id)
+            if index in self._indexes:
+                self._cache.invalidate(index, item_id)
+
+    def _invalidate_index(self, index: str) -> None:
+        """Drop the cached items of an index a write by query touched"""
+        request_items = entity_cache.get_request_items()
+        if request_items is not None:
+            request_items.forget_index(index)
+        if index in self._indexes:
+            self._cache.invalidate_index(index)
+
+    async def open(self) -> None:
+        await self._backend.open()
+
+    async def close(self) -> None:
+        await self._backend.close()
+
+    async def get_item(self,
+                       index: str,
+                       item_id: str,
+                       includes: Optional[List[str]] = None,
+                       excludes: Optional[List[str]] = None) -> Item:
+        item = self._get_cached((index, item_id))
+        if item is None:
+            generation = self._cache.generation
+            item = await self._loader.load(index, item_id)
+            if item:
+                self._put_cached((index, item_id), item, generation)
+        return project_item(item, includes, excludes)
+
+    async def get_versioned_item(
+            self,
+            index: str,
+            item_id: str
+    ) -> Tuple[Item, Optional[Version]]:
+        return await self._backend.get_versioned_item(index, item_id)
+
+    async def get_items_from_indexes(
+            self,
+            refs: List[Ref],
+            includes: Optional[List[str]] = None,
+            excludes: Optional[List[str]] = None
+    ) -> Tuple[Dict[Ref, Item], List[Ref]]:
+        refs = list(dict.fromkeys(refs))
+        cached = {}
+        for ref in refs:
+            item = self._get_cached(ref)
+            if item is not None:
+                cached[ref] = item
+        generation = self._cache.generation
+        fetched, missing = await self._backend.get_items_from_indexes(
+            [ref for ref in refs if ref not in cached])
+        for ref, item in fetched.items():
+            self._put_cached(ref, item, generation)
+        found = {**cached, **fetched}
+        return {
+            ref: project_item(found[ref], includes, excludes)
+            for ref in refs
+            if ref in found
+        }, missing
+
+    async def item_exists(self, index: str, item_id: str) -> bool:
+        return await self._backend.item_exists(index, item_id)
+
+    async def items_exist(self,
+                          refs: List[Ref]) -> Tuple[List[Ref], List[Ref]]:
+        return await self._backend.items_exist(refs)
+
+    async def search_items(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            sort_by: Optional[str] = None,
+            sort_order: Optional[str] = None,
+            includes: Optional[List[str]] = None,
+            excludes: Optional[List[str]] = None,
+            filters: Optional[List[Filter]] = None
+    ) -> Optional[Dict[str, Item]]:
+        return await self._backend.search_items(
+            index, query_dict, sort_by, sort_order, includes, excludes,
+            filters)
+
+    async def search_page(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            limit: int,
+            cursor: Optional[str] = None,
+            sort_by: Optional[str] = None,
+            sort_order: Optional[str] = None,
+            includes: Optional[List[str]] = None,
+            excludes: Optional[List[str]] = None,
+            filters: Optional[List[Filter]] = None
+    ) -> Optional[Tuple[Dict[str, Item], Optional[str]]]:
+        return await self._backend.search_page(
+            index, query_dict, limit, cursor, sort_by, sort_order, includes,
+            excludes, filters)
+
+    async def count_items(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            filters: Optional[List[Filter]] = None) -> Optional[int]:
+        return await self._backend.count_items(index, query_dict, filters)
+
+    async def aggregate(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            aggs: Dict[str, Dict[str, Any]],
+            filters: Optional[List[Filter]] = None
+    ) -> Optional[Aggregations]:
+        return await self._backend.aggregate(index, query_dict, aggs, filters)
+
+    async def create_item(self,
+                          index: str,
+                          item: Item,
+                          item_id: Optional[str] = None,
+                          refresh: Optional[str] = None) -> Optional[str]:
+        try:
+            return await self._backend.create_item(
+                index, item, item_id, refresh)
+        finally:
+            if item_id is not None:
+                self._invalidate(index, [item_id])
+
+    async def update_item(self,
+                          index: str,
+                          item_id: str,
+                          item: Item,
+                          version: Optional[Version] = None,
+                          refresh: Optional[str] = None) -> bool:
+        try:
+            return await self._backend.update_item(
+                index, item_id, item, version, refresh)
+        finally:
+            self._invalidate(index, [item_id])
+
+    async def increment_counter(self,
+                                index: str,
+                                item_id: str,
+                                field: str) -> Optional[int]:
+        try:
+            return await self._backend.increment_counter(
+                index, item_id, field)
+        finally:
+            self._invalidate(index, [item_id])
+
+    async def add_to_set(self,
+                         index: str,
+                         item_id: str,
+                         field: str,
+                         value: Any,
+                         refresh: Optional[str] = None) -> bool:
+        try:
+            return await self._backend.add_to_set(
+                index, item_id, field, value, refresh)
+        finally:
+            self._invalidate(index, [item_id])
+
+    async def remove_from_set(self,
+                              index: str,
+                              item_id: str,
+                              field: str,
+                              value: Any,
+                              refresh: Optional[str] = None) -> bool:
+        try:
+            return await self._backend.remove_from_set(
+                index, item_id, field, value, refresh)
+        finally:
+            self._invalidate(index, [item_id])
+
+    async def delete_item(self,
+                          index: str,
+                          item_id: str,
+                          refresh: Optional[str] = None) -> bool:
+        try:
+            return await self._backend.delete_item(index, item_id, refresh)
+        finally:
+            self._invalidate(index, [item_id])
+
+    async def delete_by_query(
+            self,
+            index: str,
+            field: str,
+            values: List[Any],
+            progress: Optional[Progress] = None,
+            refresh: Optional[str] = None
+    ) -> Optional[Dict[str, int]]:
+        try:
+            return await self._backend.delete_by_query(
+                index, field, values, progress, refresh)
+        finally:
+            self._invalidate_index(index)
+
+    async def update_by_query(
+            self,
+            index: str,
+            field: str,
+            values: List[Any],
+            item: Item,
+            progress: Optional[Progress] = None,
+            refresh: Optional[str] = None
+    ) -> Optional[Dict[str, int]]:
+        try:
+            return await self._backend.update_by_query(
+                index, field, values, item, progress, refresh)
+        finally:
+            self._invalidate_index(index)
+
+    async def bulk_create(self,
+                          index: str,
+                          items: Dict[str, Item],
+                          refresh: Optional[str] = None) -> BulkResult:
+        try:
+            return await self._backend.bulk_create(index, items, refresh)
+        finally:
+            self._invalidate(index, items)
+
+    async def bulk_update(self,
+                          index: str,
+                          items: Dict[str, Item],
+                          refresh: Optional[str] = None) -> BulkResult:
+        try:
+            return await self._backend.bulk_update(index, items, refresh)
+        finally:
+            self._invalidate(index, items)
+
+    async def bulk_delete(self,
+                          index: str,
+                          item_ids: List[str],
+                          refresh: Optional[str] = None) -> BulkResult:
+        try:
+            return await self._backend.bulk_delete(index, item_ids, refresh)
+        finally:
+            self._invalidate(index, item_ids)
@@ -0,0 +1,198 @@
+"""Storage backend keeping the data in the Elasticsearch cluster"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from taskpilot.api import async_db_operations as adb
+from taskpilot.api import db_operations as db
+from taskpilot.api.storage_backends.base import (
+    Aggregations, BulkResult, Filter, Item, Progress, Ref, StorageBackend,
+    Version)
+from taskpilot.common import config_info
+
+
+logger = config_info.get_logger()
+
+
+class ElasticsearchBackend(StorageBackend):
+    """Storage backed by the Elasticsearch cluster"""
+
+    async def open(self) -> None:
+        adb.init_connection()
+        await adb.wait_for_database()
+        if not await adb.ensure_indexes():
+            raise RuntimeError(
+                "Failed to bring the indexes to the current mappings version,"
+                " refusing to serve queries that would miss documents"
+            )
+
+    async def close(self) -> None:
+        await adb.close_connection()
+
+    async def get_item(self,
+                       index: str,
+                       item_id: str,
+                       includes: Optional[List[str]] = None,
+                       excludes: Optional[List[str]] = None) -> Item:
+        return await adb.get_item(index, item_id, includes, excludes)
+
+    async def get_versioned_item(
+            self,
+            index: str,
+            item_id: str
+    ) -> Tuple[Item, Optional[Version]]:
+        return await adb.get_versioned_item(index, item_id)
+
+    async def get_items_from_indexes(
+            self,
+            refs: List[Ref],
+            includes: Optional[List[str]] = None,
+            excludes: Optional[List[str]] = None
+    ) -> Tuple[Dict[Ref, Item], List[Ref]]:
+        return await adb.get_items_from_indexes(refs, includes, excludes)
+
+    async def item_exists(self, index: str, item_id: str) -> bool:
+        return await adb.item_exists(index, item_id)
+
+    async def items_exist(self,
+                          refs: List[Ref]) -> Tuple[List[Ref], List[Ref]]:
+        return await adb.items_exist(refs)
+
+    async def search_items(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            sort_by: Optional[str] = None,
+            sort_order: Optional[str] = None,
+            includes: Optional[List[str]] = None,
+            excludes: Optional[List[str]] = None,
+            filters: Optional[List[Filter]] = None
+    ) -> Optional[Dict[str, Item]]:
+        try:
+            sort = db.build_sort(index, sort_by, sort_order)
+        except ValueError as exception:
+            logger.error(f"Failed to sort index {index}: {exception}")
+            return None
+        return await adb.search_items(
+            index, query_dict, sort, includes, excludes, filters)
+
+    async def search_page(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            limit: int,
+            cursor: Optional[str] = None,
+            sort_by: Optional[str] = None,
+            sort_order: Optional[str] = None,
+            includes: Optional[List[str]] = None,
+            excludes: Optional[List[str]] = None,
+            filters: Optional[List[Filter]] = None
+    ) -> Optional[Tuple[Dict[str, Item], Optional[str]]]:
+        try:
+            sort = db.build_sort(index, sort_by, sort_order)
+        except ValueError as exception:
+            logger.error(f"Failed to sort index {index}: {exception}")
+            return None
+        return await adb.search_page(
+            index, query_dict, limit, cursor, sort, includes, excludes,
+            filters)
+
+    async def count_items(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            filters: Optional[List[Filter]] = None) -> Optional[int]:
+        return await adb.count_items(index, query_dict, filters)
+
+    async def aggregate(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            aggs: Dict[str, Dict[str, Any]],
+            filters: Optional[List[Filter]] = None
+    ) -> Optional[Aggregations]:
+        return await adb.aggregate(index, query_dict, aggs, filters)
+
+    async def create_item(self,
+                          index: str,
+                          item: Item,
+                          item_id: Optional[str] = None,
+                          refresh: Optional[str] = None) -> Optional[str]:
+        return await adb.create_item(index, item, item_id, refresh)
+
+    async def update_item(self,
+                          index: str,
+                          item_id: str,
+                          item: Item,
+                          version: Optional[Version] = None,
+                          refresh: Optional[str] = None) -> bool:
+        return await adb.update_item(
+            index, item_id, item, version, refresh)
+
+    async def increment_counter(self,
+                                index: str,
+                                item_id: str,
+                                field: str) -> Optional[int]:
+        return await adb.increment_counter(index, item_id, field)
+
+    async def add_to_set(self,
+                         index: str,
+                         item_id: str,
+                         field: str,
+                         value: Any,
+                         refresh: Optional[str] = None) -> bool:
+        return await adb.add_to_set(index, item_id, field, value, refresh)
+
+    async def remove_from_set(self,
+                              index: str,
+                              item_id: str,
+                              field: str,
+                              value: Any,
+                              refresh: Optional[str] = None) -> bool:
+        return await adb.remove_from_set(
+            index, item_id, field, value, refresh)
+
+    async def delete_item(self,
+                          index: str,
+                          item_id: str,
+                          refresh: Optional[str] = None) -> bool:
+        return await adb.delete_item(index, item_id, refresh)
+
+    async def delete_by_query(
+            self,
+            index: str,
+            field: str,
+            values: List[Any],
+            progress: Optional[Progress] = None,
+            refresh: Optional[str] = None
+    ) -> Optional[Dict[str, int]]:
+        return await adb.delete_by_query(
+            index, field, values, progress, refresh)
+
+    async def update_by_query(
+            self,
+            index: str,
+            field: str,
+            values: List[Any],
+            item: Item,
+            progress: Optional[Progress] = None,
+            refresh: Optional[str] = None
+    ) -> Optional[Dict[str, int]]:
+        return await adb.update_by_query(
+            index, field, values, item, progress, refresh)
+
+    async def bulk_create(self,
+                          index: str,
+                          items: Dict[str, Item],
+                          refresh: Optional[str] = None) -> BulkResult:
+        return await adb.bulk_create(index, items, refresh)
+
+    async def bulk_update(self,
+                          index: str,
+                          items: Dict[str, Item],
+                          refresh: Optional[str] = None) -> BulkResult:
+        return await adb.bulk_update(index, items, refresh)
+
+    async def bulk_delete(self,
+                          index: str,
+                          item_ids: List[str],
+                          refresh: Optional[str] = None) -> BulkResult:
+        return await adb.bulk_delete(index, item_ids, refresh)
@@ -0,0 +1,585 @@
+"""Storage backend keeping the data in dicts, with the evaluation of the
+queries on the items it holds"""
+import copy
+import datetime
+import operator
+import re
+import uuid
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from taskpilot.api import db_mappings
+from taskpilot.api import db_operations as db
+from taskpilot.api.storage_backends.base import (
+    Aggregations, BulkResult, Filter, Item, Progress, Ref, StorageBackend,
+    Version, project_item)
+from taskpilot.common import config_info
+
+
+logger = config_info.get_logger()
+
+
+def _tokenize(text: Any) -> List[str]:
+    """Split a text into lowercase words, like the text analyzer does"""
+    return re.findall(r"\w+", str(text or "").lower())
+
+
+def matches_query(index: str,
+                  item: Item,
+                  query_dict: Dict[str, Any],
+                  filters: Optional[List[Filter]] = None) -> bool:
+    """
+    Check an item against a query the way build_query does: analyzed text
+    fields have to contain all the words of the value, other fields have to
+    contain the value or, for list values, every element of it, and all the
+    filters have to match
+    """
+    if not all(_matches_filter(index, item, filter_)
+               for filter_ in filters or []):
+        return False
+    text_fields = db_mappings.get_text_fields(index)
+    for field, value in query_dict.items():
+        item_value = item.get(field)
+        if field in text_fields:
+            if not set(_tokenize(value)) <= set(_tokenize(item_value)):
+                return False
+            continue
+        item_values = (
+            item_value if isinstance(item_value, list) else [item_value]
+        )
+        values = value if isinstance(value, list) else [value]
+        if any(element not in item_values for element in values):
+            return False
+    return True
+
+
+RANGE_OPERATORS = {
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le
+}
+
+
+def _range_value(index: str, field: str, value: Any) -> Any:
+    """Get the value a range compares, parsing dates like Elasticsearch"""
+    properties = db_mappings.get_index_mappings(index)["properties"]
+    if properties[field]["type"] == "date":
+        return datetime.datetime.strptime(value, config_info.DATETIME_FORMAT)
+    return value
+
+
+def _matches_filter(index: str, item: Item, filter_: Filter) -> bool:
+    """
+    Check an item against a filter built by the db_operations builders the
+    way Elasticsearch does, matching list fields on any of their elements
+    """
+    (kind, clause), = filter_.items()
+    if kind == "bool":
+        return (
+            all(_matches_filter(index, item, inner)
+                for inner in clause.get("filter", []))
+            and not any(_matches_filter(index, item, inner)
+                        for inner in clause.get("must_not", []))
+            and (not clause.get("should")
+                 or any(_matches_filter(index, item, inner)
+                        for inner in clause["should"]))
+        )
+    field = clause["field"] if kind == "exists" else next(iter(clause))
+    item_value = item.get(field)
+    item_values = [
+        element
+        for element in (
+            item_value if isinstance(item_value, list) else [item_value]
+        )
+        if element is not None
+    ]
+    if kind == "exists":
+        return bool(item_values)
+    value = clause[field]
+    if kind == "term":
+        return value in item_values
+    if kind == "terms":
+        return any(element in value for element in item_values)
+    if kind == "prefix":
+        return any(str(element).startswith(value) for element in item_values)
+    if kind == "range":
+        return any(
+            all(RANGE_OPERATORS[bound](_range_value(index, field, element),
+                                       _range_value(index, field, limit))
+                for bound, limit in value.items())
+            for element in item_values
+        )
+    raise ValueError(f"unknown filter {kind}")
+
+
+def _histogram_key(value: str, interval: str) -> str:
+    """Get the key of the histogram bucket a date falls in"""
+    year, month, day = value[6:10], value[3:5], value[0:2]
+    return {
+        "year": year,
+        "month": f"{year}-{month}",
+        "day": f"{year}-{month}-{day}"
+    }[interval]
+
+
+def aggregate_items(index: str,
+                    items: List[Item],
+                    aggregation: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Count items in the buckets of an aggregation built by the db_operations
+    aggregation builders, ordering the buckets the way Elasticsearch does
+    """
+    (kind, body), = aggregation.items()
+    if kind == "filters":
+        return {
+            key: sum(1 for item in items
+                     if _matches_filter(index, item, filter_))
+            for key, filter_ in body["filters"].items()
+        }
+    counts: Dict[str, int] = {}
+    for item in items:
+        item_value = item.get(body["field"])
+        keys = {
+            str(element)
+            for element in (
+                item_value if isinstance(item_value, list) else [item_value]
+            )
+            if element is not None
+        }
+        if kind == "date_histogram":
+            keys = {
+                _histogram_key(key, body["calendar_interval"]) for key in keys
+            }
+        elif kind != "terms":
+            raise ValueError(f"unknown aggregation {kind}")
+        for key in keys:
+            counts[key] = counts.get(key, 0) + 1
+    if kind == "date_histogram":
+        return dict(sorted(counts.items()))
+    buckets = sorted(counts.items(),
+                     key=lambda bucket: (-bucket[1], bucket[0]))
+    return dict(buckets[:body["size"]])
+
+
+def _has_any_value(item: Item, field: str, values: List[Any]) -> bool:
+    """Check if a field of an item has one of the given values"""
+    item_value = item.get(field)
+    item_values = (
+        item_value if isinstance(item_value, list) else [item_value]
+    )
+    return any(element in values for element in item_values)
+
+
+def sortable_date(value: str) -> str:
+    """Reorder a date into a string sorting like the date itself"""
+    return value[6:10] + value[3:5] + value[0:2] + value[11:]
+
+
+def _sort_items(index: str,
+                items: List[Tuple[str, Item]],
+                sort_by: Optional[str] = None,
+                sort_order: Optional[str] = None) -> List[Tuple[str, Item]]:
+    """
+    Sort (id, item) pairs on a field, breaking ties by id and putting the
+    items missing the field last, like the Elasticsearch sort does
+    """
+    sort_by, sort_order = db_mappings.resolve_sort(index, sort_by, sort_order)
+    properties = db_mappings.get_index_mappings(index)["properties"]
+
+    def sort_key(pair: Tuple[str, Item]) -> Any:
+        value = pair[1][sort_by]
+        if properties[sort_by]["type"] == "date":
+            return datetime.datetime.strptime(
+                value, config_info.DATETIME_FORMAT)
+        return value
+
+    items = sorted(items, key=lambda pair: pair[0])
+    present = [pair for pair in items if pair[1].get(sort_by) is not None]
+    missing = [pair for pair in items if pair[1].get(sort_by) is None]
+    present.sort(key=sort_key, reverse=sort_order == "desc")
+    return present + missing
+
+
+def _slice_page(pairs: List[Tuple[str, Item]],
+                limit: int,
+                cursor: Optional[str] = None
+                ) -> Tuple[List[Tuple[str, Item]], Optional[str]]:
+    """Get the page of sorted pairs following a cursor holding an offset"""
+    offset = db.decode_cursor(cursor)[0] if cursor else 0
+    page = pairs[offset:offset + limit]
+    next_offset = offset + limit
+    next_cursor = (
+        db.encode_cursor([next_offset]) if next_offset < len(pairs) else None
+    )
+    return page, next_cursor
+
+
+class InMemoryBackend(StorageBackend):
+    """
+    Storage keeping every index in a dict, for tests, benchmarks and
+    throwaway installs
+    """
+
+    def __init__(self) -> None:
+        self._indexes: Dict[str, Dict[str, Item]] = {
+            index: {} for index in config_info.DB_INDEXES.values()
+        }
+        self._seq_nos: Dict[str, Dict[str, int]] = {
+            index: {} for index in config_info.DB_INDEXES.values()
+        }
+
+    def _find(self,
+              index: str,
+              query_dict: Dict[str, Any],
+              sort_by: Optional[str] = None,
+              sort_order: Optional[str] = None,
+              filters: Optional[List[Filter]] = None
+              ) -> List[Tuple[str, Item]]:
+        """Get the sorted (id, item) pairs matching a query and the filters"""
+        pairs = [
+            (item_id, item)
+            for item_id, item in self._indexes[index].items()
+            if matches_query(index, item, query_dict, filters)
+        ]
+        return _sort_items(index, pairs, sort_by, sort_order)
+
+    async def get_item(self,
+                       index: str,
+                       item_id: str,
+                       includes: Optional[List[str]] = None,
+                       excludes: Optional[List[str]] = None) -> Item:
+        item = self._indexes[index].get(item_id)
+        if item is None:
+            logger.error(
+                f"Failed to retrieve item with id {item_id} from index"
+                f" {index}: not found"
+            )
+            return {}
+        return copy.deepcopy(project_item(item, includes, excludes))
+
+    async def get_versioned_item(
+            self,
+            index: str,
+            item_id: str
+    ) -> Tuple[Item, Optional[Version]]:
+        item = await self.get_item(index, item_id)
+        if not item:
+            return {}, None
+        return item, {
+            "if_seq_no": self._seq_nos[index][item_id],
+            "if_primary_term": 1
+        }
+
+    async def get_items_from_indexes(
+            self,
+            refs: List[Ref],
+            includes: Optional[List[str]] = None,
+            excludes: Optional[List[str]] = None
+    ) -> Tuple[Dict[Ref, Item], List[Ref]]:
+        found = {}
+        missing = []
+        for index, item_id in dict.fromkeys(refs):
+            item = self._indexes[index].get(item_id)
+            if item is None:
+                missing.append((index, item_id))
+            else:
+                found[(index, item_id)] = copy.deepcopy(
+                    project_item(item, includes, excludes))
+        return found, missing
+
+    async def item_exists(self, index: str, item_id: str) -> bool:
+        return item_id in self._indexes[index]
+
+    async def items_exist(self,
+                          refs: List[Ref]) -> Tuple[List[Ref], List[Ref]]:
+        refs = list(dict.fromkeys(refs))
+        found = [ref for ref in refs if ref[1] in self._indexes[ref[0]]]
+        missing = [ref for ref in refs if ref[1] not in self._indexes[ref[0]]]
+        return found, missing
+
+    async def search_items(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            sort_by: Optional[str] = None,
+            sort_order: Optional[str] = None,
+            includes: Optional[List[str]] = None,
+            excludes: Optional[List[str]] = None,
+            filters: Optional[List[Filter]] = None
+    ) -> Optional[Dict[str, Item]]:
+        try:
+            pairs = self._find(
+                index, query_dict, sort_by, sort_order, filters)
+        except Exception as exception:
+            logger.error(
+                f"Failed to retrieve items from index {index} that satisfy"
+                f" the query {query_dict}: {exception}"
+            )
+            return None
+        return {
+            item_id: copy.deepcopy(project_item(item, includes, excludes))
+            for item_id, item in pairs
+        }
+
+    async def search_page(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            limit: int,
+            cursor: Optional[str] = None,
+            sort_by: Optional[str] = None,
+            sort_order: Optional[str] = None,
+            includes: Optional[List[str]] = None,
+            excludes: Optional[List[str]] = None,
+            filters: Optional[List[Filter]] = None
+    ) -> Optional[Tuple[Dict[str, Item], Optional[str]]]:
+        try:
+            pairs = self._find(
+                index, query_dict, sort_by, sort_order, filters)
+            page, next_cursor = _slice_page(pairs, limit, cursor)
+        except Exception as exception:
+            logger.error(
+                f"Failed to retrieve a page of items from index {index} that"
+                f" satisfy the query {query_dict}: {exception}"
+            )
+            return None
+        items_dict = {
+            item_id: copy.deepcopy(project_item(item, includes, excludes))
+            for item_id, item in page
+        }
+        return items_dict, next_cursor
+
+    async def count_items(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            filters: Optional[List[Filter]] = None) -> Optional[int]:
+        return sum(
+            1 for item in self._indexes[index].values()
+            if matches_query(index, item, query_dict, filters)
+        )
+
+    async def aggregate(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            aggs: Dict[str, Dict[str, Any]],
+            filters: Optional[List[Filter]] = None
+    ) -> Optional[Aggregations]:
+        items = [
+            item for item in self._indexes[index].values()
+            if matches_query(index, item, query_dict, filters)
+        ]
+        try:
+            return {
+                name: aggregate_items(index, items, aggregation)
+                for name, aggregation in aggs.items()
+            }
+        except Exception as exception:
+            logger.error(
+                f"Failed to aggregate items from index {index} that satisfy"
+                f" the query {query_dict}: {exception}"
+            )
+            return None
+
+    async def create_item(self,
+                          index: str,
+                          item: Item,
+                          item_id: Optional[str] = None,
+                          refresh: Optional[str] = None) -> Optional[str]:
+        if not item_id:
+            item_id = str(uuid.uuid4())
+        if item_id in self._indexes[index]:
+            logger.error(
+                f"Failed to create item with id {item_id} in index {index}:"
+                f" already exists"
+            )
+            return None
+        self._indexes[index][item_id] = copy.deepcopy(item)
+        self._seq_nos[index][item_id] = 0
+        logger.info(f"Created item with id {item_id} in index {index}")
+        return item_id
+
+    async def update_item(self,
+                          index: str,
+                          item_id: str,
+                          item: Item,
+                          version: Optional[Version] = None,
+                          refresh: Optional[str] = None) -> bool:
+        if item_id not in self._indexes[index]:
+            logger.error(
+                f"Failed to update item {item_id} in index {index}: not found"
+            )
+            return False
+        seq_no = self._seq_nos[index][item_id]
+        if version is not None and version["if_seq_no"] != seq_no:
+            raise db.VersionConflictError(
+                f"Item {item_id} in index {index} changed since version"
+                f" {version}"
+            )
+        self._indexes[index][item_id].update(copy.deepcopy(item))
+        self._seq_nos[index][item_id] = seq_no + 1
+        logger.info(f"Updated item {item_id} in index {index}")
+        return True
+
+    async def increment_counter(self,
+                                index: str,
+                                item_id: str,
+                                field: str) -> Optional[int]:
+        item = self._indexes[index].get(item_id)
+        if item is None:
+            logger.error(
+                f"Failed to increment {field} of item {item_id} in index"
+                f" {index}: not found"
+            )
+            return None
+        value = item.get(field) or 0
+        item[field] = value + 1
+        self._seq_nos[index][item_id] += 1
+        logger.info(f"Allocated {field} {value} of item {item_id} in index"
+                    f" {index}")
+        return value
+
+    def _update_set(self,
+                    index: str,
+                    item_id: str,
+                    field: str,
+                    value: Any,
+                    add: bool) -> bool:
+        """Add or remove a value of a set field of an item in place"""
+        item = self._indexes[index].get(item_id)
+        if item is None:
+            logger.error(
+                f"Failed to update {field} of item {item_id} in index"
+                f" {index}: not found"
+            )
+            return False
+        values = item.get(field) or []
+        if add and value not in values:
+            item[field] = values + [value]
+        elif not add and value in values:
+            item[field] = [element for element in values if element != value]
+        else:
+            return True
+        self._seq_nos[index][item_id] += 1
+        logger.info(f"Updated {field} of item {item_id} in index {index}")
+        return True
+
+    async def add_to_set(self,
+                         index: str,
+                         item_id: str,
+                         field: str,
+                         value: Any,
+                         refresh: Optional[str] = None) -> bool:
+        return self._update_set(index, item_id, field, value, True)
+
+    async def remove_from_set(self,
+                              index: str,
+                              item_id: str,
+                              field: str,
+                              value: Any,
+                              refresh: Optional[str] = None) -> bool:
+        return self._update_set(index, item_id, field, value, False)
+
+    async def delete_item(self,
+                          index: str,
+                          item_id: str,
+                          refresh: Optional[str] = None) -> bool:
+        self._seq_nos[index].pop(item_id, None)
+        if self._indexes[index].pop(item_id, None) is None:
+            logger.error(
+                f"Failed to delete item {item_id} from index {index}: not"
+                f" found"
+            )
+            return False
+        logger.info(f"Deleted item {item_id} from {index}")
+        return True
+
+    async def delete_by_query(
+            self,
+            index: str,
+            field: str,
+            values: List[Any],
+            progress: Optional[Progress] = None,
+            refresh: Optional[str] = None
+    ) -> Optional[Dict[str, int]]:
+        item_ids = [
+            item_id
+            for item_id, item in self._indexes[index].items()
+            if _has_any_value(item, field, values)
+        ]
+        for item_id in item_ids:
+            del self._indexes[index][item_id]
+            del self._seq_nos[index][item_id]
+        task_status = db.get_empty_task_status()
+        task_status["total"] = task_status["deleted"] = len(item_ids)
+        if progress is not None:
+            progress(task_status)
+        logger.info(f"Deleted items from index {index} by {field}:"
+                    f" {task_status}")
+        return task_status
+
+    async def update_by_query(
+            self,
+            index: str,
+            field: str,
+            values: List[Any],
+            item: Item,
+            progress: Optional[Progress] = None,
+            refresh: Optional[str] = None
+    ) -> Optional[Dict[str, int]]:
+        item_ids = [
+            item_id
+            for item_id, existing in self._indexes[index].items()
+            if _has_any_value(existing, field, values)
+        ]
+        for item_id in item_ids:
+            self._indexes[index][item_id].update(copy.deepcopy(item))
+            self._seq_nos[index][item_id] += 1
+        task_status = db.get_empty_task_status()
+        task_status["total"] = task_status["updated"] = len(item_ids)
+        if progress is not None:
+            progress(task_status)
+        logger.info(f"Updated items in index {index} by {field}:"
+                    f" {task_status}")
+        return task_status
+
+    async def bulk_create(self,
+                          index: str,
+                          items: Dict[str, Item],
+                          refresh: Optional[str] = None) -> BulkResult:
+        succeeded = []
+        failed = {}
+        for item_id, item in items.items():
+            if await self.create_item(index, item, item_id):
+                succeeded.append(item_id)
+            else:
+                failed[item_id] = "version_conflict_engine_exception"
+        return succeeded, failed
+
+    async def bulk_update(self,
+                          index: str,
+                          items: Dict[str, Item],
+                          refresh: Optional[str] = None) -> BulkResult:
+        succeeded = []
+        failed = {}
+        for item_id, item in items.items():
+            if await self.update_item(index, item_id, item):
+                succeeded.append(item_id)
+            else:
+                failed[item_id] = "document_missing_exception"
+        return succeeded, failed
+
+    async def bulk_delete(self,
+                          index: str,
+                          item_ids: List[str],
+                          refresh: Optional[str] = None) -> BulkResult:
+        succeeded = []
+        failed = {}
+        for item_id in item_ids:
+            if await self.delete_item(index, item_id):
+                succeeded.append(item_id)
+            else:
+                failed[item_id] = "404"
+        return succeeded, failed
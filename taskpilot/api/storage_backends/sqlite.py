@@ -0,0 +1,816 @@
+"""Storage backend keeping the data in a SQLite database"""
+import asyncio
+import json
+import sqlite3
+import threading
+import uuid
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from taskpilot.api import db_mappings
+from taskpilot.api import db_operations as db
+from taskpilot.api.storage_backends import memory
+from taskpilot.api.storage_backends import sqlite_queries as queries
+from taskpilot.api.storage_backends.base import (
+    Aggregations, BulkResult, Filter, Item, Progress, Ref, StorageBackend,
+    Version, project_item)
+from taskpilot.common import config_info
+
+
+logger = config_info.get_logger()
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Storage keeping every index in a SQLite table of JSON documents, with
+    expression indexes on the fields the API filters on, for single-node
+    installs
+    """
+
+    MAX_VARIABLES = 500
+
+    def __init__(self, path: str = config_info.DB_SQLITE_PATH) -> None:
+        self._path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    async def _run(self, function: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking database call in a worker thread"""
+        def locked() -> Any:
+            with self._lock:
+                return function(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, locked)
+
+    def _open(self) -> None:
+        """Open the database and create the missing tables and indexes"""
+        self._conn = sqlite3.connect(self._path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            for index in config_info.DB_INDEXES.values():
+                self._conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{index}"'
+                    f" (id TEXT PRIMARY KEY, doc TEXT NOT NULL,"
+                    f" seq_no INTEGER NOT NULL DEFAULT 0)"
+                )
+                columns = [
+                    row[1] for row in self._conn.execute(
+                        f'PRAGMA table_info("{index}")')
+                ]
+                if "seq_no" not in columns:
+                    self._conn.execute(
+                        f'ALTER TABLE "{index}"'
+                        f" ADD COLUMN seq_no INTEGER NOT NULL DEFAULT 0"
+                    )
+                properties = db_mappings.get_index_mappings(index)[
+                    "properties"]
+                array_fields = db_mappings.ARRAY_FIELDS.get(
+                    db_mappings.get_entity(index), [])
+                for field, mapping in properties.items():
+                    if (mapping["type"] == "text"
+                            or not mapping.get("index", True)
+                            or field in array_fields):
+                        continue
+                    self._conn.execute(
+                        f'CREATE INDEX IF NOT EXISTS "{index}_{field}"'
+                        f' ON "{index}" ({queries.field_sql(field)})'
+                    )
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < db_mappings.MAPPINGS_VERSION:
+                self._backfill_ticket_paths()
+                self._conn.execute(
+                    f"PRAGMA user_version = {db_mappings.MAPPINGS_VERSION}")
+        logger.info(f"Opened SQLite database {self._path}")
+
+    def _backfill_ticket_paths(self) -> None:
+        """
+        Store the ancestors and the depth of every ticket, computed from the
+        parent tickets, for the tickets written before they were kept
+        """
+        index = config_info.DB_INDEXES[config_info.Entities.TICKET]
+        parents = dict(self._conn.execute(
+            f'SELECT id, {queries.field_sql("parent_ticket")} FROM "{index}"'
+        ).fetchall())
+        paths = db.build_ticket_paths(parents)
+        self._conn.executemany(
+            f'UPDATE "{index}" SET doc = json_set(doc, ?, json(?), ?, ?),'
+            f" seq_no = seq_no + 1 WHERE id = ?",
+            [
+                ("$.ancestors", json.dumps(path["ancestors"]), "$.depth",
+                 path["depth"], ticket_id)
+                for ticket_id, path in paths.items()
+            ]
+        )
+        logger.info(f"Backfilled the paths of {len(paths)} tickets")
+
+    def _close(self) -> None:
+        """Close the database"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _get(self, index: str, item_ids: List[str]) -> Dict[str, Item]:
+        """Get the documents with the given ids from a table"""
+        placeholders = ", ".join("?" for _ in item_ids)
+        rows = self._conn.execute(
+            f'SELECT id, doc FROM "{index}" WHERE id IN ({placeholders})',
+            item_ids
+        ).fetchall()
+        return {item_id: json.loads(doc) for item_id, doc in rows}
+
+    def _get_versioned(self,
+                       index: str,
+                       item_id: str) -> Optional[Tuple[Item, int]]:
+        """Get a document from a table along with its sequence number"""
+        row = self._conn.execute(
+            f'SELECT doc, seq_no FROM "{index}" WHERE id = ?', (item_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _get_ids(self, index: str, item_ids: List[str]) -> List[str]:
+        """Get which of the given ids are in a table"""
+        placeholders = ", ".join("?" for _ in item_ids)
+        rows = self._conn.execute(
+            f'SELECT id FROM "{index}" WHERE id IN ({placeholders})',
+            item_ids
+        ).fetchall()
+        return [item_id for item_id, in rows]
+
+    def _find(self,
+              index: str,
+              query_dict: Dict[str, Any],
+              sort_by: Optional[str] = None,
+              sort_order: Optional[str] = None,
+              limit: Optional[int] = None,
+              offset: int = 0,
+              filters: Optional[List[Filter]] = None
+              ) -> Tuple[List[Tuple[str, Item]], int]:
+        """
+        Get the sorted (id, item) pairs matching a query and the filters,
+        from offset up to limit if given, along with the number of matching
+        items
+        """
+        where, params, text_query = queries.where_sql(
+            index, query_dict, filters)
+        order = queries.sort_sql(index, sort_by, sort_order)
+        if text_query or limit is None:
+            rows = self._conn.execute(
+                f'SELECT id, doc FROM "{index}" {where} {order}', params
+            ).fetchall()
+            pairs = [
+                (item_id, json.loads(doc))
+                for item_id, doc in rows
+            ]
+            pairs = [
+                (item_id, item) for item_id, item in pairs
+                if memory.matches_query(index, item, text_query)
+            ]
+            if limit is None:
+                return pairs[offset:], len(pairs)
+            return pairs[offset:offset + limit], len(pairs)
+        total = self._conn.execute(
+            f'SELECT COUNT(*) FROM "{index}" {where}', params
+        ).fetchone()[0]
+        rows = self._conn.execute(
+            f'SELECT id, doc FROM "{index}" {where} {order}'
+            f" LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+        return [(item_id, json.loads(doc)) for item_id, doc in rows], total
+
+    def _aggregate_sql(self,
+                       index: str,
+                       where: str,
+                       params: List[Any],
+                       aggregation: Dict[str, Any]) -> Dict[str, int]:
+        """
+        Count the rows selected by a WHERE clause in the buckets of an
+        aggregation, ordering the buckets the way Elasticsearch does
+        """
+        (kind, body), = aggregation.items()
+        if kind == "filters":
+            sums = []
+            sum_params = []
+            for filter_ in body["filters"].values():
+                condition, filter_params = queries.filter_sql(index, filter_)
+                sums.append(
+                    f"COALESCE(SUM(CASE WHEN {condition} THEN 1 ELSE 0 END),"
+                    f" 0)"
+                )
+                sum_params.extend(filter_params)
+            row = self._conn.execute(
+                f'SELECT {", ".join(sums)} FROM "{index}" AS item {where}',
+                sum_params + params
+            ).fetchone()
+            return dict(zip(body["filters"], row))
+        field = body["field"]
+        array_fields = db_mappings.ARRAY_FIELDS.get(
+            db_mappings.get_entity(index), [])
+        source = f'"{index}" AS item'
+        expression = queries.field_sql(field)
+        if field in array_fields:
+            source += f", json_each(item.doc, '$.{field}') AS element"
+            expression = "element.value"
+        where = f"{where} AND" if where else "WHERE"
+        where += f" {expression} IS NOT NULL"
+        if kind == "date_histogram":
+            key = queries.histogram_key_sql(
+                expression, body["calendar_interval"])
+            order, order_params = "ORDER BY 1", []
+        elif kind == "terms":
+            key = expression
+            order, order_params = "ORDER BY 2 DESC, 1 ASC LIMIT ?", [
+                body["size"]]
+        else:
+            raise ValueError(f"unknown aggregation {kind}")
+        rows = self._conn.execute(
+            f"SELECT {key}, COUNT(DISTINCT item.id) FROM {source} {where}"
+            f" GROUP BY 1 {order}",
+            params + order_params
+        ).fetchall()
+        return {str(bucket): count for bucket, count in rows}
+
+    def _aggregate(self,
+                   index: str,
+                   query_dict: Dict[str, Any],
+                   aggs: Dict[str, Dict[str, Any]],
+                   filters: Optional[List[Filter]] = None) -> Aggregations:
+        """
+        Count the rows matching a query and the filters in the buckets of the
+        aggregations, aggregating the fetched documents instead when the
+        query has text conditions
+        """
+        where, params, text_query = queries.where_sql(
+            index, query_dict, filters)
+        if text_query:
+            pairs, _ = self._find(
+                index, query_dict, None, None, None, 0, filters)
+            items = [item for _, item in pairs]
+            return {
+                name: memory.aggregate_items(index, items, aggregation)
+                for name, aggregation in aggs.items()
+            }
+        return {
+            name: self._aggregate_sql(index, where, params, aggregation)
+            for name, aggregation in aggs.items()
+        }
+
+    def _create(self, index: str, items: Dict[str, Item]) -> BulkResult:
+        """Insert documents into a table, skipping the existing ids"""
+        succeeded = []
+        failed = {}
+        with self._conn:
+            for item_id, item in items.items():
+                try:
+                    self._conn.execute(
+                        f'INSERT INTO "{index}" (id, doc) VALUES (?, ?)',
+                        (item_id, json.dumps(item))
+                    )
+                    succeeded.append(item_id)
+                except sqlite3.IntegrityError:
+                    failed[item_id] = "version_conflict_engine_exception"
+        return succeeded, failed
+
+    def _update(self, index: str, items: Dict[str, Item]) -> BulkResult:
+        """Merge partial documents into the documents of a table"""
+        succeeded = []
+        failed = {}
+        with self._conn:
+            existing = self._get(index, list(items))
+            for item_id, item in items.items():
+                if item_id not in existing:
+                    failed[item_id] = "document_missing_exception"
+                    continue
+                existing[item_id].update(item)
+                self._conn.execute(
+                    f'UPDATE "{index}" SET doc = ?, seq_no = seq_no + 1'
+                    f" WHERE id = ?",
+                    (json.dumps(existing[item_id]), item_id)
+                )
+                succeeded.append(item_id)
+        return succeeded, failed
+
+    def _update_versioned(self,
+                          index: str,
+                          item_id: str,
+                          item: Item,
+                          seq_no: int) -> Optional[bool]:
+        """
+        Merge a partial document into a document of a table if its sequence
+        number is still seq_no, returning None if the document is missing
+        """
+        with self._conn:
+            versioned = self._get_versioned(index, item_id)
+            if versioned is None:
+                return None
+            document, _ = versioned
+            document.update(item)
+            cursor = self._conn.execute(
+                f'UPDATE "{index}" SET doc = ?, seq_no = seq_no + 1'
+                f" WHERE id = ? AND seq_no = ?",
+                (json.dumps(document), item_id, seq_no)
+            )
+        return bool(cursor.rowcount)
+
+    def _increment(self,
+                   index: str,
+                   item_id: str,
+                   field: str) -> Optional[int]:
+        """
+        Increment a counter field of a document of a table, returning the
+        value it had before, or None if the document is missing
+        """
+        path = f"$.{field}"
+        with self._conn:
+            cursor = self._conn.execute(
+                f'UPDATE "{index}" SET doc = json_set(doc, ?,'
+                f" COALESCE(json_extract(doc, ?), 0) + 1),"
+                f" seq_no = seq_no + 1 WHERE id = ?",
+                (path, path, item_id)
+            )
+            if not cursor.rowcount:
+                return None
+            row = self._conn.execute(
+                f'SELECT json_extract(doc, ?) FROM "{index}" WHERE id = ?',
+                (path, item_id)
+            ).fetchone()
+        return row[0] - 1
+
+    def _update_set(self,
+                    index: str,
+                    item_id: str,
+                    field: str,
+                    value: Any,
+                    add: bool) -> Optional[bool]:
+        """
+        Add or remove a value of a set field of a document of a table,
+        returning whether it changed, or None if the document is missing
+        """
+        with self._conn:
+            versioned = self._get_versioned(index, item_id)
+            if versioned is None:
+                return None
+            document, _ = versioned
+            values = document.get(field) or []
+            if add and value not in values:
+                document[field] = values + [value]
+            elif not add and value in values:
+                document[field] = [
+                    element for element in values if element != value
+                ]
+            else:
+                return False
+            self._conn.execute(
+                f'UPDATE "{index}" SET doc = ?, seq_no = seq_no + 1'
+                f" WHERE id = ?",
+                (json.dumps(document), item_id)
+            )
+        return True
+
+    def _delete(self, index: str, item_ids: List[str]) -> BulkResult:
+        """Delete documents from a table"""
+        succeeded = []
+        failed = {}
+        with self._conn:
+            for item_id in item_ids:
+                cursor = self._conn.execute(
+                    f'DELETE FROM "{index}" WHERE id = ?', (item_id,))
+                if cursor.rowcount:
+                    succeeded.append(item_id)
+                else:
+                    failed[item_id] = "404"
+        return succeeded, failed
+
+    def _get_ids_by_values(self,
+                           index: str,
+                           field: str,
+                           values: List[Any]) -> List[str]:
+        """Get the ids of the documents whose field has one of the values"""
+        array_fields = db_mappings.ARRAY_FIELDS.get(
+            db_mappings.get_entity(index), [])
+        item_ids = []
+        for start in range(0, len(values), self.MAX_VARIABLES):
+            chunk = values[start:start + self.MAX_VARIABLES]
+            placeholders = ", ".join("?" for _ in chunk)
+            if field in array_fields:
+                condition = (
+                    f"EXISTS (SELECT 1 FROM json_each(doc, '$.{field}')"
+                    f" WHERE value IN ({placeholders}))"
+                )
+            else:
+                condition = f"{queries.field_sql(field)} IN ({placeholders})"
+            rows = self._conn.execute(
+                f'SELECT id FROM "{index}" WHERE {condition}', chunk
+            ).fetchall()
+            item_ids.extend(item_id for item_id, in rows)
+        return list(dict.fromkeys(item_ids))
+
+    def _delete_by_values(self,
+                          index: str,
+                          field: str,
+                          values: List[Any]) -> int:
+        """
+        Delete the documents whose field has one of the values, returning
+        how many were deleted
+        """
+        with self._conn:
+            item_ids = self._get_ids_by_values(index, field, values)
+            self._conn.executemany(
+                f'DELETE FROM "{index}" WHERE id = ?',
+                [(item_id,) for item_id in item_ids]
+            )
+        return len(item_ids)
+
+    def _update_by_values(self,
+                          index: str,
+                          field: str,
+                          values: List[Any],
+                          item: Item) -> int:
+        """
+        Merge a partial document into the documents whose field has one of
+        the values, returning how many were updated
+        """
+        with self._conn:
+            item_ids = self._get_ids_by_values(index, field, values)
+            for start in range(0, len(item_ids), self.MAX_VARIABLES):
+                documents = self._get(
+                    index, item_ids[start:start + self.MAX_VARIABLES])
+                for item_id, document in documents.items():
+                    document.update(item)
+                    self._conn.execute(
+                        f'UPDATE "{index}" SET doc = ?,'
+                        f" seq_no = seq_no + 1 WHERE id = ?",
+                        (json.dumps(document), item_id)
+                    )
+        return len(item_ids)
+
+    async def open(self) -> None:
+        await self._run(self._open)
+
+    async def close(self) -> None:
+        await self._run(self._close)
+
+    async def get_item(self,
+                       index: str,
+                       item_id: str,
+                       includes: Optional[List[str]] = None,
+                       excludes: Optional[List[str]] = None) -> Item:
+        items = await self._run(self._get, index, [item_id])
+        if item_id not in items:
+            logger.error(
+                f"Failed to retrieve item with id {item_id} from index"
+                f" {index}: not found"
+            )
+            return {}
+        return project_item(items[item_id], includes, excludes)
+
+    async def get_versioned_item(
+            self,
+            index: str,
+            item_id: str
+    ) -> Tuple[Item, Optional[Version]]:
+        versioned = await self._run(self._get_versioned, index, item_id)
+        if versioned is None:
+            logger.error(
+                f"Failed to retrieve item with id {item_id} from index"
+                f" {index}: not found"
+            )
+            return {}, None
+        item, seq_no = versioned
+        return item, {"if_seq_no": seq_no, "if_primary_term": 1}
+
+    async def get_items_from_indexes(
+            self,
+            refs: List[Ref],
+            includes: Optional[List[str]] = None,
+            excludes: Optional[List[str]] = None
+    ) -> Tuple[Dict[Ref, Item], List[Ref]]:
+        refs = list(dict.fromkeys(refs))
+        ids_by_index: Dict[str, List[str]] = {}
+        for index, item_id in refs:
+            ids_by_index.setdefault(index, []).append(item_id)
+        documents = {}
+        for index, item_ids in ids_by_index.items():
+            items = await self._run(self._get, index, item_ids)
+            for item_id, item in items.items():
+                documents[(index, item_id)] = item
+        found = {
+            ref: project_item(documents[ref], includes, excludes)
+            for ref in refs
+            if ref in documents
+        }
+        missing = [ref for ref in refs if ref not in documents]
+        return found, missing
+
+    async def item_exists(self, index: str, item_id: str) -> bool:
+        _, missing = await self.items_exist([(index, item_id)])
+        return not missing
+
+    async def items_exist(self,
+                          refs: List[Ref]) -> Tuple[List[Ref], List[Ref]]:
+        refs = list(dict.fromkeys(refs))
+        ids_by_index: Dict[str, List[str]] = {}
+        for index, item_id in refs:
+            ids_by_index.setdefault(index, []).append(item_id)
+        existing = set()
+        for index, item_ids in ids_by_index.items():
+            found_ids = await self._run(self._get_ids, index, item_ids)
+            existing.update((index, item_id) for item_id in found_ids)
+        found = [ref for ref in refs if ref in existing]
+        missing = [ref for ref in refs if ref not in existing]
+        return found, missing
+
+    async def search_items(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            sort_by: Optional[str] = None,
+            sort_order: Optional[str] = None,
+            includes: Optional[List[str]] = None,
+            excludes: Optional[List[str]] = None,
+            filters: Optional[List[Filter]] = None
+    ) -> Optional[Dict[str, Item]]:
+        try:
+            pairs, _ = await self._run(
+                self._find, index, query_dict, sort_by, sort_order, None, 0,
+                filters)
+        except Exception as exception:
+            logger.error(
+                f"Failed to retrieve items from index {index} that satisfy"
+                f" the query {query_dict}: {exception}"
+            )
+            return None
+        return {
+            item_id: project_item(item, includes, excludes)
+            for item_id, item in pairs
+        }
+
+    async def search_page(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            limit: int,
+            cursor: Optional[str] = None,
+            sort_by: Optional[str] = None,
+            sort_order: Optional[str] = None,
+            includes: Optional[List[str]] = None,
+            excludes: Optional[List[str]] = None,
+            filters: Optional[List[Filter]] = None
+    ) -> Optional[Tuple[Dict[str, Item], Optional[str]]]:
+        try:
+            offset = db.decode_cursor(cursor)[0] if cursor else 0
+            pairs, total = await self._run(
+                self._find, index, query_dict, sort_by, sort_order, limit,
+                offset, filters)
+        except Exception as exception:
+            logger.error(
+                f"Failed to retrieve a page of items from index {index} that"
+                f" satisfy the query {query_dict}: {exception}"
+            )
+            return None
+        items_dict = {
+            item_id: project_item(item, includes, excludes)
+            for item_id, item in pairs
+        }
+        next_offset = offset + limit
+        next_cursor = (
+            db.encode_cursor([next_offset]) if next_offset < total else None
+        )
+        return items_dict, next_cursor
+
+    async def count_items(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            filters: Optional[List[Filter]] = None) -> Optional[int]:
+        try:
+            _, total = await self._run(
+                self._find, index, query_dict, None, None, 0, 0, filters)
+        except Exception as exception:
+            logger.error(
+                f"Failed to count items from index {index} that satisfy the"
+                f" query {query_dict}: {exception}"
+            )
+            return None
+        return total
+
+    async def aggregate(
+            self,
+            index: str,
+            query_dict: Dict[str, Any],
+            aggs: Dict[str, Dict[str, Any]],
+            filters: Optional[List[Filter]] = None
+    ) -> Optional[Aggregations]:
+        try:
+            return await self._run(
+                self._aggregate, index, query_dict, aggs, filters)
+        except Exception as exception:
+            logger.error(
+                f"Failed to aggregate items from index {index} that satisfy"
+                f" the query {query_dict}: {exception}"
+            )
+            return None
+
+    async def create_item(self,
+                          index: str,
+                          item: Item,
+                          item_id: Optional[str] = None,
+                          refresh: Optional[str] = None) -> Optional[str]:
+        if not item_id:
+            item_id = str(uuid.uuid4())
+        succeeded, failed = await self.bulk_create(
+            index, {item_id: item}, refresh)
+        if failed:
+            return None
+        logger.info(f"Created item with id {item_id} in index {index}")
+        return succeeded[0]
+
+    async def update_item(self,
+                          index: str,
+                          item_id: str,
+                          item: Item,
+                          version: Optional[Version] = None,
+                          refresh: Optional[str] = None) -> bool:
+        if version is None:
+            _, failed = await self.bulk_update(
+                index, {item_id: item}, refresh)
+            return not failed
+        try:
+            updated = await self._run(self._update_versioned, index,
+                                      item_id, item, version["if_seq_no"])
+        except Exception as exception:
+            logger.error(
+                f"Failed to update item {item_id} in index {index}:"
+                f" {exception}"
+            )
+            return False
+        if updated is None:
+            logger.error(
+                f"Failed to update item {item_id} in index {index}: not found"
+            )
+            return False
+        if not updated:
+            raise db.VersionConflictError(
+                f"Item {item_id} in index {index} changed since version"
+                f" {version}"
+            )
+        return True
+
+    async def increment_counter(self,
+                                index: str,
+                                item_id: str,
+                                field: str) -> Optional[int]:
+        try:
+            value = await self._run(self._increment, index, item_id, field)
+        except Exception as exception:
+            logger.error(
+                f"Failed to increment {field} of item {item_id} in index"
+                f" {index}: {exception}"
+            )
+            return None
+        if value is None:
+            logger.error(
+                f"Failed to increment {field} of item {item_id} in index"
+                f" {index}: not found"
+            )
+            return None
+        logger.info(f"Allocated {field} {value} of item {item_id} in index"
+                    f" {index}")
+        return value
+
+    async def _run_set_update(self,
+                              index: str,
+                              item_id: str,
+                              field: str,
+                              value: Any,
+                              add: bool) -> bool:
+        """Add or remove a value of a set field of an item in place"""
+        try:
+            changed = await self._run(
+                self._update_set, index, item_id, field, value, add)
+        except Exception as exception:
+            logger.error(
+                f"Failed to update {field} of item {item_id} in index"
+                f" {index}: {exception}"
+            )
+            return False
+        if changed is None:
+            logger.error(
+                f"Failed to update {field} of item {item_id} in index"
+                f" {index}: not found"
+            )
+            return False
+        logger.info(f"Updated {field} of item {item_id} in index {index}")
+        return True
+
+    async def add_to_set(self,
+                         index: str,
+                         item_id: str,
+                         field: str,
+                         value: Any,
+                         refresh: Optional[str] = None) -> bool:
+        return await self._run_set_update(index, item_id, field, value, True)
+
+    async def remove_from_set(self,
+                              index: str,
+                              item_id: str,
+                              field: str,
+                              value: Any,
+                              refresh: Optional[str] = None) -> bool:
+        return await self._run_set_update(
+            index, item_id, field, value, False)
+
+    async def delete_item(self,
+                          index: str,
+                          item_id: str,
+                          refresh: Optional[str] = None) -> bool:
+        _, failed = await self.bulk_delete(index, [item_id], refresh)
+        return not failed
+
+    async def delete_by_query(
+            self,
+            index: str,
+            field: str,
+            values: List[Any],
+            progress: Optional[Progress] = None,
+            refresh: Optional[str] = None
+    ) -> Optional[Dict[str, int]]:
+        try:
+            deleted = await self._run(
+                self._delete_by_values, index, field, values)
+        except Exception as exception:
+            logger.error(
+                f"Failed to delete items from index {index} by {field}:"
+                f" {exception}"
+            )
+            return None
+        task_status = db.get_empty_task_status()
+        task_status["total"] = task_status["deleted"] = deleted
+        if progress is not None:
+            progress(task_status)
+        logger.info(f"Deleted items from index {index} by {field}:"
+                    f" {task_status}")
+        return task_status
+
+    async def update_by_query(
+            self,
+            index: str,
+            field: str,
+            values: List[Any],
+            item: Item,
+            progress: Optional[Progress] = None,
+            refresh: Optional[str] = None
+    ) -> Optional[Dict[str, int]]:
+        try:
+            updated = await self._run(
+                self._update_by_values, index, field, values, item)
+        except Exception as exception:
+            logger.error(
+                f"Failed to update items in index {index} by {field}:"
+                f" {exception}"
+            )
+            return None
+        task_status = db.get_empty_task_status()
+        task_status["total"] = task_status["updated"] = updated
+        if progress is not None:
+            progress(task_status)
+        logger.info(f"Updated items in index {index} by {field}:"
+                    f" {task_status}")
+        return task_status
+
+    async def _bulk(self,
+                    operation: Callable[..., BulkResult],
+                    index: str,
+                    items: Any) -> BulkResult:
+        """Run a bulk operation, reporting every item as failed on errors"""
+        try:
+            succeeded, failed = await self._run(operation, index, items)
+        except Exception as exception:
+            succeeded, failed = [], {
+                item_id: str(exception) for item_id in items
+            }
+        if failed:
+            logger.error(f"Bulk operation failed for {len(failed)} items:"
+                         f" {failed}")
+        logger.info(f"Bulk operation succeeded for {len(succeeded)} items")
+        return succeeded, failed
+
+    async def bulk_create(self,
+                          index: str,
+                          items: Dict[str, Item],
+                          refresh: Optional[str] = None) -> BulkResult:
+        return await self._bulk(self._create, index, items)
+
+    async def bulk_update(self,
+                          index: str,
+                          items: Dict[str, Item],
+                          refresh: Optional[str] = None) -> BulkResult:
+        return await self._bulk(self._update, index, items)
+
+    async def bulk_delete(self,
+                          index: str,
+                          item_ids: List[str],
+                          refresh: Optional[str] = None) -> BulkResult:
+        return await self._bulk(self._delete, index, item_ids)
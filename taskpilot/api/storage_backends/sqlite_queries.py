@@ -0,0 +1,198 @@
+"""SQL building of the queries of the SQLite storage backend"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from taskpilot.api import db_mappings
+from taskpilot.api.storage_backends import memory
+from taskpilot.api.storage_backends.base import Filter
+
+
+def field_sql(field: str) -> str:
+    """Get the SQL expression extracting a field from a document"""
+    return f"json_extract(doc, '$.{field}')"
+
+
+def _sortable_date_sql(expression: str) -> str:
+    """Get the SQL expression reordering a date like memory.sortable_date"""
+    return (
+        f"substr({expression}, 7, 4) || substr({expression}, 4, 2)"
+        f" || substr({expression}, 1, 2) || substr({expression}, 12)"
+    )
+
+
+def sort_sql(index: str,
+             sort_by: Optional[str],
+             sort_order: Optional[str]) -> str:
+    """
+    Get the ORDER BY clause sorting an index on a field, breaking ties by
+    id and putting the rows missing the field last
+    """
+    sort_by, sort_order = db_mappings.resolve_sort(
+        index, sort_by, sort_order)
+    properties = db_mappings.get_index_mappings(index)["properties"]
+    expression = field_sql(sort_by)
+    if properties[sort_by]["type"] == "date":
+        expression = _sortable_date_sql(expression)
+    return (f"ORDER BY ({expression}) IS NULL, ({expression})"
+            f" {sort_order.upper()}, id ASC")
+
+
+def _bool_filter_sql(index: str,
+                     clause: Dict[str, List[Filter]]
+                     ) -> Tuple[str, List[Any]]:
+    """Get the SQL condition and parameters of a bool filter"""
+    conditions = []
+    params: List[Any] = []
+    for inner in clause.get("filter", []):
+        condition, inner_params = filter_sql(index, inner)
+        conditions.append(condition)
+        params.extend(inner_params)
+    for inner in clause.get("must_not", []):
+        condition, inner_params = filter_sql(index, inner)
+        conditions.append(f"NOT COALESCE({condition}, 0)")
+        params.extend(inner_params)
+    should = []
+    for inner in clause.get("should", []):
+        condition, inner_params = filter_sql(index, inner)
+        should.append(condition)
+        params.extend(inner_params)
+    if should:
+        conditions.append(f"({' OR '.join(should)})")
+    return f"({' AND '.join(conditions) or '1'})", params
+
+
+def _exists_filter_sql(field: str,
+                       is_array: bool) -> Tuple[str, List[Any]]:
+    """Get the SQL condition of an exists filter"""
+    if is_array:
+        return f"json_array_length(doc, '$.{field}') > 0", []
+    return f"{field_sql(field)} IS NOT NULL", []
+
+
+def _term_filter_sql(expression: str,
+                     value: Any) -> Tuple[str, List[Any]]:
+    """Get the SQL condition and parameters of a term filter"""
+    return f"{expression} = ?", [value]
+
+
+def _terms_filter_sql(expression: str,
+                      value: List[Any]) -> Tuple[str, List[Any]]:
+    """Get the SQL condition and parameters of a terms filter"""
+    if not value:
+        return "0", []
+    placeholders = ", ".join("?" for _ in value)
+    return f"{expression} IN ({placeholders})", list(value)
+
+
+def _prefix_filter_sql(expression: str,
+                       value: str) -> Tuple[str, List[Any]]:
+    """Get the SQL condition and parameters of a prefix filter"""
+    return f"substr({expression}, 1, ?) = ?", [len(value), value]
+
+
+def _range_filter_sql(index: str,
+                      field: str,
+                      expression: str,
+                      value: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """
+    Get the SQL condition and parameters of a range filter, comparing
+    dates in their sortable form
+    """
+    properties = db_mappings.get_index_mappings(index)["properties"]
+    if properties[field]["type"] == "date":
+        expression = _sortable_date_sql(expression)
+        value = {
+            bound: memory.sortable_date(limit)
+            for bound, limit in value.items()
+        }
+    operators = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+    condition = " AND ".join(
+        f"{expression} {operators[bound]} ?" for bound in value)
+    return condition, list(value.values())
+
+
+def filter_sql(index: str,
+               filter_: Filter) -> Tuple[str, List[Any]]:
+    """
+    Get the SQL condition and parameters of a filter built by the
+    db_operations builders, matching list fields on any of their elements
+    """
+    (kind, clause), = filter_.items()
+    if kind == "bool":
+        return _bool_filter_sql(index, clause)
+    field = clause["field"] if kind == "exists" else next(iter(clause))
+    if field not in db_mappings.get_filter_fields(index):
+        raise ValueError(f"index {index} cannot be filtered on {field}")
+    array_fields = db_mappings.ARRAY_FIELDS.get(
+        db_mappings.get_entity(index), [])
+    is_array = field in array_fields
+    if kind == "exists":
+        return _exists_filter_sql(field, is_array)
+    expression = "value" if is_array else field_sql(field)
+    value = clause[field]
+    value_filters = {
+        "term": _term_filter_sql,
+        "terms": _terms_filter_sql,
+        "prefix": _prefix_filter_sql
+    }
+    if kind == "range":
+        condition, params = _range_filter_sql(
+            index, field, expression, value)
+    elif kind in value_filters:
+        condition, params = value_filters[kind](expression, value)
+    else:
+        raise ValueError(f"unknown filter {kind}")
+    if is_array:
+        return (
+            f"EXISTS (SELECT 1 FROM json_each(doc, '$.{field}')"
+            f" WHERE {condition})",
+            params
+        )
+    return f"({condition})", params
+
+
+def histogram_key_sql(expression: str, interval: str) -> str:
+    """Get the SQL expression computing the histogram bucket of a date"""
+    year = f"substr({expression}, 7, 4)"
+    month = f"{year} || '-' || substr({expression}, 4, 2)"
+    day = f"{month} || '-' || substr({expression}, 1, 2)"
+    return {"year": year, "month": month, "day": day}[interval]
+
+
+def where_sql(
+        index: str,
+        query_dict: Dict[str, Any],
+        filters: Optional[List[Filter]] = None
+) -> Tuple[str, List[Any], Dict[str, Any]]:
+    """
+    Get the WHERE clause and parameters of a query and filters, along
+    with the text conditions that have to be checked on the fetched
+    documents
+    """
+    properties = db_mappings.get_index_mappings(index)["properties"]
+    array_fields = db_mappings.ARRAY_FIELDS.get(
+        db_mappings.get_entity(index), [])
+    text_fields = db_mappings.get_text_fields(index)
+    conditions = []
+    params = []
+    text_query = {}
+    for field, value in query_dict.items():
+        if field not in properties:
+            raise ValueError(f"index {index} has no field {field}")
+        if field in text_fields:
+            text_query[field] = value
+            continue
+        for element in value if isinstance(value, list) else [value]:
+            if field in array_fields:
+                conditions.append(
+                    f"EXISTS (SELECT 1 FROM json_each(doc, '$.{field}')"
+                    f" WHERE value = ?)"
+                )
+            else:
+                conditions.append(f"{field_sql(field)} = ?")
+            params.append(element)
+    for filter_ in filters or []:
+        condition, filter_params = filter_sql(index, filter_)
+        conditions.append(condition)
+        params.extend(filter_params)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params, text_query
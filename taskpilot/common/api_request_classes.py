@@ -1,5 +1,5 @@
 """API request classes"""
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Union
 from pydantic import BaseModel
 
 
@@ -23,6 +23,23 @@ class UpdateUserRequest(BaseModel):
     favorite_tickets: List[str] = []
 
 
+class SearchFilter(BaseModel):
+    """
+    Search filter on a field, matching the items whose field has one of the
+    values, is within the range, starts with the prefix and exists as given,
+    or the other items when negated
+    """
+    field: str
+    values: Optional[List[Union[str, int, bool]]] = None
+    gt: Optional[Union[str, int]] = None
+    gte: Optional[Union[str, int]] = None
+    lt: Optional[Union[str, int]] = None
+    lte: Optional[Union[str, int]] = None
+    prefix: Optional[str] = None
+    exists: Optional[bool] = None
+    negate: bool = False
+
+
 class SearchUsersRequest(BaseModel):
     """Search users request model"""
     username: Optional[str] = None
@@ -30,6 +47,8 @@ class SearchUsersRequest(BaseModel):
     full_name: Optional[str] = None
     is_admin: Optional[bool] = None
     disabled: Optional[bool] = None
+    filters: List[SearchFilter] = []
+    any_filters: List[SearchFilter] = []
 
 
 class LoginRequest(BaseModel):
@@ -62,11 +81,13 @@ class SearchProjectsRequest(BaseModel):
     created_by: Optional[str] = None
     modified_by: Optional[str] = None
     members: Optional[List[str]] = None
+    filters: List[SearchFilter] = []
+    any_filters: List[SearchFilter] = []
 
 
 class CreateTicketRequest(BaseModel):
     """Create ticket request model"""
-    ticket_id: str
+    ticket_id: Optional[str] = None
     title: str
     description: str
     type: str
@@ -103,6 +124,8 @@ class SearchTicketsRequest(BaseModel):
     modified_by: Optional[str] = None
     parent_project: Optional[str] = None
     parent_ticket: Optional[str] = None
+    filters: List[SearchFilter] = []
+    any_filters: List[SearchFilter] = []
 
 
 class CreateCommentRequest(BaseModel):
@@ -119,6 +142,20 @@ class SearchCommentsRequest(BaseModel):
     ticket_id: Optional[str] = None
     text: Optional[str] = None
     created_by: Optional[str] = None
+    filters: List[SearchFilter] = []
+    any_filters: List[SearchFilter] = []
+
+
+class PermissionCheck(BaseModel):
+    """Permission check model, naming a right of a user on an entity"""
+    entity: str
+    entity_id: str
+    permission: str
+
+
+class CheckPermissionsRequest(BaseModel):
+    """Check permissions request model"""
+    checks: List[PermissionCheck]
 
 
 class AIRequest(BaseModel):
@@ -16,6 +16,32 @@ UI_PORT = 8081
 DB_URL = f"http://taskpilot-elastic:{DB_PORT}"
 API_URL = f"http://taskpilot-api:{API_PORT}"
 
+DB_POOL_SIZE = 25
+DB_KEEP_ALIVE = True
+DB_READ_TIMEOUT = 5
+DB_WRITE_TIMEOUT = 10
+DB_BULK_TIMEOUT = 60
+DB_READ_RETRIES = 2
+DB_RETRY_BACKOFF = 0.1
+DB_MAX_RETRY_BACKOFF = 2
+DB_UNAVAILABLE_STATUSES = (429, 502, 503, 504)
+DB_BREAKER_FAILURE_THRESHOLD = 5
+DB_BREAKER_RESET_TIMEOUT = 30
+DB_BULK_CHUNK_SIZE = 500
+DB_BULK_MAX_CHUNK_BYTES = 10 * 1024 * 1024
+DB_PAGE_SIZE = 1000
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 10000
+DB_AGGREGATION_SIZE = 100
+DB_POINT_IN_TIME_KEEP_ALIVE = "1m"
+DB_CONFLICT_RETRIES = 5
+DB_BY_QUERY_REQUESTS_PER_SECOND = 500
+DB_TERMS_CHUNK_SIZE = 10000
+DB_TASK_POLL_INTERVAL = 1
+DB_STARTUP_TIMEOUT = 120
+
+API_MAX_TRACKED_TASKS = 100
+
 LOGGING_FORMAT = (
     "[%(asctime)s] [PID: %(process)d] [%(filename)s] "
     "[%(funcName)s: %(lineno)s] [%(levelname)s] %(message)s"
@@ -107,6 +133,62 @@ DB_INDEXES = {
     Entities.COMMENT: "comments"
 }
 
+DB_ID_FIELDS = {
+    Entities.USER: "username",
+    Entities.PROJECT: "project_id",
+    Entities.TICKET: "ticket_id",
+    Entities.COMMENT: "comment_id"
+}
+
+
+class DBBackends:
+    """Constants for accepted storage backends"""
+    ELASTICSEARCH = "elasticsearch"
+    MEMORY = "memory"
+    SQLITE = "sqlite"
+
+
+DB_BACKEND = DBBackends.ELASTICSEARCH
+DB_SQLITE_PATH = "taskpilot.db"
+
+DB_CACHED_ENTITIES = [Entities.USER, Entities.PROJECT]
+DB_CACHE_SIZE = 1000
+DB_CACHE_TTL = 30
+
+
+class Permissions:
+    """Constants for the rights a user can have on an entity"""
+    MEMBER = "member"
+    OWNER = "owner"
+
+
+ENTITY_PERMISSIONS = {
+    Entities.PROJECT: [Permissions.MEMBER, Permissions.OWNER],
+    Entities.TICKET: [Permissions.OWNER],
+    Entities.COMMENT: [Permissions.OWNER]
+}
+
+PERMISSIONS_CACHE_SIZE = 1000
+PERMISSIONS_CACHE_TTL = 30
+
+
+class DBRefreshModes:
+    """Constants for the refresh modes of the database writes"""
+    FALSE = "false"
+    WAIT_FOR = "wait_for"
+    TRUE = "true"
+
+
+DB_REFRESH_MODES = [
+    DBRefreshModes.FALSE,
+    DBRefreshModes.WAIT_FOR,
+    DBRefreshModes.TRUE
+]
+
+UI_REFRESH_MODE = DBRefreshModes.WAIT_FOR
+UI_TASK_POLL_INTERVAL = 0.2
+UI_TASK_POLL_TIMEOUT = 30
+
 
 class TicketTypes:
     """Constants for accepted ticket types"""
@@ -151,6 +233,13 @@ TICKET_STATUSES = [
 ]
 
 
+class TaskStatuses:
+    """Constants for the statuses of the API background tasks"""
+    RUNNING = "Running"
+    COMPLETED = "Completed"
+    FAILED = "Failed"
+
+
 class APIOperations:
     """Constants used in the TaskPilot API Operations"""
     USERS_GET = "users_get"
@@ -166,6 +255,9 @@ class APIOperations:
     USERS_REMOVE_FAVORITE_TICKET = "users_remove_favorite_ticket"
     USERS_LOGIN = "users_login"
     USERS_ALL_PROJECTS = "users_all_projects"
+    USERS_TICKETS_STATS = "users_tickets_stats"
+    USERS_SEARCH_VISIBLE_TICKETS = "users_search_visible_tickets"
+    USERS_CHECK_PERMISSIONS = "users_check_permissions"
 
     PROJECTS_GET = "projects_get"
     PROJECTS_CREATE = "projects_create"
@@ -178,6 +270,7 @@ class APIOperations:
     PROJECTS_REMOVE_MEMBER = "projects_remove_member"
     PROJECTS_IS_USER_OWNER = "projects_is_user_owner"
     PROJECTS_IS_USER_MEMBER = "projects_is_user_member"
+    PROJECTS_TICKETS_STATS = "projects_tickets_stats"
 
     TICKETS_GET = "tickets_get"
     TICKETS_CREATE = "tickets_create"
@@ -187,6 +280,8 @@ class APIOperations:
     TICKETS_SEARCH = "tickets_search"
     TICKETS_ALL_COMMENTS = "tickets_all_comments"
     TICKETS_ALL_CHILDREN = "tickets_all_children"
+    TICKETS_ALL_DESCENDANTS = "tickets_all_descendants"
+    TICKETS_ALL_ANCESTORS = "tickets_all_ancestors"
     TICKETS_CHANGE_STATUS = "tickets_change_status"
     TICKETS_IS_USER_OWNER = "tickets_is_user_owner"
 
@@ -197,6 +292,10 @@ class APIOperations:
     COMMENTS_SEARCH = "comments_search"
     COMMENTS_IS_USER_OWNER = "comments_is_user_owner"
 
+    TASKS_GET = "tasks_get"
+
+    CACHE_STATS = "cache_stats"
+
     AI = "ai"
 
 
@@ -219,6 +318,10 @@ API_ROUTES = {
                                                 "/favorites/{ticket_id}",
     APIOperations.USERS_LOGIN: "/api/users/login",
     APIOperations.USERS_ALL_PROJECTS: "/api/users/{user_id}/projects",
+    APIOperations.USERS_TICKETS_STATS: "/api/users/{user_id}/tickets/stats",
+    APIOperations.USERS_SEARCH_VISIBLE_TICKETS: "/api/users/{user_id}"
+                                                "/projects/tickets/search",
+    APIOperations.USERS_CHECK_PERMISSIONS: "/api/users/{user_id}/permissions",
 
     APIOperations.PROJECTS_GET: "/api/projects/{project_id}",
     APIOperations.PROJECTS_CREATE: "/api/projects",
@@ -235,6 +338,8 @@ API_ROUTES = {
                                           "/{user_id}",
     APIOperations.PROJECTS_IS_USER_MEMBER: "/api/projects/{project_id}/members"
                                            "/{user_id}",
+    APIOperations.PROJECTS_TICKETS_STATS: "/api/projects/{project_id}/tickets"
+                                          "/stats",
 
     APIOperations.TICKETS_GET: "/api/tickets/{ticket_id}",
     APIOperations.TICKETS_CREATE: "/api/tickets",
@@ -245,6 +350,10 @@ API_ROUTES = {
     APIOperations.TICKETS_ALL_COMMENTS: "/api/tickets/{ticket_id}/comments",
     APIOperations.TICKETS_ALL_CHILDREN: "/api/tickets/{ticket_id}"
                                         "/children-tickets",
+    APIOperations.TICKETS_ALL_DESCENDANTS: "/api/tickets/{ticket_id}"
+                                           "/descendant-tickets",
+    APIOperations.TICKETS_ALL_ANCESTORS: "/api/tickets/{ticket_id}"
+                                         "/ancestor-tickets",
     APIOperations.TICKETS_CHANGE_STATUS: "/api/tickets/{ticket_id}/status",
     APIOperations.TICKETS_IS_USER_OWNER: "/api/tickets/{ticket_id}/owners"
                                          "/{user_id}",
@@ -257,6 +366,10 @@ API_ROUTES = {
     APIOperations.COMMENTS_IS_USER_OWNER: "/api/comments/{comment_id}/owners"
                                           "/{user_id}",
 
+    APIOperations.TASKS_GET: "/api/tasks/{task_id}",
+
+    APIOperations.CACHE_STATS: "/api/cache/stats",
+
     APIOperations.AI: "/api/ai"
 }
 
@@ -29,6 +29,8 @@ class Ticket(BaseModel):
     modified_at: str
     parent_project: str
     parent_ticket: Optional[str] = None
+    ancestors: List[str] = []
+    depth: int = 0
     next_comment_id: int = 0
 
 
@@ -52,3 +54,71 @@ class Project(BaseModel):
     modified_at: str
     members: List[str] = []
     next_ticket_id: int = 0
+
+
+class BackgroundTask(BaseModel):
+    """Background task model"""
+    task_id: str
+    description: str
+    status: str
+    step: Optional[str] = None
+    total: int = 0
+    deleted: int = 0
+    updated: int = 0
+    version_conflicts: int = 0
+    failures: int = 0
+    message: Optional[str] = None
+    created_at: str
+    completed_at: Optional[str] = None
+
+
+class PartialUser(BaseModel):
+    """User model restricted to a subset of its fields"""
+    username: Optional[str] = None
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+    is_admin: Optional[bool] = None
+    disabled: Optional[bool] = None
+    favorite_tickets: Optional[List[str]] = None
+
+
+class PartialTicket(BaseModel):
+    """Ticket model restricted to a subset of its fields"""
+    ticket_id: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    type: Optional[str] = None
+    priority: Optional[str] = None
+    status: Optional[str] = None
+    assignee: Optional[str] = None
+    created_by: Optional[str] = None
+    created_at: Optional[str] = None
+    modified_by: Optional[str] = None
+    modified_at: Optional[str] = None
+    parent_project: Optional[str] = None
+    parent_ticket: Optional[str] = None
+    ancestors: Optional[List[str]] = None
+    depth: Optional[int] = None
+    next_comment_id: Optional[int] = None
+
+
+class PartialComment(BaseModel):
+    """Comment model restricted to a subset of its fields"""
+    comment_id: Optional[str] = None
+    ticket_id: Optional[str] = None
+    text: Optional[str] = None
+    created_by: Optional[str] = None
+    created_at: Optional[str] = None
+
+
+class PartialProject(BaseModel):
+    """Project model restricted to a subset of its fields"""
+    project_id: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    created_by: Optional[str] = None
+    created_at: Optional[str] = None
+    modified_by: Optional[str] = None
+    modified_at: Optional[str] = None
+    members: Optional[List[str]] = None
+    next_ticket_id: Optional[int] = None
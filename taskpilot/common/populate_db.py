@@ -1,7 +1,12 @@
 """Populate the database with dummy data"""
+import argparse
+import collections
+
 import requests
 
+from taskpilot.api import db_operations as db
 from taskpilot.common import config_info, api_request_classes as api_req
+from taskpilot.common import models
 
 CREATE_USER_REQUESTS = [
     api_req.CreateUserRequest(
@@ -625,8 +630,85 @@ def create_comments():
               f" request {request}: {response.json()}")
 
 
+def bulk_seed():
+    """Seed the database directly through the bulk API"""
+    current_time = config_info.get_current_time()
+
+    users = {}
+    for request in CREATE_USER_REQUESTS:
+        user_dict = request.dict()
+        password = user_dict.pop("password")
+        user_dict["hashed_password"] = config_info.hash_password(password)
+        user_dict["username"] = user_dict["username"].lower()
+        users[user_dict["username"]] = models.User.parse_obj(user_dict).dict()
+
+    tickets_per_project = collections.Counter(
+        request.parent_project for request in CREATE_TASK_REQUESTS
+    )
+    comments_per_ticket = collections.Counter(
+        request.ticket_id for request in CREATE_COMMENT_REQUESTS
+    )
+
+    projects = {}
+    for request in CREATE_PROJECT_REQUESTS:
+        project_dict = request.dict()
+        project_dict["created_at"] = current_time
+        project_dict["modified_at"] = current_time
+        project_dict["modified_by"] = project_dict["created_by"]
+        project_dict["next_ticket_id"] = tickets_per_project[
+            request.project_id]
+        projects[request.project_id] = models.Project.parse_obj(
+            project_dict).dict()
+
+    tickets = {}
+    for request in CREATE_TASK_REQUESTS:
+        ticket_dict = request.dict()
+        ticket_dict["created_at"] = current_time
+        ticket_dict["modified_at"] = current_time
+        ticket_dict["modified_by"] = ticket_dict["created_by"]
+        ticket_dict["next_comment_id"] = comments_per_ticket[
+            request.ticket_id]
+        tickets[request.ticket_id] = models.Ticket.parse_obj(
+            ticket_dict).dict()
+    ticket_paths = db.build_ticket_paths({
+        ticket_id: ticket["parent_ticket"]
+        for ticket_id, ticket in tickets.items()
+    })
+    for ticket_id, ticket in tickets.items():
+        ticket.update(ticket_paths[ticket_id])
+
+    comments = {}
+    for request in CREATE_COMMENT_REQUESTS:
+        comment_dict = request.dict()
+        comment_dict["created_at"] = current_time
+        comments[request.comment_id] = models.Comment.parse_obj(
+            comment_dict).dict()
+
+    for entity, items in ((config_info.Entities.USER, users),
+                          (config_info.Entities.PROJECT, projects),
+                          (config_info.Entities.TICKET, tickets),
+                          (config_info.Entities.COMMENT, comments)):
+        created, failed = db.bulk_create(
+            config_info.DB_INDEXES[entity], items, refresh="wait_for")
+        print(f"[{not failed}] Bulk created {len(created)} {entity} items,"
+              f" failed: {failed}")
+
+
 if __name__ == "__main__":
-    create_users()
-    create_projects()
-    create_tasks()
-    create_comments()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="write directly to the database through the bulk API instead"
+             " of creating every item through the TaskPilot API"
+    )
+    if parser.parse_args().bulk:
+        if not db.ensure_indexes():
+            raise SystemExit("Failed to bring the indexes to the current"
+                             " mappings version")
+        bulk_seed()
+    else:
+        create_users()
+        create_projects()
+        create_tasks()
+        create_comments()
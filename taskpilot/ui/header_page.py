@@ -7,6 +7,7 @@ from taskpilot.common import models
 from taskpilot.common.config_info import APIOperations as APIOps
 from taskpilot.common import api_request_classes as api_req
 from taskpilot.ui.auth_pages import is_user_authenticated
+from taskpilot.ui.ui_requests import get_all_pages
 
 from typing import Any, Dict, List
 
@@ -31,24 +32,30 @@ def get_ticket_context(ticket_id: str) -> Dict[str, Any]:
         + config_info.API_ROUTES[APIOps.TICKETS_GET].format(
             ticket_id=ticket.parent_ticket)
     ).json()["ticket"]
-    ticket_dict["child_tickets"] = requests.get(
+    ticket_dict["child_tickets"] = get_all_pages(
+        "GET",
         config_info.API_URL
         + "/"
         + config_info.API_ROUTES[APIOps.TICKETS_ALL_CHILDREN].format(
-            ticket_id=ticket_id)
-    ).json()["tickets"]
+            ticket_id=ticket_id),
+        "tickets",
+        params={"fields": ["ticket_id", "title", "type", "priority",
+                           "status", "assignee"]}
+    )
     ticket_dict["parent_project"] = requests.get(
         config_info.API_URL
         + "/"
         + config_info.API_ROUTES[APIOps.PROJECTS_GET].format(
             project_id=ticket.parent_project)
     ).json()["project"]
-    ticket_dict["comments"] = requests.get(
+    ticket_dict["comments"] = get_all_pages(
+        "GET",
         config_info.API_URL
         + "/"
         + config_info.API_ROUTES[APIOps.TICKETS_ALL_COMMENTS].format(
-            ticket_id=ticket.ticket_id)
-    ).json()["comments"]
+            ticket_id=ticket.ticket_id),
+        "comments"
+    )
 
     return ticket_dict
 
@@ -69,12 +76,14 @@ def get_project_context(project_id: str) -> Dict[str, Any]:
     project_dict = project.dict()
     project_dict["tickets"] = []
 
-    tickets = requests.get(
+    tickets = get_all_pages(
+        "GET",
         config_info.API_URL
         + "/"
         + config_info.API_ROUTES[APIOps.PROJECTS_ALL_TICKETS].format(
-            project_id=project.project_id)
-    ).json()["tickets"]
+            project_id=project.project_id),
+        "tickets"
+    )
 
     tickets = [
         models.Ticket.parse_obj(ticket) for ticket in tickets
@@ -84,12 +93,14 @@ def get_project_context(project_id: str) -> Dict[str, Any]:
         ticket_dict = ticket.dict()
         ticket_dict["comments"] = []
 
-        comments = requests.get(
+        comments = get_all_pages(
+            "GET",
             config_info.API_URL
             + "/"
             + config_info.API_ROUTES[APIOps.TICKETS_ALL_COMMENTS].format(
-                ticket_id=ticket.ticket_id)
-        ).json()["comments"]
+                ticket_id=ticket.ticket_id),
+            "comments"
+        )
 
         comments = [
             models.Comment.parse_obj(comment) for comment in comments
@@ -110,12 +121,14 @@ def get_overall_context(username: str) -> List[Dict[str, Any]]:
     """
     overall_context = []
 
-    projects = requests.get(
+    projects = get_all_pages(
+        "GET",
         config_info.API_URL
         + "/"
         + config_info.API_ROUTES[APIOps.USERS_ALL_PROJECTS].format(
-            user_id=username)
-    ).json()["projects"]
+            user_id=username),
+        "projects"
+    )
 
     projects = [
         models.Project.parse_obj(project) for project in projects
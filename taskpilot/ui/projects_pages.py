@@ -1,11 +1,29 @@
-import time
+from typing import Any, Dict
 
 import requests
-from nicegui import ui, app
+from nicegui import run, ui, app
 
 from taskpilot.common import config_info, api_request_classes as api_req, \
     models
 from taskpilot.common.config_info import APIOperations as APIOps
+from taskpilot.ui.ui_requests import get_all_pages, wait_for_task
+
+
+async def wait_for_deletion(task: Dict[str, Any]) -> bool:
+    """
+    Wait for a project deletion task to end, telling the user when it
+    failed or did not end in time, and return whether it completed
+    """
+    task = await wait_for_task(task)
+    if task is None or task["status"] == config_info.TaskStatuses.RUNNING:
+        ui.notify("Unable to tell whether the project was deleted, check"
+                  " again later", color="negative")
+        return False
+    if task["status"] != config_info.TaskStatuses.COMPLETED:
+        ui.notify(task.get("message") or "Unable to delete project",
+                  color="negative")
+        return False
+    return True
 
 
 def projects_page() -> None:
@@ -24,10 +42,13 @@ def projects_page() -> None:
         ).classes("w-4/5")
         description = ui.textarea("Description").classes("w-4/5")
 
-        all_users = requests.get(
+        all_users = get_all_pages(
+            "GET",
             f"{config_info.API_URL}"
-            f"/{config_info.API_ROUTES[APIOps.USERS_ALL]}"
-        ).json()["users"]
+            f"/{config_info.API_ROUTES[APIOps.USERS_ALL]}",
+            "users",
+            params={"fields": ["username"]}
+        )
         all_user_ids = [user["username"] for user in all_users]
         all_user_ids.remove(app.storage.user.get("username", ""))
 
@@ -69,7 +90,8 @@ def projects_page() -> None:
             )
             create_project_response = requests.post(
                 url=url,
-                json=create_project_request.dict()
+                json=create_project_request.dict(),
+                params={"refresh": config_info.UI_REFRESH_MODE}
             )
             ui.notify(
                 create_project_response.json().get(
@@ -78,7 +100,6 @@ def projects_page() -> None:
                 color="positive" if create_project_response.json().get(
                     "result", False) else "negative"
             )
-            time.sleep(1)
             ui.navigate.reload()
 
         with ui.row().classes("items-center justify-between"):
@@ -124,10 +145,10 @@ def projects_page() -> None:
                 user_id=username
             )
         )
-        user_projects_response = requests.get(get_user_projects_url).json()
         user_projects = [
             models.Project.parse_obj(project)
-            for project in user_projects_response["projects"]
+            for project in get_all_pages(
+                "GET", get_user_projects_url, "projects")
         ]
 
         if not user_projects:
@@ -204,16 +225,7 @@ def project_page(project_id: str) -> None:
         ).classes("w-4/5")
 
         def create_button_clicked():
-            next_ticket_id = requests.get(
-                config_info.API_URL
-                + "/"
-                + config_info.API_ROUTES[APIOps.PROJECTS_GET].format(
-                    project_id=parent_project.value
-                )
-            ).json()["project"]["next_ticket_id"]
-
             create_ticket_request = api_req.CreateTicketRequest(
-                ticket_id=f"{parent_project.value}-{next_ticket_id}",
                 title=ticket_title.value,
                 description=ticket_description.value,
                 type=ticket_type.value,
@@ -228,7 +240,8 @@ def project_page(project_id: str) -> None:
             )
             create_ticket_response = requests.post(
                 url=url,
-                json=create_ticket_request.dict()
+                json=create_ticket_request.dict(),
+                params={"refresh": config_info.UI_REFRESH_MODE}
             )
             ui.notify(
                 create_ticket_response.json().get(
@@ -238,7 +251,6 @@ def project_page(project_id: str) -> None:
                     "result", False) else "negative"
             )
             dialog.close()
-            time.sleep(1)
             ui.navigate.reload()
 
         with ui.row().classes("items-center justify-between"):
@@ -282,10 +294,13 @@ def project_page(project_id: str) -> None:
         description = ui.textarea("Description",
                                   value=project.description).classes("w-4/5")
 
-        all_users = requests.get(
+        all_users = get_all_pages(
+            "GET",
             f"{config_info.API_URL}"
-            f"/{config_info.API_ROUTES[APIOps.USERS_ALL]}"
-        ).json()["users"]
+            f"/{config_info.API_ROUTES[APIOps.USERS_ALL]}",
+            "users",
+            params={"fields": ["username"]}
+        )
         all_user_ids = [user["username"] for user in all_users]
         all_user_ids.remove(app.storage.user.get("username", ""))
 
@@ -331,7 +346,8 @@ def project_page(project_id: str) -> None:
             )
             edit_project_response = requests.put(
                 url=url,
-                json=edit_project_request.dict()
+                json=edit_project_request.dict(),
+                params={"refresh": config_info.UI_REFRESH_MODE}
             )
             ui.notify(
                 edit_project_response.json().get(
@@ -340,7 +356,6 @@ def project_page(project_id: str) -> None:
                 color="positive" if edit_project_response.json().get(
                     "result", False) else "negative"
             )
-            time.sleep(1)
             ui.navigate.reload()
 
         with ui.row().classes("items-center justify-between"):
@@ -364,14 +379,16 @@ def project_page(project_id: str) -> None:
             "This action cannot be undone."
         ).classes("text-lg")
 
-        def delete_button_clicked():
+        async def delete_button_clicked():
             delete_dialog.close()
-            delete_project_response = requests.delete(
+            delete_project_response = await run.io_bound(
+                requests.delete,
                 config_info.API_URL
                 + "/"
                 + config_info.API_ROUTES[APIOps.PROJECTS_DELETE].format(
                     project_id=project_id
-                )
+                ),
+                params={"refresh": config_info.UI_REFRESH_MODE}
             )
             ui.notify(
                 delete_project_response.json().get(
@@ -380,10 +397,11 @@ def project_page(project_id: str) -> None:
                 color="positive" if delete_project_response.json().get(
                     "result", False) else "negative"
             )
-            time.sleep(1)
-            ui.navigate.to(
-                config_info.UI_ROUTES[config_info.UIPages.PROJECTS]
-            )
+            task = delete_project_response.json().get("task")
+            if task is not None and await wait_for_deletion(task):
+                ui.navigate.to(
+                    config_info.UI_ROUTES[config_info.UIPages.PROJECTS]
+                )
 
         with ui.row().classes("items-center justify-between"):
             ui.button(
@@ -467,10 +485,10 @@ def project_page(project_id: str) -> None:
             project_id=project_id
         )
         )
-        project_tickets_response = requests.get(get_project_tickets_url).json()
         project_tickets = [
             models.Ticket.parse_obj(ticket)
-            for ticket in project_tickets_response["tickets"]
+            for ticket in get_all_pages(
+                "GET", get_project_tickets_url, "tickets")
         ]
 
         if not project_tickets:
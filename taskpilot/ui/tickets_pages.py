@@ -1,12 +1,10 @@
-import datetime
-import time
-
 import requests
 from nicegui import ui, app
 
 from taskpilot.common import config_info, api_request_classes as api_req, \
     models
 from taskpilot.common.config_info import APIOperations as APIOps
+from taskpilot.ui.ui_requests import get_all_pages
 
 
 def tickets_page() -> None:
@@ -32,7 +30,12 @@ def tickets_page() -> None:
                 user_id=app.storage.user.get("username", "")
             )
         )
-        user_projects = requests.get(get_user_projects_url).json()["projects"]
+        user_projects = get_all_pages(
+            "GET",
+            get_user_projects_url,
+            "projects",
+            params={"fields": ["project_id"]}
+        )
         user_project_ids = [project["project_id"] for project in user_projects]
 
         parent_project = ui.select(
@@ -45,16 +48,7 @@ def tickets_page() -> None:
                 ui.notify("Please select a parent project", color="negative")
                 return
 
-            next_ticket_id = requests.get(
-                config_info.API_URL
-                + "/"
-                + config_info.API_ROUTES[APIOps.PROJECTS_GET].format(
-                    project_id=parent_project.value
-                )
-            ).json()["project"]["next_ticket_id"]
-
             create_ticket_request = api_req.CreateTicketRequest(
-                ticket_id=f"{parent_project.value}-{next_ticket_id}",
                 title=title.value,
                 description=description.value,
                 type=ticket_type.value,
@@ -69,7 +63,8 @@ def tickets_page() -> None:
             )
             create_ticket_response = requests.post(
                 url=url,
-                json=create_ticket_request.dict()
+                json=create_ticket_request.dict(),
+                params={"refresh": config_info.UI_REFRESH_MODE}
             )
             ui.notify(
                 create_ticket_response.json().get(
@@ -79,7 +74,6 @@ def tickets_page() -> None:
                     "result", False) else "negative"
             )
             dialog.close()
-            time.sleep(1)
             ui.navigate.reload()
 
         with ui.row().classes("items-center justify-between"):
@@ -119,43 +113,22 @@ def tickets_page() -> None:
     with ui.column().classes("items-center w-full self-center px-6 py-2"):
         username = app.storage.user.get("username", "")
 
-        get_user_projects_url = (
+        search_visible_tickets_url = (
             config_info.API_URL
             + "/"
-            + config_info.API_ROUTES[APIOps.USERS_ALL_PROJECTS].format(
-                user_id=username
-            )
+            + config_info.API_ROUTES[
+                APIOps.USERS_SEARCH_VISIBLE_TICKETS].format(user_id=username)
         )
-        user_projects_response = requests.get(get_user_projects_url).json()
-        user_projects = [
-            models.Project.parse_obj(project)
-            for project in user_projects_response["projects"]
+        user_tickets = [
+            models.Ticket.parse_obj(ticket)
+            for ticket in get_all_pages(
+                "POST", search_visible_tickets_url, "tickets", json={})
         ]
 
-        user_tickets = []
-        for project in user_projects:
-            get_project_tickets_url = (
-                config_info.API_URL
-                + "/"
-                + config_info.API_ROUTES[APIOps.PROJECTS_ALL_TICKETS].format(
-                    project_id=project.project_id
-                )
-            )
-            project_tickets_response = requests.get(
-                get_project_tickets_url).json()
-            project_tickets = [
-                models.Ticket.parse_obj(ticket)
-                for ticket in project_tickets_response["tickets"]
-            ]
-            user_tickets.extend(project_tickets)
-
         if not user_tickets:
             ui.label("No tickets").classes("text-2xl")
             return
 
-        user_tickets.sort(key=lambda ticket: datetime.datetime.strptime(
-            ticket.modified_at, config_info.DATETIME_FORMAT), reverse=True)
-
         for ticket in user_tickets:
             with ui.card().classes("w-full"):
                 with ui.row().classes("items-center justify-between w-full"):
@@ -214,27 +187,60 @@ def ticket_page(ticket_id: str) -> None:
         }
     })
 
-    is_user_member_of_project = requests.get(
+    get_ticket_comments_url = (
         config_info.API_URL
         + "/"
-        + config_info.API_ROUTES[APIOps.PROJECTS_IS_USER_MEMBER].format(
-            project_id=ticket.parent_project,
-            user_id=app.storage.user.get("username", "")
-        )
-    ).json()["result"]
-    if not is_user_member_of_project:
-        ui.navigate.to(
-            config_info.UI_ROUTES[config_info.UIPages.PROJECTS]
+        + config_info.API_ROUTES[APIOps.TICKETS_ALL_COMMENTS].format(
+            ticket_id=ticket_id
         )
+    )
+    ticket_comments = [
+        models.Comment.parse_obj(comment)
+        for comment in get_all_pages(
+            "GET", get_ticket_comments_url, "comments")
+    ]
 
-    is_user_owner_of_ticket = requests.get(
+    permission_checks = [
+        api_req.PermissionCheck(
+            entity=config_info.Entities.PROJECT,
+            entity_id=ticket.parent_project,
+            permission=config_info.Permissions.MEMBER
+        ),
+        api_req.PermissionCheck(
+            entity=config_info.Entities.TICKET,
+            entity_id=ticket_id,
+            permission=config_info.Permissions.OWNER
+        )
+    ] + [
+        api_req.PermissionCheck(
+            entity=config_info.Entities.COMMENT,
+            entity_id=ticket_comment.comment_id,
+            permission=config_info.Permissions.OWNER
+        )
+        for ticket_comment in ticket_comments
+    ]
+    user_permissions = requests.post(
         config_info.API_URL
         + "/"
-        + config_info.API_ROUTES[APIOps.TICKETS_IS_USER_OWNER].format(
-            ticket_id=ticket_id,
+        + config_info.API_ROUTES[APIOps.USERS_CHECK_PERMISSIONS].format(
             user_id=app.storage.user.get("username", "")
+        ),
+        json=api_req.CheckPermissionsRequest(
+            checks=permission_checks
+        ).dict()
+    ).json().get("permissions") or [False] * len(permission_checks)
+
+    is_user_member_of_project = user_permissions[0]
+    if not is_user_member_of_project:
+        ui.navigate.to(
+            config_info.UI_ROUTES[config_info.UIPages.PROJECTS]
         )
-    ).json()["result"]
+
+    is_user_owner_of_ticket = user_permissions[1]
+    is_user_owner_of_comment = {
+        ticket_comment.comment_id: user_permissions[2 + position]
+        for position, ticket_comment in enumerate(ticket_comments)
+    }
 
     with ui.dialog() as modify_ticket_dialog, ui.card().classes(
             "w-full items-center"):
@@ -251,13 +257,16 @@ def ticket_page(ticket_id: str) -> None:
         parent_ticket = ui.select(
             label="Parent Ticket",
             options=["None"] + [ticket["ticket_id"]
-             for ticket in requests.get(
+             for ticket in get_all_pages(
+                "GET",
                 config_info.API_URL
                 + "/"
                 + config_info.API_ROUTES[APIOps.PROJECTS_ALL_TICKETS].format(
                     project_id=ticket.parent_project
-                )
-            ).json()["tickets"]],
+                ),
+                "tickets",
+                params={"fields": ["ticket_id"]}
+            )],
             value=ticket.parent_ticket if ticket.parent_ticket else "None"
         ).classes("w-4/5")
         with ui.row().classes("items-center justify-between"):
@@ -283,10 +292,10 @@ def ticket_page(ticket_id: str) -> None:
                             parent_ticket=(parent_ticket.value
                                            if parent_ticket.value != "None"
                                            else None)
-                        ).dict()
+                        ).dict(),
+                        params={"refresh": config_info.UI_REFRESH_MODE}
                     ),
                     modify_ticket_dialog.close(),
-                    time.sleep(1),
                     ui.navigate.reload()
                 )
             ).classes("text-white mr-2")
@@ -308,10 +317,10 @@ def ticket_page(ticket_id: str) -> None:
                         + "/"
                         + config_info.API_ROUTES[APIOps.TICKETS_DELETE].format(
                             ticket_id=ticket_id
-                        )
+                        ),
+                        params={"refresh": config_info.UI_REFRESH_MODE}
                     ),
                     delete_ticket_dialog.close(),
-                    time.sleep(1),
                     ui.navigate.to(
                         config_info.UI_ROUTES[config_info.UIPages.TICKETS]
                     )
@@ -343,16 +352,6 @@ def ticket_page(ticket_id: str) -> None:
                         + "/"
                         + config_info.API_ROUTES[APIOps.TICKETS_CREATE],
                         json=api_req.CreateTicketRequest(
-                            ticket_id=t.parent_project + "-" + str(
-                                requests.get(
-                                    config_info.API_URL
-                                    + "/"
-                                    + config_info.API_ROUTES[
-                                        APIOps.PROJECTS_GET].format(
-                                        project_id=t.parent_project
-                                    )
-                                ).json()["project"]["next_ticket_id"]
-                            ),
                             title=child_title.value,
                             description=child_description.value,
                             type=child_ticket_type.value,
@@ -361,10 +360,10 @@ def ticket_page(ticket_id: str) -> None:
                             created_by=app.storage.user.get("username", ""),
                             parent_project=t.parent_project,
                             parent_ticket=ticket_id
-                        ).dict()
+                        ).dict(),
+                        params={"refresh": config_info.UI_REFRESH_MODE}
                     ),
                     create_child_ticket_dialog.close(),
-                    time.sleep(1),
                     ui.navigate.reload()
                 )
             ).classes("text-white mr-2")
@@ -393,23 +392,13 @@ def ticket_page(ticket_id: str) -> None:
                         + "/"
                         + config_info.API_ROUTES[APIOps.COMMENTS_CREATE],
                         json=api_req.CreateCommentRequest(
-                            comment_id=ticket.ticket_id + "-" + str(
-                                requests.get(
-                                    config_info.API_URL
-                                    + "/"
-                                    + config_info.API_ROUTES[
-                                        APIOps.TICKETS_GET].format(
-                                        ticket_id=ticket_id
-                                    )
-                                ).json()["ticket"]["next_comment_id"]
-                            ),
                             ticket_id=ticket_id,
                             text=comment_content.value,
                             created_by=app.storage.user.get("username", "")
-                        ).dict()
+                        ).dict(),
+                        params={"refresh": config_info.UI_REFRESH_MODE}
                     ),
                     create_comment_dialog.close(),
-                    time.sleep(1),
                     ui.navigate.reload()
                 )
             ).classes("text-white mr-2")
@@ -454,9 +443,11 @@ def ticket_page(ticket_id: str) -> None:
                                             "username", ""),
                                         parent_project=t.parent_project,
                                         parent_ticket=t.parent_ticket
-                                    ).dict()
+                                    ).dict(),
+                                    params={
+                                        "refresh": config_info.UI_REFRESH_MODE
+                                    }
                                 ),
-                                time.sleep(1),
                                 ui.navigate.reload()
                             )
                         )
@@ -484,9 +475,11 @@ def ticket_page(ticket_id: str) -> None:
                                             "username", ""),
                                         parent_project=t.parent_project,
                                         parent_ticket=t.parent_ticket
-                                    ).dict()
+                                    ).dict(),
+                                    params={
+                                        "refresh": config_info.UI_REFRESH_MODE
+                                    }
                                 ),
-                                time.sleep(1),
                                 ui.navigate.reload()
                             )
                         )
@@ -519,9 +512,11 @@ def ticket_page(ticket_id: str) -> None:
                                             "username", ""),
                                         parent_project=t.parent_project,
                                         parent_ticket=t.parent_ticket
-                                    ).dict()
+                                    ).dict(),
+                                    params={
+                                        "refresh": config_info.UI_REFRESH_MODE
+                                    }
                                 ),
-                                time.sleep(1),
                                 ui.navigate.reload()
                             )
                         )
@@ -566,8 +561,9 @@ def ticket_page(ticket_id: str) -> None:
                     modified_by=app.storage.user.get("username", ""),
                     parent_project=t.parent_project,
                     parent_ticket=t.parent_ticket
-                ).dict()
-            ), time.sleep(1), ui.navigate.reload())
+                ).dict(),
+                params={"refresh": config_info.UI_REFRESH_MODE}
+            ), ui.navigate.reload())
         ).classes("text-lg w-1/6")
 
     with ui.row().classes("items-center justify-between w-full self-center"
@@ -633,10 +629,10 @@ def ticket_page(ticket_id: str) -> None:
             ticket_id=ticket_id
         )
     )
-    child_tickets_response = requests.get(get_child_tickets_url).json()
     child_tickets = [
         models.Ticket.parse_obj(ticket)
-        for ticket in child_tickets_response["tickets"]
+        for ticket in get_all_pages(
+            "GET", get_child_tickets_url, "tickets")
     ]
 
     if not child_tickets:
@@ -682,19 +678,6 @@ def ticket_page(ticket_id: str) -> None:
             on_click=open_create_comment_dialog
         ).classes("text-white text-base")
 
-    get_ticket_comments_url = (
-        config_info.API_URL
-        + "/"
-        + config_info.API_ROUTES[APIOps.TICKETS_ALL_COMMENTS].format(
-            ticket_id=ticket_id
-        )
-    )
-    ticket_comments_response = requests.get(get_ticket_comments_url).json()
-    ticket_comments = [
-        models.Comment.parse_obj(comment)
-        for comment in ticket_comments_response["comments"]
-    ]
-
     if not ticket_comments:
         ui.label("No comments").classes("text-2xl self-center")
         return
@@ -707,15 +690,7 @@ def ticket_page(ticket_id: str) -> None:
                     ui.space()
                     ui.label(ticket_comment.created_at).classes("text-base"
                                                                 " px-4")
-                    if requests.get(
-                            config_info.API_URL
-                            + "/"
-                            + config_info.API_ROUTES[
-                                APIOps.COMMENTS_IS_USER_OWNER].format(
-                                comment_id=ticket_comment.comment_id,
-                                user_id=app.storage.user.get("username", "")
-                            )
-                    ).json()["result"]:
+                    if is_user_owner_of_comment[ticket_comment.comment_id]:
                         ui.chip(
                             "Delete",
                             icon="delete",
@@ -727,9 +702,11 @@ def ticket_page(ticket_id: str) -> None:
                                     + config_info.API_ROUTES[
                                         APIOps.COMMENTS_DELETE].format(
                                         comment_id=c.comment_id
-                                    )
+                                    ),
+                                    params={
+                                        "refresh": config_info.UI_REFRESH_MODE
+                                    }
                                 ),
-                                time.sleep(1),
                                 ui.navigate.reload()
                             )
                         ).classes("text-white text-base")
@@ -1,14 +1,14 @@
 """Page helpers for the TaskPilot application"""
-import requests
 from nicegui import app, ui
 
-from taskpilot.common import config_info
+from taskpilot.common import config_info, api_request_classes as api_req
 from taskpilot.common.config_info import APIOperations as APIOps
 from taskpilot.common import models
 from taskpilot.ui import header_page
 from taskpilot.ui import projects_pages
 from taskpilot.ui import tickets_pages
 from taskpilot.ui import auth_pages
+from taskpilot.ui.ui_requests import get_all_pages
 
 from typing import List, Dict
 
@@ -36,16 +36,27 @@ def main_page() -> None:
     ui.separator()
 
     with ui.column().classes("items-center w-full self-center px-6 py-2"):
-        assigned_tickets = requests.get(
+        search_request = api_req.SearchTicketsRequest(
+            assignee=app.storage.user.get("username", ""),
+            filters=[
+                api_req.SearchFilter(
+                    field="status",
+                    values=[config_info.TicketStatuses.CLOSED],
+                    negate=True
+                )
+            ]
+        )
+        assigned_tickets = get_all_pages(
+            "POST",
             config_info.API_URL
             + "/"
-            + config_info.API_ROUTES[APIOps.USERS_ALL_ASSIGNED_TICKETS].format(
-                user_id=app.storage.user.get("username", ""))
-        ).json()["tickets"]
+            + config_info.API_ROUTES[APIOps.TICKETS_SEARCH],
+            "tickets",
+            json=search_request.dict()
+        )
 
         assigned_tickets = [
             models.Ticket.parse_obj(ticket) for ticket in assigned_tickets
-            if ticket["status"] != config_info.TicketStatuses.CLOSED
         ]
 
         if not assigned_tickets:
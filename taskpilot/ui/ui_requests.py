@@ -0,0 +1,54 @@
+"""Requests to the API for the TaskPilot application"""
+import asyncio
+import time
+
+from typing import Any, Dict, List, Optional
+
+import requests
+from nicegui import run
+
+from taskpilot.common import config_info
+from taskpilot.common.config_info import APIOperations as APIOps
+
+
+def get_all_pages(method: str,
+                  url: str,
+                  key: str,
+                  params: Optional[Dict[str, Any]] = None,
+                  json: Optional[Dict[str, Any]] = None
+                  ) -> List[Dict[str, Any]]:
+    """
+    Get the items of every page of a list endpoint of the API, following
+    the cursors it returns until the last page or the first failed one
+    """
+    params = dict(params or {})
+    items = []
+    while True:
+        page = requests.request(method, url, params=params, json=json).json()
+        items.extend(page.get(key) or [])
+        if not page.get("next_cursor"):
+            return items
+        params["cursor"] = page["next_cursor"]
+
+
+async def wait_for_task(task: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Poll a background task of the API without blocking the UI until it is
+    no longer running or the polling times out, returning its last state,
+    or None if it could not be retrieved
+    """
+    deadline = time.monotonic() + config_info.UI_TASK_POLL_TIMEOUT
+    while (task is not None
+           and task["status"] == config_info.TaskStatuses.RUNNING
+           and time.monotonic() < deadline):
+        await asyncio.sleep(config_info.UI_TASK_POLL_INTERVAL)
+        task_response = await run.io_bound(
+            requests.get,
+            config_info.API_URL
+            + "/"
+            + config_info.API_ROUTES[APIOps.TASKS_GET].format(
+                task_id=task["task_id"]
+            )
+        )
+        task = task_response.json().get("task")
+    return task
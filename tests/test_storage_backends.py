@@ -0,0 +1,282 @@
+"""
+Tests running the same scenarios against the in-memory and the SQLite
+storage backends, so that both keep translating queries the same way, and
+of the pure helpers they share
+"""
+import time
+
+from typing import Any, Dict, List, Optional
+
+import pytest
+from fastapi.testclient import TestClient
+
+from taskpilot.api import db_operations as db
+from taskpilot.api import permissions
+from taskpilot.api import storage_backends as storage
+from taskpilot.api.api_main import app
+from taskpilot.common import config_info
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def client(request, tmp_path):
+    """API client served by a fresh backend of each kind"""
+    if request.param == "memory":
+        backend = storage.InMemoryBackend()
+    else:
+        backend = storage.SQLiteBackend(str(tmp_path / "taskpilot.db"))
+    storage.set_backend(backend)
+    permissions.invalidate_all()
+    with TestClient(app) as test_client:
+        yield test_client
+    storage.set_backend(None)
+
+
+def create_user(client: TestClient, username: str) -> None:
+    """Create a user with placeholder details"""
+    response = client.post("/api/users", json={
+        "username": username,
+        "email": f"{username}@example.com",
+        "full_name": username.upper(),
+        "password": "password"
+    }).json()
+    assert response["result"], response
+
+
+def create_project(client: TestClient,
+                   project_id: str,
+                   created_by: str,
+                   members: Optional[List[str]] = None) -> None:
+    """Create a project with placeholder details"""
+    response = client.post("/api/projects", json={
+        "project_id": project_id,
+        "title": f"Project {project_id}",
+        "description": "description",
+        "created_by": created_by,
+        "members": members or []
+    }).json()
+    assert response["result"], response
+
+
+def ticket_body(project_id: str,
+                parent_ticket: Optional[str] = None,
+                **fields: Any) -> Dict[str, Any]:
+    """Build the body of a ticket creation or update request"""
+    return {
+        "title": "title",
+        "description": "description",
+        "type": "Task",
+        "priority": "Low",
+        "status": "Not Started",
+        "parent_project": project_id,
+        "parent_ticket": parent_ticket,
+        **fields
+    }
+
+
+def create_ticket(client: TestClient,
+                  ticket_id: str,
+                  project_id: str,
+                  parent_ticket: Optional[str] = None,
+                  created_by: str = "alice",
+                  **fields: Any) -> None:
+    """Create a ticket with placeholder details"""
+    response = client.post("/api/tickets", json=ticket_body(
+        project_id, parent_ticket, ticket_id=ticket_id,
+        created_by=created_by, **fields)).json()
+    assert response["result"], response
+
+
+def get_ticket(client: TestClient, ticket_id: str) -> Dict[str, Any]:
+    """Get a ticket"""
+    return client.get(f"/api/tickets/{ticket_id}").json()["ticket"]
+
+
+def get_ticket_ids(response: Dict[str, Any]) -> List[str]:
+    """Get the sorted ids of the tickets of a response"""
+    return sorted(ticket["ticket_id"] for ticket in response["tickets"])
+
+
+def wait_for_task(client: TestClient, task: Dict[str, Any]) -> Dict[str, Any]:
+    """Poll a background task until it is no longer running"""
+    for _ in range(100):
+        if task["status"] != config_info.TaskStatuses.RUNNING:
+            return task
+        time.sleep(0.05)
+        task = client.get(f"/api/tasks/{task['task_id']}").json()["task"]
+    raise AssertionError(f"task {task['task_id']} is still running")
+
+
+@pytest.fixture
+def hierarchy(client):
+    """Tickets A-0 > A-1 > A-2 in project A, created by alice"""
+    create_user(client, "alice")
+    create_user(client, "bob")
+    create_project(client, "A", "alice", members=["bob"])
+    create_ticket(client, "A-0", "A")
+    create_ticket(client, "A-1", "A", "A-0")
+    create_ticket(client, "A-2", "A", "A-1")
+    return client
+
+
+def test_created_tickets_keep_their_path(hierarchy):
+    """Created tickets store their ancestors from the root down"""
+    assert get_ticket(hierarchy, "A-2")["ancestors"] == ["A-0", "A-1"]
+    assert get_ticket(hierarchy, "A-2")["depth"] == 2
+    ancestors = hierarchy.get("/api/tickets/A-2/ancestor-tickets").json()
+    assert get_ticket_ids(ancestors) == ["A-0", "A-1"]
+    descendants = hierarchy.get(
+        "/api/tickets/A-0/descendant-tickets").json()
+    assert get_ticket_ids(descendants) == ["A-1", "A-2"]
+
+
+def test_reparenting_rebases_the_descendants(hierarchy):
+    """Moving a ticket moves the paths of its whole subtree"""
+    create_ticket(hierarchy, "A-3", "A")
+    response = hierarchy.put("/api/tickets/A-1", json=ticket_body(
+        "A", "A-3", modified_by="alice")).json()
+    assert response["result"], response
+    assert get_ticket(hierarchy, "A-1")["ancestors"] == ["A-3"]
+    assert get_ticket(hierarchy, "A-2")["ancestors"] == ["A-3", "A-1"]
+    assert get_ticket(hierarchy, "A-2")["depth"] == 2
+
+
+def test_reparenting_under_a_descendant_is_rejected(hierarchy):
+    """A ticket cannot become a descendant of itself"""
+    response = hierarchy.put("/api/tickets/A-0", json=ticket_body(
+        "A", "A-2", modified_by="alice")).json()
+    assert not response["result"]
+    assert get_ticket(hierarchy, "A-0")["parent_ticket"] is None
+    assert get_ticket(hierarchy, "A-0")["ancestors"] == []
+
+
+def test_project_deletion_detaches_the_other_projects(hierarchy):
+    """
+    Deleting a project deletes its tickets and their comments and cuts the
+    paths of the descendants in other projects below the deleted tickets
+    """
+    create_project(hierarchy, "B", "alice")
+    create_ticket(hierarchy, "B-0", "B", "A-2")
+    create_ticket(hierarchy, "B-1", "B", "B-0")
+    response = hierarchy.post("/api/comments", json={
+        "ticket_id": "A-1", "text": "text", "created_by": "bob"}).json()
+    assert response["result"], response
+
+    task = hierarchy.delete("/api/projects/A").json()["task"]
+    task = wait_for_task(hierarchy, task)
+    assert task["status"] == config_info.TaskStatuses.COMPLETED, task
+
+    assert get_ticket_ids(hierarchy.get("/api/tickets").json()) == [
+        "B-0", "B-1"]
+    assert hierarchy.get("/api/comments").json()["comments"] == []
+    assert get_ticket(hierarchy, "B-0")["parent_ticket"] is None
+    assert get_ticket(hierarchy, "B-0")["ancestors"] == []
+    assert get_ticket(hierarchy, "B-1")["ancestors"] == ["B-0"]
+    ancestors = hierarchy.get("/api/tickets/B-1/ancestor-tickets").json()
+    assert get_ticket_ids(ancestors) == ["B-0"]
+
+
+def test_permissions(hierarchy):
+    """Rights come from owning the project or creating an ancestor ticket"""
+    create_user(hierarchy, "carol")
+    create_project(hierarchy, "C", "carol", members=["alice"])
+    create_ticket(hierarchy, "C-0", "C", "A-1", created_by="bob")
+    checks = [
+        {"entity": "project", "entity_id": "A", "permission": "member"},
+        {"entity": "project", "entity_id": "A", "permission": "owner"},
+        {"entity": "ticket", "entity_id": "C-0", "permission": "owner"},
+        {"entity": "ticket", "entity_id": "missing", "permission": "owner"}
+    ]
+    allowed = {
+        user_id: hierarchy.post(f"/api/users/{user_id}/permissions",
+                                json={"checks": checks}).json()["permissions"]
+        for user_id in ("alice", "bob", "carol")
+    }
+    assert allowed == {
+        "alice": [True, True, True, None],
+        "bob": [True, False, True, None],
+        "carol": [False, False, True, None]
+    }
+
+
+def test_search_filters(hierarchy):
+    """Filters on terms, ranges, prefixes and existence, also negated"""
+    create_ticket(hierarchy, "A-3", "A", priority="High", assignee="bob")
+
+    def search(*filters: Dict[str, Any]) -> List[str]:
+        return get_ticket_ids(hierarchy.post(
+            "/api/tickets/search", json={"filters": list(filters)}).json())
+
+    assert search({"field": "priority", "values": ["High"]}) == ["A-3"]
+    assert search({"field": "depth", "gte": 1, "lt": 2}) == ["A-1"]
+    assert search({"field": "ticket_id", "prefix": "A-"}) == [
+        "A-0", "A-1", "A-2", "A-3"]
+    assert search({"field": "assignee", "exists": True}) == ["A-3"]
+    assert search({"field": "parent_ticket", "exists": True,
+                   "negate": True}) == ["A-0", "A-3"]
+    assert search({"field": "ancestors", "values": ["A-0"]},
+                  {"field": "depth", "gt": 1}) == ["A-2"]
+
+
+def test_cursor_paging(hierarchy):
+    """Pages follow one another without gaps or repeats"""
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, "sort_by": "ticket_id"}
+        if cursor:
+            params["cursor"] = cursor
+        page = hierarchy.get("/api/tickets", params=params).json()
+        seen.extend(ticket["ticket_id"] for ticket in page["tickets"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert seen == ["A-0", "A-1", "A-2"]
+
+    response = hierarchy.get("/api/tickets", params={"cursor": "!"})
+    assert response.status_code == 422
+
+
+def test_build_ticket_paths():
+    """Paths run from the root down to the parent"""
+    assert db.build_ticket_paths({"a": None, "b": "a", "c": "b"}) == {
+        "a": {"ancestors": [], "depth": 0},
+        "b": {"ancestors": ["a"], "depth": 1},
+        "c": {"ancestors": ["a", "b"], "depth": 2}
+    }
+
+
+def test_build_ticket_paths_order_independent():
+    """Children listed before their parents get the same paths"""
+    assert db.build_ticket_paths({"c": "b", "b": "a", "a": None}) == (
+        db.build_ticket_paths({"a": None, "b": "a", "c": "b"}))
+
+
+def test_build_ticket_paths_missing_parent():
+    """Parents that do not exist are left out of the paths"""
+    assert db.build_ticket_paths({"b": "missing", "c": "b"}) == {
+        "b": {"ancestors": [], "depth": 0},
+        "c": {"ancestors": ["b"], "depth": 1}
+    }
+
+
+def test_build_ticket_paths_cycle():
+    """A cycle is cut so that every ticket still gets a finite path"""
+    paths = db.build_ticket_paths({"a": "c", "b": "a", "c": "b", "d": "c"})
+    assert set(paths) == {"a", "b", "c", "d"}
+    for ticket_id, path in paths.items():
+        assert ticket_id not in path["ancestors"]
+        assert len(set(path["ancestors"])) == path["depth"]
+    assert paths["d"]["ancestors"] == paths["c"]["ancestors"] + ["c"]
+
+
+def test_cursor_round_trip():
+    """Cursors decode back to the sort values they were built from"""
+    sort_values = ["2024-01-01 00:00:00", "A-1"]
+    assert db.decode_cursor(db.encode_cursor(sort_values)) == sort_values
+
+
+@pytest.mark.parametrize("cursor", ["!", "bm90IGpzb24=", "e30=", "W10="])
+def test_invalid_cursor(cursor):
+    """Cursors that were not issued for a page are rejected"""
+    with pytest.raises(db.InvalidCursorError):
+        db.decode_cursor(cursor)